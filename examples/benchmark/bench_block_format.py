@@ -0,0 +1,115 @@
+"""Block format benchmark: bytes on disk and throughput.
+
+Writes the same texts through `finmy.block_store.BlockStore` in every block
+format (plain JSON, gzip, zstd and zstd with a dictionary trained on the
+texts) and reports:
+
+- the bytes on disk of the blocks and the ratio to plain JSON;
+- the write throughput (MB of text per second, flush included);
+- the read throughput of all records, in random order, from a fresh store
+  with the read cache disabled.
+
+Texts come from the blocks of an existing data folder (``--data-dir``, e.g.
+the DATA_DIR of a deployment) or are generated. zstd formats are skipped
+when the ``zstandard`` package is not installed.
+
+Usage:
+    python examples/benchmark/bench_block_format.py --data-dir ./data --records 10000
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from finmy.block_codec import iter_block_texts, train_zstd_dictionary
+from finmy.block_store import BlockStore
+
+WORDS = (
+    "market fund risk bank loan default bubble crash investor fraud scheme "
+    "exchange price asset liquidity regulator deposit interest bond equity "
+    "the of and to in a is that for on with as by was were at"
+).split()
+
+
+def make_texts(count: int, size: int):
+    """Return `count` generated texts of about `size` characters."""
+    texts = []
+    for _ in range(count):
+        words = random.choices(WORDS, k=max(1, size // 6))
+        texts.append(" ".join(words)[:size])
+    return texts
+
+
+def block_bytes(block_dir: str) -> int:
+    """Total size of the block files in `block_dir`."""
+    return sum(
+        os.path.getsize(os.path.join(block_dir, name))
+        for name in os.listdir(block_dir)
+        if os.path.isfile(os.path.join(block_dir, name))
+    )
+
+
+def bench_format(block_format: str, texts, dictionary: bool):
+    """Write and read `texts` in one format; return bytes and seconds."""
+    with tempfile.TemporaryDirectory() as folder:
+        if dictionary:
+            train_zstd_dictionary(
+                os.path.join(folder, "blocks"), texts=texts[:20000]
+            )
+        store = BlockStore(folder, cache_bytes=0, block_format=block_format)
+        start = time.perf_counter()
+        keys = store.write_many(texts)
+        store.flush()
+        write_time = time.perf_counter() - start
+        size = block_bytes(store.block_dir)
+
+        random.shuffle(keys)
+        reader = BlockStore(folder, cache_bytes=0, block_format=block_format)
+        start = time.perf_counter()
+        reader.read_many(keys)
+        read_time = time.perf_counter() - start
+    return size, write_time, read_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinMycelium block format benchmark.")
+    parser.add_argument(
+        "--data-dir", type=str, default=None, help="Data folder to sample texts from"
+    )
+    parser.add_argument("--records", type=int, default=10000, help="Texts written")
+    parser.add_argument(
+        "--text-size", type=int, default=2000, help="Characters per generated text"
+    )
+    args = parser.parse_args()
+
+    if args.data_dir:
+        texts = list(
+            iter_block_texts(os.path.join(args.data_dir, "blocks"), args.records)
+        )
+    else:
+        texts = make_texts(args.records, args.text_size)
+    text_mb = sum(len(text.encode("utf-8")) for text in texts) / 1e6
+
+    formats = [("json", "json", False), ("gzip", "gzip", False)]
+    try:
+        import zstandard  # noqa: F401
+
+        formats += [("zstd", "zstd", False), ("zstd+dict", "zstd", True)]
+    except ImportError:
+        print("zstandard is not installed, skipping zstd formats")
+
+    print(f"{len(texts)} texts, {text_mb:.1f} MB")
+    print(
+        f"{'format':<10} {'bytes':>12} {'ratio':>7} "
+        f"{'write (MB/s)':>13} {'read (MB/s)':>12}"
+    )
+    json_size = None
+    for name, block_format, dictionary in formats:
+        size, write_time, read_time = bench_format(block_format, texts, dictionary)
+        json_size = json_size or size
+        print(
+            f"{name:<10} {size:>12} {size / json_size:>7.2f} "
+            f"{text_mb / write_time:>13.1f} {text_mb / read_time:>12.1f}"
+        )
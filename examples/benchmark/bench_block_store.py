@@ -0,0 +1,121 @@
+"""Per-call overhead benchmark of the text block store.
+
+Writes and reads `--records` texts (10k by default) through:
+
+- ``legacy``: a new lmbase `BlockBasedStoreManager` per call, as
+  `write_text_data_to_block` / `read_text_data_from_block` used to do;
+- ``pooled``: the process-wide `finmy.block_store.BlockStore` used by the
+  converter, flushed once after the writes;
+- ``bulk``: the same store through `write_many` / `read_many`, with the
+  keys read in random order;
+- ``segments``: the same bulk calls with the segment backend
+  (``FINMY_BLOCK_BACKEND=segments``).
+
+The finmy stores run with the read cache disabled.
+
+Each backend runs in its own temporary data folder and the mean time per
+write and per read is reported in microseconds.
+
+Usage:
+    python examples/benchmark/bench_block_store.py --records 10000 --text-size 2000
+"""
+
+import os
+import time
+import random
+import string
+import argparse
+import tempfile
+
+from lmbase.utils.tools import BlockBasedStoreManager
+
+from finmy.block_store import BlockStore
+
+
+def make_texts(count: int, size: int):
+    """Return `count` random texts of `size` characters."""
+    alphabet = string.ascii_letters + string.digits + " "
+    return ["".join(random.choices(alphabet, k=size)) for _ in range(count)]
+
+
+def bench_legacy(folder: str, texts):
+    """Time writes and reads with a new block manager per call."""
+    keys = []
+    start = time.perf_counter()
+    for text in texts:
+        bbsm = BlockBasedStoreManager(folder=folder, file_format="json", block_size=1000)
+        key = f"text_{int(time.time() * 1e6)}{random.randint(1000, 9999)}"
+        bbsm.save(savename=key, data={"text": text})
+        keys.append(key)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        bbsm = BlockBasedStoreManager(folder=folder, file_format="json", block_size=1000)
+        bbsm.load(key)["text"]
+    read_time = time.perf_counter() - start
+    return write_time, read_time
+
+
+def bench_pooled(folder: str, texts):
+    """Time writes and reads through one shared block store."""
+    store = BlockStore(folder, cache_bytes=0)
+    start = time.perf_counter()
+    keys = [store.write(text) for text in texts]
+    store.flush()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        store.read(key)
+    read_time = time.perf_counter() - start
+    store.close()
+    return write_time, read_time
+
+
+def bench_bulk(folder: str, texts, backend: str = "blocks"):
+    """Time one bulk write and one bulk read through a block store."""
+    store = BlockStore(folder, cache_bytes=0, backend=backend)
+    start = time.perf_counter()
+    keys = store.write_many(texts)
+    store.flush()
+    write_time = time.perf_counter() - start
+
+    random.shuffle(keys)
+    start = time.perf_counter()
+    store.read_many(keys)
+    read_time = time.perf_counter() - start
+    store.close()
+    return write_time, read_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinMycelium block store benchmark.")
+    parser.add_argument("--records", type=int, default=10000, help="Texts written")
+    parser.add_argument(
+        "--text-size", type=int, default=2000, help="Characters per text"
+    )
+    parser.add_argument(
+        "--skip-legacy",
+        action="store_true",
+        help="Only measure the finmy store (the legacy run is slow)",
+    )
+    args = parser.parse_args()
+
+    texts = make_texts(args.records, args.text_size)
+    backends = [
+        ("pooled", bench_pooled),
+        ("bulk", bench_bulk),
+        ("segments", lambda folder, texts: bench_bulk(folder, texts, "segments")),
+    ]
+    if not args.skip_legacy:
+        backends.insert(0, ("legacy", bench_legacy))
+
+    print(f"{'backend':<9} {'write (us/call)':>16} {'read (us/call)':>16}")
+    for name, bench in backends:
+        with tempfile.TemporaryDirectory() as folder:
+            write_time, read_time = bench(folder, texts)
+        print(
+            f"{name:<9} {write_time / len(texts) * 1e6:>16.1f} "
+            f"{read_time / len(texts) * 1e6:>16.1f}"
+        )
@@ -0,0 +1,156 @@
+"""Cold-start benchmark for the FinMycelium pipeline.
+
+Measures, each in a fresh interpreter so that nothing is cached in
+`sys.modules`:
+
+- the time of `import finmy.pipeline`;
+- the time of `FinmyPipeline(config)` construction (after the import);
+- optionally the time of `FinmyPipeline.warmup()`.
+
+The slowest imported modules are reported from `python -X importtime`, and the
+script exits with status 1 when a median exceeds its budget, so it can guard
+startup time in CI.
+
+Usage:
+    python examples/benchmark/bench_startup.py -c configs/pipline.yml \\
+        --repeat 5 --import-budget 3.0 --init-budget 1.0
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import finmy.pipeline
+print(time.perf_counter() - start)
+"""
+
+INIT_SNIPPET = """
+import json, sys, time
+import yaml
+from finmy.pipeline import FinmyPipeline
+with open(sys.argv[1], "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+start = time.perf_counter()
+pipeline = FinmyPipeline(config)
+init_time = time.perf_counter() - start
+warmup_time = None
+if sys.argv[2] == "1":
+    start = time.perf_counter()
+    pipeline.warmup()
+    warmup_time = time.perf_counter() - start
+print(json.dumps({"init": init_time, "warmup": warmup_time}))
+"""
+
+
+def run_snippet(snippet: str, *args: str) -> str:
+    """Run `snippet` in a fresh interpreter and return its last output line."""
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def slowest_imports(top: int):
+    """Return the `top` modules with the largest cumulative import time."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import finmy.pipeline"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line.split(":", 1)[1].split("|")
+        self_us, cumulative_us, module = int(fields[0]), int(fields[1]), fields[2]
+        rows.append((cumulative_us, self_us, module.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def summarize(samples):
+    """Return min / median / max of the timing samples."""
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinMycelium cold-start benchmark.")
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        default="configs/pipline.yml",
+        help="Path to YAML config file for pipeline",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    parser.add_argument(
+        "--warmup", action="store_true", help="Also measure FinmyPipeline.warmup()"
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="Number of slowest imports to show"
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=None,
+        help="Maximum median seconds for `import finmy.pipeline`",
+    )
+    parser.add_argument(
+        "--init-budget",
+        type=float,
+        default=None,
+        help="Maximum median seconds for FinmyPipeline construction",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.config):
+        raise FileNotFoundError(f"Configuration file not found: {args.config}")
+
+    import_times = [float(run_snippet(IMPORT_SNIPPET)) for _ in range(args.repeat)]
+    init_runs = [
+        json.loads(run_snippet(INIT_SNIPPET, args.config, "1" if args.warmup else "0"))
+        for _ in range(args.repeat)
+    ]
+
+    report = {
+        "import": summarize(import_times),
+        "init": summarize([run["init"] for run in init_runs]),
+    }
+    if args.warmup:
+        report["warmup"] = summarize([run["warmup"] for run in init_runs])
+
+    print(f"{'stage':<8} {'min (s)':>10} {'median (s)':>12} {'max (s)':>10}")
+    for stage, stats in report.items():
+        print(
+            f"{stage:<8} {stats['min']:>10.3f} {stats['median']:>12.3f} "
+            f"{stats['max']:>10.3f}"
+        )
+
+    print("\nSlowest imports of finmy.pipeline (cumulative):")
+    for cumulative_us, self_us, module in slowest_imports(args.top):
+        print(f"  {cumulative_us / 1e6:8.3f}s  (self {self_us / 1e6:6.3f}s)  {module}")
+
+    failed = False
+    for stage, budget in (("import", args.import_budget), ("init", args.init_budget)):
+        if budget is not None and report[stage]["median"] > budget:
+            print(
+                f"FAIL: median {stage} time {report[stage]['median']:.3f}s "
+                f"exceeds budget {budget:.3f}s"
+            )
+            failed = True
+    sys.exit(1 if failed else 0)
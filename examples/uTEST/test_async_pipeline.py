@@ -0,0 +1,71 @@
+"""Test script for running the asyncio FinMycelium pipeline.
+
+Runs several reconstruction requests concurrently on one event loop with
+`FinmyAsyncPipeline`, bounding the worker threads used for blocking work
+(LLM calls, database and block storage IO) with `--max-threads`.
+"""
+
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+from finmy.async_pipeline import FinmyAsyncPipeline
+
+
+async def main(config: dict, num_requests: int, max_threads: int):
+    """Serve `num_requests` concurrent requests with one pipeline."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_threads)
+    )
+    pipeline = FinmyAsyncPipeline(config)
+
+    start_time = time.time()
+    results = await asyncio.gather(
+        *[
+            pipeline.lm_build_pipeline_with_contents(
+                contents=["识别与人工智能在金融风控与合规相关的内容"],
+                query_text=f"金融风控 {idx}",
+                key_words=["金融风控", "合规", "人工智能"],
+            )
+            for idx in range(num_requests)
+        ],
+        return_exceptions=True,
+    )
+    print(f"{num_requests} requests finished in {time.time() - start_time:.2f}s")
+    for idx, result in enumerate(results):
+        print(f"request {idx}:", type(result).__name__, result)
+
+
+if __name__ == "__main__":
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Run the asyncio FinMycelium pipeline with YAML config."
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        default="configs/pipline.yml",
+        help="Path to YAML config file for pipeline",
+    )
+    parser.add_argument(
+        "-n", "--num-requests", type=int, default=4, help="Concurrent requests"
+    )
+    parser.add_argument(
+        "--max-threads", type=int, default=4, help="Threads for blocking work"
+    )
+    args = parser.parse_args()
+
+    config_file = Path(args.config)
+    if not config_file.exists():
+        raise FileNotFoundError(
+            f"Configuration file not found: {args.config}. "
+            f"Please provide a valid path to the YAML config file."
+        )
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    asyncio.run(main(config, args.num_requests, args.max_threads))
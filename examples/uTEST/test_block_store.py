@@ -0,0 +1,173 @@
+"""
+Tests for finmy.block_store and finmy.segment_store: write/read round-trips.
+
+Purpose:
+- Write texts through `BlockStore` with the block and the segment backend, in
+  time and content key mode, and read them back from the writing store and
+  from a new store of the same data folder (as another process would).
+- Check block rollover, in-place flushes of the open block, segment rollover
+  and character spans of multi-byte records.
+
+How to run:
+- Run directly: python examples/uTEST/test_block_store.py
+"""
+
+import os
+import tempfile
+
+from finmy.block_store import BlockStore, CONTENT_KEY_PREFIX
+from finmy.segment_store import SegmentStore
+
+TEXTS = [
+    "近年来，人工智能在资本市场与零售金融的应用显著增加。",
+    "Machine learning is used for credit scoring and fraud detection.",
+    "",
+    "模型合规、透明度与韧性 / model compliance, transparency and resilience",
+    "近年来，人工智能在资本市场与零售金融的应用显著增加。",
+]
+
+
+def block_files(folder: str):
+    block_dir = os.path.join(folder, "blocks")
+    return sorted(
+        name for name in os.listdir(block_dir) if not name.endswith(".sqlite3")
+    )
+
+
+def test_block_round_trip():
+    """Records are readable before and after a flush, from a new store."""
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlockStore(folder, block_size=2)
+        keys = store.write_many(TEXTS)
+        assert len(set(keys)) == len(TEXTS)
+        assert store.read_many(keys) == TEXTS
+        store.close()
+
+        # 5 records in blocks of 2
+        assert len(block_files(folder)) == 3
+        reader = BlockStore(folder, cache_bytes=0)
+        assert reader.read_many(keys) == TEXTS
+        assert [reader.read(key) for key in reversed(keys)] == TEXTS[::-1]
+        reader.close()
+
+
+def test_flush_rewrites_open_block():
+    """Flushing a block that is not full rewrites it instead of starting a
+    new block per flush."""
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlockStore(folder, block_size=10)
+        keys = []
+        for text in TEXTS:
+            keys.append(store.write(text))
+            store.flush()
+        assert len(block_files(folder)) == 1
+        assert len({BlockStore.block_of(key) for key in keys}) == 1
+
+        reader = BlockStore(folder, cache_bytes=0)
+        assert reader.read_many(keys) == TEXTS
+        reader.close()
+        store.close()
+
+
+def test_compressed_block_round_trip():
+    """Blocks written as gzip are read by stores of any format."""
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlockStore(folder, block_format="gzip")
+        keys = store.write_many(TEXTS)
+        store.close()
+        assert all(name.endswith(".gz") for name in block_files(folder))
+
+        reader = BlockStore(folder, cache_bytes=0)
+        assert reader.read_many(keys) == TEXTS
+        reader.close()
+
+
+def test_segment_backend_round_trip():
+    """Segment records are read whole and as character spans."""
+    with tempfile.TemporaryDirectory() as folder:
+        store = BlockStore(folder, backend="segments")
+        keys = store.write_many(TEXTS)
+        assert store.read_many(keys) == TEXTS
+        store.close()
+
+        reader = BlockStore(folder, cache_bytes=0)
+        assert reader.read_many(keys) == TEXTS
+        spans = [(keys[0], 3, 8), (keys[1], 0, 7), (keys[3], 10, None)]
+        assert reader.read_spans(spans) == [
+            TEXTS[0][3:8],
+            TEXTS[1][0:7],
+            TEXTS[3][10:],
+        ]
+        reader.close()
+
+
+def test_segment_rollover():
+    """A segment store starts a new segment after ``segment_bytes``; records
+    of every segment stay readable."""
+    with tempfile.TemporaryDirectory() as folder:
+        store = SegmentStore(folder, segment_bytes=64, buffer_bytes=32)
+        keys = store.write_many(TEXTS * 4)
+        store.close()
+        segments = [
+            name
+            for name in os.listdir(os.path.join(folder, "segments"))
+            if name.endswith(".seg")
+        ]
+        assert len(segments) > 1
+
+        reader = SegmentStore(folder)
+        assert reader.read_many(keys) == TEXTS * 4
+        assert reader.read_spans([(keys[3], 0, 5), (keys[0], 2, 6)]) == [
+            TEXTS[3][0:5],
+            TEXTS[0][2:6],
+        ]
+        try:
+            reader.read_many(["seg_unknown_0"])
+            raise AssertionError("Reading an unknown key should raise KeyError")
+        except KeyError:
+            pass
+        reader.close()
+
+
+def test_content_keys_round_trip():
+    """Content-addressed keys are shared by identical texts, across stores
+    and backends."""
+    for backend in ("blocks", "segments"):
+        with tempfile.TemporaryDirectory() as folder:
+            store = BlockStore(folder, key_mode="content", backend=backend)
+            keys = store.write_many(TEXTS)
+            assert all(key.startswith(CONTENT_KEY_PREFIX) for key in keys)
+            assert keys[0] == keys[4]
+            assert len(set(keys)) == len(TEXTS) - 1
+            assert store.read_many(keys) == TEXTS
+            store.close()
+
+            writer = BlockStore(folder, key_mode="content", backend=backend)
+            assert writer.write_many(TEXTS[:2]) == keys[:2]
+            writer.close()
+
+            reader = BlockStore(folder, cache_bytes=0, backend=backend)
+            assert reader.read_many(keys) == TEXTS
+            reader.close()
+
+
+if __name__ == "__main__":
+    failures = []
+    for test in (
+        test_block_round_trip,
+        test_flush_rewrites_open_block,
+        test_compressed_block_round_trip,
+        test_segment_backend_round_trip,
+        test_segment_rollover,
+        test_content_keys_round_trip,
+    ):
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+        except Exception as e:
+            print(f"[FAIL] {test.__name__}: {type(e).__name__}: {e}")
+            failures.append(test.__name__)
+
+    if failures:
+        raise SystemExit(f"{len(failures)} test(s) failed: {failures}")
+    print("All block store tests passed.")
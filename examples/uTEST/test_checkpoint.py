@@ -0,0 +1,140 @@
+"""
+Tests for finmy.checkpoint.StageCheckpointer: resume and invalidation.
+
+Purpose:
+- Run a two-stage chain ("collect" -> "match") twice in the same checkpoint
+  folder and count which stages are executed by the second run.
+- Check that a change of a stage's inputs invalidates its checkpoint, and a
+  change of an upstream stage's output those of its dependents.
+
+How to run:
+- Run directly: python examples/uTEST/test_checkpoint.py
+"""
+
+import os
+import asyncio
+import tempfile
+
+from finmy.checkpoint import StageCheckpointer
+
+
+def run_chain(folder, collected, match_config=None, resume=True, fingerprint=None):
+    """Run "collect" (returning `collected`) then "match" and return the
+    names of the executed stages."""
+    executed = []
+
+    def collect():
+        executed.append("collect")
+        return list(collected)
+
+    def match():
+        executed.append("match")
+        return [text.upper() for text in data]
+
+    checkpointer = StageCheckpointer(folder, {"query": "金融风控"}, resume=resume)
+    data = checkpointer.run(
+        "collect", {"sources": ["a", "b"]}, collect, fingerprint=fingerprint
+    )
+    checkpointer.run(
+        "match", {"config": match_config or {}}, match, depends_on=["collect"]
+    )
+    return executed
+
+
+def test_resume_skips_completed_stages():
+    with tempfile.TemporaryDirectory() as folder:
+        assert run_chain(folder, ["x", "y"]) == ["collect", "match"]
+        assert run_chain(folder, ["x", "y"]) == []
+        # Without resume, every stage runs again
+        assert run_chain(folder, ["x", "y"], resume=False) == ["collect", "match"]
+
+
+def test_stage_inputs_invalidate_stage():
+    with tempfile.TemporaryDirectory() as folder:
+        run_chain(folder, ["x", "y"])
+        assert run_chain(folder, ["x", "y"], match_config={"top_k": 3}) == ["match"]
+        assert run_chain(folder, ["x", "y"], match_config={"top_k": 3}) == []
+
+
+def drop_checkpoint(folder, stage):
+    """Delete the checkpoint of `stage`, so the next run executes it."""
+    checkpointer = StageCheckpointer(folder, {"query": "金融风控"})
+    os.remove(os.path.join(checkpointer.run_dir, f"{stage}.pkl"))
+
+
+def test_upstream_output_invalidates_downstream():
+    """A stage executed again with the same inputs but producing another
+    output (e.g. a source whose content changed) invalidates its dependents."""
+    with tempfile.TemporaryDirectory() as folder:
+        run_chain(folder, ["x", "y"])
+        drop_checkpoint(folder, "collect")
+        assert run_chain(folder, ["x", "y"]) == ["collect"]
+        drop_checkpoint(folder, "collect")
+        assert run_chain(folder, ["x", "z"]) == ["collect", "match"]
+
+
+def test_fingerprint_replaces_output_hash():
+    """With a fingerprint, only the fingerprinted part of the upstream
+    output is folded into the downstream keys."""
+    with tempfile.TemporaryDirectory() as folder:
+        run_chain(folder, ["x", "y"], fingerprint=len)
+        drop_checkpoint(folder, "collect")
+        assert run_chain(folder, ["x", "z"], fingerprint=len) == ["collect"]
+        drop_checkpoint(folder, "collect")
+        executed = run_chain(folder, ["x", "y", "z"], fingerprint=len)
+        assert executed == ["collect", "match"]
+
+
+def test_run_inputs_select_run_dir():
+    with tempfile.TemporaryDirectory() as folder:
+        first = StageCheckpointer(folder, {"query": "金融风控"})
+        second = StageCheckpointer(folder, {"query": "合规"})
+        assert first.run_dir != second.run_dir
+        assert sorted(os.listdir(folder)) == sorted([first.run_key, second.run_key])
+
+
+def test_unreadable_checkpoint_is_recomputed():
+    with tempfile.TemporaryDirectory() as folder:
+        run_chain(folder, ["x", "y"])
+        checkpointer = StageCheckpointer(folder, {"query": "金融风控"}, resume=True)
+        with open(os.path.join(checkpointer.run_dir, "match.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+        assert run_chain(folder, ["x", "y"]) == ["match"]
+        assert not [
+            name for name in os.listdir(checkpointer.run_dir) if name.endswith(".tmp")
+        ]
+
+
+def test_async_run():
+    async def produce():
+        return {"samples": 2}
+
+    with tempfile.TemporaryDirectory() as folder:
+        checkpointer = StageCheckpointer(folder, {"query": "金融风控"}, resume=True)
+        assert asyncio.run(checkpointer.arun("build", {}, produce)) == {"samples": 2}
+        restored = StageCheckpointer(folder, {"query": "金融风控"}, resume=True)
+        assert restored.load("build", checkpointer.keys["build"]) == {"samples": 2}
+        assert restored.load("build", "stale-key") is None
+
+
+if __name__ == "__main__":
+    failures = []
+    for test in (
+        test_resume_skips_completed_stages,
+        test_stage_inputs_invalidate_stage,
+        test_upstream_output_invalidates_downstream,
+        test_fingerprint_replaces_output_hash,
+        test_run_inputs_select_run_dir,
+        test_unreadable_checkpoint_is_recomputed,
+        test_async_run,
+    ):
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+        except Exception as e:
+            print(f"[FAIL] {test.__name__}: {type(e).__name__}: {e}")
+            failures.append(test.__name__)
+
+    if failures:
+        raise SystemExit(f"{len(failures)} test(s) failed: {failures}")
+    print("All checkpoint tests passed.")
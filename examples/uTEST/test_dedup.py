@@ -0,0 +1,161 @@
+"""
+Tests for finmy.dedup: exact and SimHash near-duplicate detection.
+
+Purpose:
+- Check that formatting variants of a document resolve to the record of its
+  first copy, and that near duplicates do so only with ``near_duplicate``.
+- Check the SimHash banding: fingerprints within ``SIMHASH_BANDS - 1`` bits
+  share a band, so they are found by the band lookup.
+- Check that records registered by one index are visible to another index of
+  the same file only once they are stored, and that the match cache is
+  bounded.
+
+How to run:
+- Run directly: python examples/uTEST/test_dedup.py
+"""
+
+import os
+import uuid
+import tempfile
+
+from finmy.generic import RawData
+from finmy.dedup import (
+    SIMHASH_BANDS,
+    SIMHASH_BITS,
+    ContentDeduplicator,
+    content_fingerprint,
+    hamming_distance,
+    simhash,
+)
+
+CONTENT = (
+    "近年来，人工智能在资本市场与零售金融的应用显著增加。部分银行采用机器学习进行信用评分"
+    "与反欺诈检测，这提升了风控效率与业务响应速度。然而，模型的稳定性与在极端市场情况下的"
+    "表现仍需持续评估。一些机构建立了端到端的风险管理框架，包括数据治理、模型验证、监控与"
+    "回溯测试。"
+)
+# The same article with one word changed
+NEAR_CONTENT = CONTENT.replace("。然而", "。但是")
+OTHER_CONTENT = "Machine learning is used for credit scoring and fraud detection."
+
+
+def make_raw_data(source: str) -> RawData:
+    return RawData(
+        raw_data_id=str(uuid.uuid4()),
+        source=source,
+        location=f"text_{uuid.uuid4().hex}",
+        time="2024-05-20 10:23:45 UTC",
+        data_copyright="",
+        method="test",
+        tag="test",
+    )
+
+
+def test_exact_duplicates():
+    dedup = ContentDeduplicator()
+    first = make_raw_data("https://example.com/a")
+    assert dedup.lookup(CONTENT) is None
+    assert dedup.register(CONTENT, first) == first
+
+    # Case and whitespace are normalized before fingerprinting
+    assert content_fingerprint(OTHER_CONTENT.upper()) == content_fingerprint(
+        OTHER_CONTENT.replace(" ", "\n  ")
+    )
+    variant = "\n  " + CONTENT + "  \n"
+    assert dedup.lookup(variant) == first
+    # Registering a duplicate returns the canonical record
+    second = make_raw_data("https://example.com/b")
+    assert dedup.register(CONTENT, second) == first
+    assert dedup.lookup(OTHER_CONTENT) is None
+    assert dedup.exact_hits == 1
+
+
+def test_near_duplicates():
+    assert hamming_distance(simhash(CONTENT), simhash(NEAR_CONTENT)) <= 3
+    assert hamming_distance(simhash(CONTENT), simhash(OTHER_CONTENT)) > 3
+
+    exact = ContentDeduplicator()
+    exact.register(CONTENT, make_raw_data("https://example.com/a"))
+    assert exact.lookup(NEAR_CONTENT) is None
+
+    near = ContentDeduplicator(near_duplicate=True, simhash_threshold=3)
+    first = make_raw_data("https://example.com/a")
+    near.register(CONTENT, first)
+    assert near.lookup(NEAR_CONTENT) == first
+    assert near.lookup(OTHER_CONTENT) is None
+    assert near.near_hits == 1
+
+
+def test_simhash_bands():
+    """Flipping up to ``SIMHASH_BANDS - 1`` bits leaves at least one band of
+    the fingerprint unchanged."""
+    fingerprint = simhash(CONTENT)
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    bands = ContentDeduplicator._band_keys(fingerprint)
+    assert len(bands) == SIMHASH_BANDS
+    # One flipped bit in each of the first bands but the last
+    flipped = fingerprint
+    for band in range(SIMHASH_BANDS - 1):
+        flipped ^= 1 << (band * width + band)
+    shared = set(bands) & set(ContentDeduplicator._band_keys(flipped))
+    assert shared == {bands[-1]}
+
+    try:
+        ContentDeduplicator(near_duplicate=True, simhash_threshold=SIMHASH_BANDS)
+        raise AssertionError("A threshold of SIMHASH_BANDS should be rejected")
+    except ValueError:
+        pass
+
+
+def test_shared_index_visibility():
+    with tempfile.TemporaryDirectory() as folder:
+        index_path = os.path.join(folder, "dedup.sqlite3")
+        writer = ContentDeduplicator(index_path=index_path)
+        reader = ContentDeduplicator(index_path=index_path)
+        first = make_raw_data("https://example.com/a")
+        writer.register(CONTENT, first)
+
+        # Not stored yet: its block and database row may not exist
+        assert reader.lookup(CONTENT) is None
+        assert writer.unstored_raw_data([first]) == [first]
+        writer.mark_raw_data_stored([first])
+        assert reader.lookup(CONTENT) == first
+        assert reader.unstored_raw_data([first]) == []
+
+        # A new index of the same file keeps the stored records
+        restarted = ContentDeduplicator(index_path=index_path)
+        assert restarted.lookup(CONTENT) == first
+
+
+def test_match_cache_is_bounded():
+    dedup = ContentDeduplicator(max_cached_matches=2)
+    dedup.put_matches("raw-1", "query", [])
+    dedup.put_matches("raw-2", "query", [])
+    assert dedup.get_matches("raw-1", "query") == []
+    # raw-2 is now the least recently used entry
+    dedup.put_matches("raw-3", "query", [])
+    assert dedup.get_matches("raw-2", "query") is None
+    assert dedup.get_matches("raw-1", "query") == []
+    assert dedup.get_matches("raw-3", "query") == []
+    assert dedup.get_matches("raw-1", "other query") is None
+
+
+if __name__ == "__main__":
+    failures = []
+    for test in (
+        test_exact_duplicates,
+        test_near_duplicates,
+        test_simhash_bands,
+        test_shared_index_visibility,
+        test_match_cache_is_bounded,
+    ):
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+        except Exception as e:
+            print(f"[FAIL] {test.__name__}: {type(e).__name__}: {e}")
+            failures.append(test.__name__)
+
+    if failures:
+        raise SystemExit(f"{len(failures)} test(s) failed: {failures}")
+    print("All dedup tests passed.")
@@ -0,0 +1,206 @@
+"""
+Tests for finmy.job_queue: lease, retry and lost-lease semantics.
+
+Purpose:
+- Run every scenario against both backends, `SQLiteJobQueue` and
+  `FileJobQueue`, each in a fresh temporary directory.
+- Check that an expired lease is re-queued as a failed attempt, and that the
+  worker which lost it can neither heartbeat, complete nor fail the job.
+
+How to run:
+- Run directly: python examples/uTEST/test_job_queue.py
+"""
+
+import os
+import time
+import logging
+import tempfile
+
+from finmy.pipeline import PipelineJob, PipelineJobResult
+from finmy.job_queue import create_job_queue, execute_lease
+
+BACKENDS = ("sqlite", "filesystem")
+
+
+def make_queue(root: str, backend: str, **kwargs):
+    """Create a queue of `backend` stored under `root`."""
+    path = os.path.join(root, "jobs.sqlite3" if backend == "sqlite" else "jobs")
+    return create_job_queue({"backend": backend, "path": path, **kwargs})
+
+
+def make_job(idx: int = 0) -> PipelineJob:
+    return PipelineJob(query_text=f"金融风控 {idx}", contents=["人工智能与合规"])
+
+
+def check_lease_and_complete(backend: str):
+    """A leased job is invisible to other workers until it is completed."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend)
+        job_id = queue.enqueue(make_job())
+
+        lease = queue.lease("worker-a")
+        assert lease is not None and lease.job_id == job_id
+        assert lease.attempt == 1
+        assert lease.job.query_text == "金融风控 0"
+        assert queue.lease("worker-b") is None
+
+        assert queue.heartbeat(lease)
+        assert queue.complete(lease, {"save_dir": "out"})
+        record = queue.get(job_id)
+        assert record.state == queue.DONE
+        assert record.attempts == 1
+        assert record.result == {"save_dir": "out"}
+        assert queue.counts()[queue.DONE] == 1
+        # A finished job cannot be reported twice
+        assert not queue.complete(lease, {"save_dir": "other"})
+
+
+def check_leases_in_order(backend: str):
+    """Jobs are leased oldest first."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend)
+        job_ids = []
+        for idx in range(3):
+            job_ids.append(queue.enqueue(make_job(idx)))
+            time.sleep(0.01)
+        leased = [queue.lease("worker-a").job_id for _ in job_ids]
+        assert leased == job_ids
+
+
+def check_retry_until_max_attempts(backend: str):
+    """A failed job is retried until it used all its attempts."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend, max_attempts=2)
+        job_id = queue.enqueue(make_job())
+
+        lease = queue.lease("worker-a")
+        assert queue.fail(lease, "RuntimeError: first")
+        record = queue.get(job_id)
+        assert record.state == queue.PENDING
+        assert record.attempts == 1
+
+        lease = queue.lease("worker-b")
+        assert lease.attempt == 2
+        assert queue.fail(lease, "RuntimeError: second")
+        record = queue.get(job_id)
+        assert record.state == queue.FAILED
+        assert record.attempts == 2
+        assert record.error == "RuntimeError: second"
+        assert queue.lease("worker-c") is None
+
+
+def check_retry_delay_and_no_retry(backend: str):
+    """A failed job waits ``retry_delay``; `retry=False` fails it at once."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend, retry_delay=60.0)
+        delayed_id = queue.enqueue(make_job(0))
+        time.sleep(0.01)
+        final_id = queue.enqueue(make_job(1), max_attempts=5)
+
+        assert queue.fail(queue.lease("worker-a"), "TimeoutError: slow")
+        assert queue.get(delayed_id).state == queue.PENDING
+
+        lease = queue.lease("worker-a")
+        assert lease.job_id == final_id
+        assert queue.fail(lease, "ValueError: bad input", retry=False)
+        assert queue.get(final_id).state == queue.FAILED
+        # The delayed job is not available yet
+        assert queue.lease("worker-a") is None
+
+
+def check_expired_lease_is_lost(backend: str):
+    """An expired lease counts as a failed attempt and its job is re-leased;
+    the worker that lost it can no longer report on the job."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend, lease_seconds=0.2)
+        job_id = queue.enqueue(make_job())
+
+        stale = queue.lease("worker-a")
+        time.sleep(0.3)
+        lease = queue.lease("worker-b")
+        assert lease is not None and lease.job_id == job_id
+        assert lease.attempt == 2
+        assert lease.token != stale.token
+        assert "expired" in queue.get(job_id).error
+
+        assert not queue.heartbeat(stale)
+        assert not queue.complete(stale, {"save_dir": "stale"})
+        assert not queue.fail(stale, "RuntimeError: stale")
+
+        assert queue.complete(lease, {"save_dir": "out"})
+        record = queue.get(job_id)
+        assert record.state == queue.DONE
+        assert record.result == {"save_dir": "out"}
+
+
+def check_release_expired(backend: str):
+    """`release_expired` fails a job whose last attempt expired."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend, lease_seconds=0.2, max_attempts=1)
+        job_id = queue.enqueue(make_job())
+
+        queue.lease("worker-a")
+        assert queue.release_expired() == 0
+        time.sleep(0.3)
+        assert queue.release_expired() == 1
+        assert queue.get(job_id).state == queue.FAILED
+        assert queue.lease("worker-b") is None
+
+
+class _FailingPipeline:
+    """Stand-in for `FinmyPipeline` whose jobs fail."""
+
+    logger = logging.getLogger(__name__)
+
+    def run_job(self, job: PipelineJob) -> PipelineJobResult:
+        return PipelineJobResult(job_id=job.job_id, error="OSError: disk full")
+
+
+def check_execute_lease_fails_lease(backend: str):
+    """A job failing in `run_job` fails its lease instead of the worker."""
+    with tempfile.TemporaryDirectory() as root:
+        queue = make_queue(root, backend)
+        job_id = queue.enqueue(make_job())
+
+        assert not execute_lease(_FailingPipeline(), queue, queue.lease("worker-a"))
+        record = queue.get(job_id)
+        assert record.state == queue.PENDING
+        assert record.error == "OSError: disk full"
+
+
+CHECKS = [
+    check_lease_and_complete,
+    check_leases_in_order,
+    check_retry_until_max_attempts,
+    check_retry_delay_and_no_retry,
+    check_expired_lease_is_lost,
+    check_release_expired,
+    check_execute_lease_fails_lease,
+]
+
+
+def test_sqlite_job_queue():
+    for check in CHECKS:
+        check("sqlite")
+
+
+def test_file_job_queue():
+    for check in CHECKS:
+        check("filesystem")
+
+
+if __name__ == "__main__":
+    failures = []
+    for backend in BACKENDS:
+        for check in CHECKS:
+            name = f"{check.__name__}[{backend}]"
+            try:
+                check(backend)
+                print(f"[PASS] {name}")
+            except Exception as e:
+                print(f"[FAIL] {name}: {type(e).__name__}: {e}")
+                failures.append(name)
+
+    if failures:
+        raise SystemExit(f"{len(failures)} test(s) failed: {failures}")
+    print("All job queue tests passed.")
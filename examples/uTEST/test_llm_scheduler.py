@@ -0,0 +1,175 @@
+"""
+Tests for finmy.llm_scheduler: priority ordering and rate limits.
+
+Purpose:
+- Hold the only slot of a model (``max_concurrency=1``), queue calls of every
+  priority from threads or coroutines, then release the slot and check that
+  builder calls are served before summarizer calls before matcher calls, and
+  calls of equal priority in arrival order.
+- Check the token bucket and that the scheduler counts calls and tokens.
+
+How to run:
+- Run directly: python examples/uTEST/test_llm_scheduler.py
+"""
+
+import time
+import asyncio
+import threading
+
+from finmy.llm_scheduler import (
+    PRIORITY_BUILD,
+    PRIORITY_MATCH,
+    PRIORITY_SUMMARIZE,
+    LLMScheduler,
+    ModelLimiter,
+    TokenBucket,
+)
+
+# (name, priority) in arrival order
+CALLS = [
+    ("match-1", PRIORITY_MATCH),
+    ("summarize", PRIORITY_SUMMARIZE),
+    ("match-2", PRIORITY_MATCH),
+    ("build", PRIORITY_BUILD),
+]
+EXPECTED_ORDER = ["build", "summarize", "match-1", "match-2"]
+
+
+def wait_for_queue(limiter: ModelLimiter, depth: int, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while limiter.stats()["queue_depth"] < depth:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Queue of {limiter.model} did not reach {depth}")
+        time.sleep(0.01)
+
+
+def test_priority_order_threads():
+    limiter = ModelLimiter("test-model", max_concurrency=1)
+    limiter.acquire(1, PRIORITY_MATCH)
+    served = []
+
+    def call(name, priority):
+        limiter.acquire(1, priority)
+        served.append(name)
+        limiter.release(1)
+
+    threads = []
+    for depth, (name, priority) in enumerate(CALLS, start=1):
+        thread = threading.Thread(target=call, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        # Queue the calls one at a time so their arrival order is known
+        wait_for_queue(limiter, depth)
+
+    limiter.release(1)
+    for thread in threads:
+        thread.join(timeout=5.0)
+    assert served == EXPECTED_ORDER, served
+    stats = limiter.stats()
+    assert stats["calls"] == len(CALLS) + 1
+    assert stats["max_queue_depth"] == len(CALLS)
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_priority_order_coroutines():
+    async def main():
+        limiter = ModelLimiter("test-model", max_concurrency=1)
+        await limiter.aacquire(1, PRIORITY_MATCH)
+        served = []
+
+        async def call(name, priority):
+            await limiter.aacquire(1, priority)
+            served.append(name)
+            limiter.release(1)
+
+        tasks = []
+        for depth, (name, priority) in enumerate(CALLS, start=1):
+            tasks.append(asyncio.create_task(call(name, priority)))
+            while limiter.stats()["queue_depth"] < depth:
+                await asyncio.sleep(0.01)
+
+        limiter.release(1)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5.0)
+        return served
+
+    served = asyncio.run(main())
+    assert served == EXPECTED_ORDER, served
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def main():
+        limiter = ModelLimiter("test-model", max_concurrency=1)
+        await limiter.aacquire(1)
+        task = asyncio.create_task(limiter.aacquire(1, PRIORITY_BUILD))
+        while limiter.stats()["queue_depth"] < 1:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert limiter.stats()["queue_depth"] == 0
+        limiter.release(1)
+        await asyncio.wait_for(limiter.aacquire(1), 5.0)
+
+    asyncio.run(main())
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate_per_minute=60)
+    now = bucket.updated_at
+    assert bucket.wait_time(60, now) == 0
+    bucket.consume(60, now)
+    # Refilled at one token per second
+    assert abs(bucket.wait_time(1, now) - 1.0) < 1e-6
+    assert abs(bucket.wait_time(1, now + 0.5) - 0.5) < 1e-6
+    # Amounts above the capacity only wait for a full bucket
+    assert abs(bucket.wait_time(600, now + 0.5) - 59.5) < 1e-6
+    # Tokens used beyond the reservation are paid back by the refill
+    bucket.consume(30, now + 60)
+    bucket.consume(40, now + 60)
+    assert abs(bucket.wait_time(1, now + 60) - 11.0) < 1e-6
+
+
+def test_scheduler_limits_and_usage():
+    scheduler = LLMScheduler(
+        {
+            "default": {"max_concurrency": 4},
+            "models": {"slow-model": {"max_concurrency": 1}},
+        }
+    )
+    assert scheduler.limiter("fast-model").max_concurrency == 4
+    assert scheduler.limiter("slow-model").max_concurrency == 1
+    assert scheduler.limiter("slow-model") is scheduler.limiter("slow-model")
+
+    with scheduler.request(
+        "slow-model", "识别金融风控相关内容", PRIORITY_BUILD
+    ) as request:
+        assert scheduler.stats()["slow-model"]["in_flight"] == 1
+        request.finish("ok", usage={"prompt_tokens": 12, "completion_tokens": 3})
+    stats = scheduler.stats()["slow-model"]
+    assert stats["in_flight"] == 0
+    assert stats["calls"] == 1
+    assert stats["tokens"] == 15
+    assert 'finmy_llm_calls_total{model="slow-model"} 1' in scheduler.to_prometheus()
+
+
+if __name__ == "__main__":
+    failures = []
+    for test in (
+        test_priority_order_threads,
+        test_priority_order_coroutines,
+        test_cancelled_waiter_leaves_queue,
+        test_token_bucket,
+        test_scheduler_limits_and_usage,
+    ):
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+        except Exception as e:
+            print(f"[FAIL] {test.__name__}: {type(e).__name__}: {e}")
+            failures.append(test.__name__)
+
+    if failures:
+        raise SystemExit(f"{len(failures)} test(s) failed: {failures}")
+    print("All LLM scheduler tests passed.")
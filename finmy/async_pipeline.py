@@ -0,0 +1,783 @@
+"""
+Asyncio variant of the FinMycelium pipeline.
+
+`FinmyAsyncPipeline` runs the same steps as `FinmyPipeline` (collection, raw
+data storage, query summarization, matching, meta samples, build input and
+builder) as coroutines, so an asyncio service can serve many concurrent
+reconstruction requests from one event loop instead of holding a thread per
+request for the whole run:
+
+- URLs are fetched with an async HTTP client (`URLParser.acollect`) and the
+  delay between requests is an `asyncio.sleep`;
+- the summarizer, matcher and builder are driven through their `arun` entry
+  points: LLM calls wait for their scheduler slot with `allm_request` and
+  call the native async method of the inference client (`acall_llm`), and
+  the agent builders run their LangGraph graph with `ainvoke`; database
+  writes go through the `DataManager.ainsert_*` methods;
+- raw data collection overlaps with the user query and its summarization, and
+  documents are matched concurrently, bounded by
+  ``matcher_config["max_concurrency"]``.
+
+Blocking work (CPU-bound rule-based summarizers and matchers, inference
+clients without an async method, MinerU PDF parsing, block storage and
+database IO) runs in worker threads of the event loop's
+default executor, so the number of threads is bounded by that executor rather
+than by the number of requests. Size it with `loop.set_default_executor`.
+
+Usage:
+    pipeline = FinmyAsyncPipeline(config)
+    build_output = await pipeline.lm_build_pipeline_main(
+        data_sources=urls, query_text=query, key_words=[]
+    )
+"""
+
+import time
+import uuid
+import asyncio
+import contextvars
+from typing import Callable, List, Optional
+
+from finmy.generic import RawData, MetaSample, UserQueryInput
+from finmy.block_store import flush_block_stores
+from finmy.checkpoint import StageCheckpointer, stable_hash
+from finmy.metrics import PipelineMetrics, timed_stage
+from finmy.builder.base import BuildInput, BaseBuilder
+from finmy.matcher.base import MatchInput, SummarizedUserQuery
+from finmy.url_collector.base import URLCollectorInput
+from finmy.pipeline import (
+    BATCH_WARMUP_COMPONENTS,
+    BatchOutput,
+    FinmyPipeline,
+    PipelineJob,
+    PipelineJobResult,
+)
+
+
+class FinmyAsyncPipeline(FinmyPipeline):
+    """Asyncio variant of `FinmyPipeline`.
+
+    The configuration, components, deduplication index, checkpoints and
+    metrics are those of `FinmyPipeline`; the entry points
+    `lm_build_pipeline_main`, `lm_build_pipeline_with_contents` and
+    `run_batch` are coroutines.
+    """
+
+    def __init__(self, finmy_config: dict):
+        """
+        Initialize the pipeline with configuration.
+
+        Args:
+            finmy_config: A dict containing all configuration parameters for the pipeline.
+        """
+        # Concurrent runs share the event loop thread, so the metrics of the
+        # last run are tracked per task rather than per thread
+        self._last_metrics: contextvars.ContextVar = contextvars.ContextVar(
+            f"finmy_last_metrics_{id(self)}", default=None
+        )
+        super().__init__(finmy_config)
+
+    @property
+    def last_metrics(self) -> Optional[PipelineMetrics]:
+        """Metrics of the last run finished in the current task."""
+        return self._last_metrics.get()
+
+    # ------------------------------------------------------------------
+    # Pipeline steps
+    # ------------------------------------------------------------------
+
+    @timed_stage("store_raw_data")
+    async def astore_raw_data(self, raw_data_records: List[RawData]) -> None:
+        """
+        Store RawData objects in the database.
+
+        Args:
+            raw_data_records: List of RawData objects to be stored
+        """
+        self.logger.info("Writing and saving RawData objects...")
+        # Persist the block records before their locations reach the database
+        await asyncio.to_thread(flush_block_stores)
+        new_records = self._unstored_raw_data(raw_data_records)
+        if len(new_records) < len(raw_data_records):
+            self.logger.info(
+                "Skipping %d RawData objects already in database",
+                len(raw_data_records) - len(new_records),
+            )
+        await self.data_manager.ainsert_raw_data_batch(new_records)
+        if self.deduplicator is not None:
+            self.deduplicator.mark_raw_data_stored(new_records)
+        self.logger.info("RawData objects saved successfully")
+        self.logger.info("=" * 25)
+
+    @timed_stage("user_query")
+    async def acreate_and_store_user_query(
+        self,
+        query_text: str,
+        key_words: List[str],
+    ) -> UserQueryInput:
+        """
+        Create a user query input object and store it in the database.
+
+        Args:
+            query_text: The query text
+            key_words: List of keywords for the query
+
+        Returns:
+            UserQueryInput object that was created and stored
+        """
+        self.logger.info("Creating user query input object...")
+        user_query_input = UserQueryInput(
+            user_query_id=str(uuid.uuid4()),
+            query_text=query_text,
+            key_words=key_words,
+        )
+        self.logger.info("User query input object created: %s", user_query_input)
+        self.logger.info("Inserting user query input object into database...")
+        await self.data_manager.ainsert_user_query(user_query_input)
+        self.logger.info("User query input object inserted successfully")
+        self.logger.info("=" * 25)
+        return user_query_input
+
+    @timed_stage("summarize")
+    async def asummarize_user_query(
+        self, user_query_input: UserQueryInput
+    ) -> SummarizedUserQuery:
+        """
+        Generate a summarized query from user query input.
+
+        Args:
+            user_query_input: UserQueryInput object to be summarized
+
+        Returns:
+            SummarizedUserQuery object containing the summarized query
+        """
+        self.logger.info("Generating summarized query using Summarizer...")
+        summarizer = await self._aget_component("summarizer")
+        summarized_query = await summarizer.arun(user_query_input)
+        self.logger.info("Summarized query created: %s", summarized_query)
+        self.logger.info("=" * 25)
+        return summarized_query
+
+    @timed_stage("llm_matching")
+    async def aperform_llm_matching(self, match_input: MatchInput):
+        """
+        Perform matching using the matcher.
+
+        Args:
+            match_input: MatchInput object containing data to be matched
+
+        Returns:
+            Match output from the matcher
+        """
+        matcher = await self._aget_component("matcher")
+        match_output = await matcher.arun(match_input)
+        self.logger.info("Matching result: %s", match_output)
+        self.logger.info("=" * 25)
+        return match_output
+
+    @timed_stage("store_meta_samples")
+    async def astore_meta_samples(self, meta_samples) -> None:
+        """
+        Store meta samples in the database.
+
+        Args:
+            meta_samples: List of MetaSample objects to be stored
+        """
+        self.logger.info("Saving meta_samples to database...")
+        # Persist the block records before their locations reach the database
+        await asyncio.to_thread(flush_block_stores)
+        if self.deduplicator is not None:
+            # Meta samples reused from the match cache are already stored
+            meta_samples = self.deduplicator.unstored_meta_samples(meta_samples)
+        await self.data_manager.ainsert_meta_samples(meta_samples)
+        if self.deduplicator is not None:
+            self.deduplicator.mark_meta_samples_stored(meta_samples)
+        self.logger.info("Meta samples saved successfully")
+        self.logger.info("=" * 25)
+
+    @timed_stage("build")
+    async def _arun_builder(
+        self, builder: Optional[BaseBuilder], build_input: BuildInput
+    ):
+        """
+        Run `builder` (default: ``self.builder``) on the build input.
+        """
+        builder = builder or await self._aget_component("builder")
+        return await builder.arun(build_input)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    async def _aget_component(self, name: str):
+        """
+        Return work module `name`; its first creation (which may import heavy
+        dependencies or load models) runs in a worker thread.
+        """
+        if name in self._components:
+            return self._components[name]
+        return await asyncio.to_thread(self._get_component, name)
+
+    async def _acollect_url_sources(
+        self, urls: List[str], url_collector_config: Optional[dict] = None
+    ) -> List[RawData]:
+        """
+        Fetch and parse URLs with the async HTTP client of the URL collector.
+        """
+        if not urls:
+            return []
+        self._resolve_url_collector_config(url_collector_config)
+        url_collector = await self._aget_component("url_collector")
+        url_output = await url_collector.arun(URLCollectorInput(urls=urls, extras={}))
+        # Writes the page contents to block storage
+        return await asyncio.to_thread(
+            self.create_raw_data_from_url_output, url_output
+        )
+
+    @timed_stage("collect")
+    async def _acollect_data_from_sources(
+        self,
+        data_sources: List[str],
+        pdf_collector_config: Optional[dict] = None,
+        url_collector_config: Optional[dict] = None,
+    ) -> List[RawData]:
+        """
+        Collect data from URLs or PDF paths using collectors.
+
+        PDFs (parsed through the blocking MinerU client in a worker thread)
+        and URLs are collected concurrently. Records keep a stable order:
+        PDFs first, then URLs.
+
+        Args:
+            data_sources: List of URLs or PDF file paths
+            pdf_collector_config: Optional configuration for PDF collector
+            url_collector_config: Optional configuration for URL collector
+
+        Returns:
+            List of RawData objects created from collected data
+        """
+        urls, pdf_paths = self._split_data_sources(data_sources)
+        pdf_records, url_records = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: list(self._iter_pdf_sources(pdf_paths, pdf_collector_config))
+            ),
+            self._acollect_url_sources(urls, url_collector_config),
+        )
+        raw_data_records: List[RawData] = pdf_records + url_records
+
+        if not raw_data_records:
+            raise ValueError(
+                "No raw data records created from collectors. "
+                "Please ensure data_sources contains valid URLs or PDF paths."
+            )
+
+        return raw_data_records
+
+    async def _acollect_and_store_raw_data(self, collect_fn) -> List[RawData]:
+        """
+        Create raw data records with the coroutine function `collect_fn` and
+        store them in the database.
+        """
+        raw_data_records = await collect_fn()
+        # Duplicated sources resolve to the same record; keep one copy each
+        unique_records = list(
+            {raw_data.raw_data_id: raw_data for raw_data in raw_data_records}.values()
+        )
+        if len(unique_records) < len(raw_data_records):
+            self.logger.info(
+                "Deduplicated %d of %d raw data records",
+                len(raw_data_records) - len(unique_records),
+                len(raw_data_records),
+            )
+        await self.astore_raw_data(unique_records)
+        return unique_records
+
+    async def _amatch_single_raw_data(
+        self, raw_data: RawData, summarized_query: SummarizedUserQuery
+    ) -> List[MetaSample]:
+        """
+        Match one raw data record against the summarized query.
+
+        Args:
+            raw_data: Raw data record to match
+            summarized_query: Summarized user query
+
+        Returns:
+            List of meta samples generated for this raw data record
+        """
+        query_signature = None
+        if self.deduplicator is not None:
+            # Skip documents already matched against the same query
+            query_signature = self._query_signature(summarized_query)
+            cached = self.deduplicator.get_matches(
+                raw_data.raw_data_id, query_signature
+            )
+            if cached is not None:
+                self.logger.info(
+                    "Reusing match results of RawData %s", raw_data.raw_data_id
+                )
+                return list(cached)
+        # Reading and writing blocks is blocking file IO
+        match_input = await asyncio.to_thread(
+            self.match_raw_data_with_query, raw_data, summarized_query
+        )
+        match_output = await self.aperform_llm_matching(match_input)
+        meta_samples = await asyncio.to_thread(
+            self.create_meta_samples, match_output, raw_data
+        )
+        if query_signature is not None:
+            self.deduplicator.put_matches(
+                raw_data.raw_data_id, query_signature, meta_samples
+            )
+        return meta_samples
+
+    async def _aprocess_matching(
+        self, raw_data_records: List[RawData], summarized_query: SummarizedUserQuery
+    ) -> List:
+        """
+        Process matching for raw data records against summarized query.
+
+        At most ``matcher_config["max_concurrency"]`` records are matched at
+        once. The meta samples keep the order of ``raw_data_records``, and a
+        failure on one record is logged and skipped instead of aborting the
+        whole run.
+
+        Args:
+            raw_data_records: List of raw data records to match
+            summarized_query: Summarized user query
+
+        Returns:
+            List of meta samples generated from matching
+
+        Raises:
+            RuntimeError: If matching failed for every raw data record.
+        """
+        if not self.matcher_config["use_matcher"]:
+            self.logger.info("not using matcher")
+            results = await asyncio.gather(
+                *[
+                    asyncio.to_thread(self._passthrough_raw_data, raw_data)
+                    for raw_data in raw_data_records
+                ]
+            )
+            return [meta_sample for result in results for meta_sample in result]
+
+        max_concurrency = max(1, int(self.matcher_config.get("max_concurrency", 1)))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        self.logger.info(
+            "Matching %d raw data records with max_concurrency=%d",
+            len(raw_data_records),
+            max_concurrency,
+        )
+
+        async def _match(raw_data: RawData) -> List[MetaSample]:
+            async with semaphore:
+                return await self._amatch_single_raw_data(raw_data, summarized_query)
+
+        results = await asyncio.gather(
+            *[_match(raw_data) for raw_data in raw_data_records],
+            return_exceptions=True,
+        )
+
+        meta_samples = []
+        failures = 0
+        for raw_data, result in zip(raw_data_records, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    # Propagate cancellation and interpreter exits
+                    raise result
+                failures += 1
+                self.logger.error(
+                    "Matching failed for raw data %s: %s: %s",
+                    raw_data.raw_data_id,
+                    type(result).__name__,
+                    result,
+                )
+            elif result:
+                meta_samples += result
+
+        if raw_data_records and failures == len(raw_data_records):
+            raise RuntimeError(f"Matching failed for all {failures} raw data records.")
+        if failures:
+            self.logger.warning(
+                "Matching failed for %d of %d raw data records",
+                failures,
+                len(raw_data_records),
+            )
+        return meta_samples
+
+    @staticmethod
+    async def _arun_stage(
+        checkpointer: Optional[StageCheckpointer],
+        stage: str,
+        inputs: dict,
+        fn,
+        depends_on: Optional[List[str]] = None,
+        fingerprint: Optional[Callable] = None,
+    ):
+        """
+        Run one pipeline stage, produced by the coroutine function `fn`,
+        through the checkpointer when one is active.
+        """
+        if checkpointer is None:
+            return await fn()
+        return await checkpointer.arun(
+            stage, inputs, fn, depends_on=depends_on, fingerprint=fingerprint
+        )
+
+    async def _arun_with_metrics(self, run_fn, *args, **kwargs):
+        """
+        Execute one pipeline run under a fresh `PipelineMetrics`; see
+        `FinmyPipeline._run_with_metrics`.
+
+        Args:
+            run_fn: Coroutine function executing the run and returning the build output
+            *args, **kwargs: Arguments passed to `run_fn`
+
+        Returns:
+            The build output returned by `run_fn`.
+        """
+        metrics = PipelineMetrics()
+        try:
+            with metrics.activate():
+                build_output = await run_fn(*args, **kwargs)
+        finally:
+            self._last_metrics.set(metrics)
+            self._report_metrics(metrics)
+        if isinstance(getattr(build_output, "extras", None), dict):
+            build_output.extras["metrics"] = metrics.to_dict()
+        return build_output
+
+    @timed_stage("result_cache")
+    async def _aresult_cache_hit(self, build_output):
+        """
+        Return a cached build output; see `FinmyPipeline._result_cache_hit`.
+        """
+        return build_output
+
+    async def _abuild_from_raw_data(
+        self,
+        collect_fn,
+        run_inputs: dict,
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Run the pipeline stages shared by all entry points, from raw data
+        creation to the builder.
+
+        Raw data collection and storage run concurrently with the creation and
+        summarization of the user query.
+
+        Args:
+            collect_fn: Zero-argument coroutine function returning the raw data records
+            run_inputs: Inputs identifying the run, used for checkpoint keys
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        checkpointer = self._make_checkpointer(
+            {**run_inputs, "query_text": query_text, "key_words": key_words}, resume
+        )
+        configs = self._stage_configs()
+
+        # Steps 1-2: Create raw data records and store them in database
+        async def _raw_data():
+            return await self._arun_stage(
+                checkpointer,
+                "raw_data",
+                {
+                    "run_inputs": run_inputs,
+                    "url_collector_config": configs["url_collector_config"],
+                    "pdf_collector_config": configs["pdf_collector_config"],
+                },
+                lambda: self._acollect_and_store_raw_data(collect_fn),
+                fingerprint=self._raw_data_fingerprint,
+            )
+
+        # Steps 3-4: Create and store user query input, then summarize it
+        async def _query():
+            user_query_input = await self._arun_stage(
+                checkpointer,
+                "user_query",
+                {"query_text": query_text, "key_words": key_words},
+                lambda: self.acreate_and_store_user_query(
+                    query_text=query_text,
+                    key_words=key_words,
+                ),
+            )
+            summarized_query = await self._arun_stage(
+                checkpointer,
+                "summarized_query",
+                {"summarizer_config": configs["summarizer_config"]},
+                lambda: self.asummarize_user_query(user_query_input),
+                depends_on=["user_query"],
+            )
+            return user_query_input, summarized_query
+
+        raw_data_records, (user_query_input, summarized_query) = await asyncio.gather(
+            _raw_data(), _query()
+        )
+
+        # Steps 5-8: Process matching, generate and store meta samples
+        async def _match_and_store():
+            meta_samples = await self._aprocess_matching(
+                raw_data_records, summarized_query
+            )
+            await self.astore_meta_samples(meta_samples)
+            return meta_samples
+
+        meta_samples = await self._arun_stage(
+            checkpointer,
+            "meta_samples",
+            {"matcher_config": configs["matcher_config"]},
+            _match_and_store,
+            depends_on=["raw_data", "summarized_query"],
+        )
+
+        # Step 9: Create build input for downstream processing
+        build_input = await self._arun_stage(
+            checkpointer,
+            "build_input",
+            {"context_config": configs["context_config"]},
+            lambda: asyncio.to_thread(
+                self.create_build_input, user_query_input, meta_samples
+            ),
+            depends_on=["user_query", "meta_samples"],
+        )
+
+        # Step 10: Execute builder and return result
+        build_output = await self._arun_builder(builder, build_input)
+        if self.query_runs is not None:
+            fingerprints = await asyncio.to_thread(
+                self._content_fingerprints, raw_data_records
+            )
+            await asyncio.to_thread(
+                self._record_query_run,
+                user_query_input,
+                [raw_data.raw_data_id for raw_data in raw_data_records],
+                fingerprints,
+                meta_samples,
+                builder or self.builder,
+            )
+        return build_output
+
+    # ------------------------------------------------------------------
+    # Entry points
+    # ------------------------------------------------------------------
+
+    async def lm_build_pipeline_main(
+        self,
+        data_sources: List[str],
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Asynchronous `FinmyPipeline.lm_build_pipeline_main`.
+
+        Collection always overlaps with the summarization of the query, so
+        ``streaming_config`` is not consulted. Results are reused from the
+        result cache when enabled.
+
+        Args:
+            data_sources: List of URLs or PDF file paths to collect data from
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = await asyncio.to_thread(
+                self._result_cache_key,
+                query_text,
+                key_words,
+                data_sources=data_sources,
+                builder=builder,
+            )
+            build_output = await asyncio.to_thread(self._cached_result, cache_key)
+            if build_output is not None:
+                return await self._arun_with_metrics(
+                    self._aresult_cache_hit, build_output
+                )
+
+        build_output = await self._arun_with_metrics(
+            self._abuild_from_raw_data,
+            collect_fn=lambda: self._acollect_data_from_sources(
+                data_sources=data_sources,
+                pdf_collector_config=self.pdf_collector_config,
+                url_collector_config=self.url_collector_config,
+            ),
+            run_inputs={"data_sources": data_sources},
+            query_text=query_text,
+            key_words=key_words,
+            builder=builder,
+            resume=resume,
+        )
+        await asyncio.to_thread(self._cache_result, cache_key, build_output, builder)
+        return build_output
+
+    async def lm_build_pipeline_with_contents(
+        self,
+        contents: list,
+        query_text: str,
+        key_words: list,
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Asynchronous `FinmyPipeline.lm_build_pipeline_with_contents`.
+
+        Args:
+            contents: List of text content strings
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = await asyncio.to_thread(
+                self._result_cache_key,
+                query_text,
+                key_words,
+                contents=contents,
+                builder=builder,
+            )
+            build_output = await asyncio.to_thread(self._cached_result, cache_key)
+            if build_output is not None:
+                return await self._arun_with_metrics(
+                    self._aresult_cache_hit, build_output
+                )
+
+        build_output = await self._arun_with_metrics(
+            self._abuild_from_raw_data,
+            collect_fn=lambda: asyncio.to_thread(
+                self.create_raw_data_records, contents
+            ),
+            run_inputs={"contents": stable_hash(contents)},
+            query_text=query_text,
+            key_words=key_words,
+            builder=builder,
+            resume=resume,
+        )
+        await asyncio.to_thread(self._cache_result, cache_key, build_output, builder)
+        return build_output
+
+    async def run_job(self, job: PipelineJob) -> PipelineJobResult:
+        """
+        Execute one batch job with its own builder save directory.
+
+        Args:
+            job: The job to execute
+
+        Returns:
+            PipelineJobResult holding the build output or the error message
+        """
+        start_time = time.time()
+        result = PipelineJobResult(job_id=job.job_id)
+        try:
+            builder = (await self._aget_component("builder")).spawn()
+            result.save_dir = builder.save_dir
+            if job.data_sources:
+                result.build_output = await self.lm_build_pipeline_main(
+                    data_sources=job.data_sources,
+                    query_text=job.query_text,
+                    key_words=job.key_words,
+                    builder=builder,
+                    resume=job.resume,
+                )
+            else:
+                result.build_output = await self.lm_build_pipeline_with_contents(
+                    contents=job.contents,
+                    query_text=job.query_text,
+                    key_words=job.key_words,
+                    builder=builder,
+                    resume=job.resume,
+                )
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            self.logger.error("Batch job %s failed: %s", job.job_id, result.error)
+        extras = getattr(result.build_output, "extras", None)
+        if isinstance(extras, dict) and extras.get("save_dir"):
+            # The save directory of the cached run on a result cache hit
+            result.save_dir = extras["save_dir"]
+        result.metrics = self.last_metrics
+        result.time_cost = time.time() - start_time
+        return result
+
+    async def run_batch(
+        self,
+        jobs: List[PipelineJob],
+        max_workers: Optional[int] = None,
+    ) -> BatchOutput:
+        """
+        Asynchronous `FinmyPipeline.run_batch`: jobs run as concurrent tasks
+        on the event loop instead of worker threads.
+
+        Args:
+            jobs: List of `PipelineJob` (or dicts with the same fields)
+            max_workers: Number of jobs executed concurrently. Defaults to
+                ``batch_config["max_workers"]`` and then to 1.
+
+        Returns:
+            BatchOutput with per-job results (in input order) and aggregate timing
+        """
+        jobs = [PipelineJob(**job) if isinstance(job, dict) else job for job in jobs]
+        for job in jobs:
+            if job.job_id is None:
+                job.job_id = str(uuid.uuid4())
+        if max_workers is None:
+            max_workers = int(self.config.get("batch_config", {}).get("max_workers", 1))
+
+        self.logger.info(
+            "Running batch of %d jobs with max_workers=%d", len(jobs), max_workers
+        )
+        # Create the shared modules before the concurrent jobs need them
+        warmup_time = 0.0
+        for name in BATCH_WARMUP_COMPONENTS:
+            component_start = time.time()
+            await self._aget_component(name)
+            warmup_time += time.time() - component_start
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def _bounded_job(job: PipelineJob) -> PipelineJobResult:
+            async with semaphore:
+                return await self.run_job(job)
+
+        start_time = time.time()
+        results = list(await asyncio.gather(*[_bounded_job(job) for job in jobs]))
+        total_time = time.time() - start_time
+
+        num_failed = sum(1 for r in results if r.error is not None)
+        batch_output = BatchOutput(
+            results=results,
+            init_time=self.init_time + warmup_time,
+            total_time=total_time,
+            mean_job_time=(
+                sum(r.time_cost for r in results) / len(results) if results else 0.0
+            ),
+            num_succeeded=len(results) - num_failed,
+            num_failed=num_failed,
+        )
+        self.logger.info(
+            "Batch finished: %d succeeded, %d failed, total %.2fs",
+            batch_output.num_succeeded,
+            batch_output.num_failed,
+            total_time,
+        )
+        self.logger.info("=" * 25)
+        return batch_output
@@ -0,0 +1,211 @@
+"""
+File formats of the blocks of `finmy.block_store`.
+
+A block (a dict of record key -> text) is serialized as UTF-8 JSON and
+optionally compressed as a whole:
+
+- ``json``: plain JSON, ``<block_id>.json``;
+- ``gzip``: gzip-compressed JSON, ``<block_id>.json.gz``;
+- ``zstd``: zstandard-compressed JSON, ``<block_id>.json.zst``, with an
+  optional dictionary trained on the stored texts (`train_zstd_dictionary`).
+
+The format of new blocks is selected by ``FINMY_BLOCK_FORMAT``; reads accept
+every format, so changing it needs no migration. zstd requires the
+``zstandard`` package; without it, gzip is used.
+
+zstd dictionaries are stored as ``<block_dir>/zstd_dicts/<dict_id>.dict``
+and the one used for new blocks is ``current.dict``. zstd frames record the
+ID of their dictionary, so blocks stay readable after a dictionary is
+retrained.
+
+Train a dictionary on the texts already stored in DATA_DIR:
+
+    python -m finmy.block_codec train-dict --data-dir ./data --size 112640
+"""
+
+import os
+import gzip
+import json
+import random
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+
+# Block format -> file suffix
+BLOCK_FORMATS = {"json": ".json", "gzip": ".json.gz", "zstd": ".json.zst"}
+ZSTD_DICT_DIR = "zstd_dicts"
+DEFAULT_ZSTD_DICT_SIZE = 110 * 1024
+
+
+class BlockCodec:
+    """Serializer of blocks in one of `BLOCK_FORMATS`.
+
+    Args:
+        block_dir: Folder of the blocks, holding the zstd dictionaries.
+        block_format: Format of the blocks written by `encode`.
+        level: Compression level; None for the format default.
+    """
+
+    def __init__(
+        self, block_dir: str, block_format: str = "json", level: Optional[int] = None
+    ):
+        if block_format not in BLOCK_FORMATS:
+            raise ValueError(
+                f"Unknown block format: {block_format} in {list(BLOCK_FORMATS)}"
+            )
+        self.block_dir = block_dir
+        self.level = level
+        self._zstd = None
+        self._zstd_dicts: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        if block_format == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                logging.getLogger(__name__).warning(
+                    "zstandard is not installed, writing gzip blocks"
+                )
+                block_format = "gzip"
+            else:
+                self._zstd = zstandard
+        self.block_format = block_format
+        self.suffix = BLOCK_FORMATS[block_format]
+        self._compressor = None
+        if self._zstd is not None:
+            current = self._load_zstd_dict("current")
+            self._compressor = self._zstd.ZstdCompressor(
+                level=level if level is not None else 3, dict_data=current
+            )
+
+    def _load_zstd_dict(self, name) -> Optional[object]:
+        path = os.path.join(self.block_dir, ZSTD_DICT_DIR, f"{name}.dict")
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return self._zstd.ZstdCompressionDict(f.read())
+
+    def _zstd_decompressor(self, data: bytes):
+        if self._zstd is None:
+            import zstandard
+
+            self._zstd = zstandard
+        dict_id = self._zstd.get_frame_parameters(data).dict_id
+        with self._lock:
+            if dict_id not in self._zstd_dicts:
+                dict_data = self._load_zstd_dict(dict_id) if dict_id else None
+                if dict_id and dict_data is None:
+                    raise FileNotFoundError(f"Missing zstd dictionary {dict_id}")
+                self._zstd_dicts[dict_id] = dict_data
+            dict_data = self._zstd_dicts[dict_id]
+        return self._zstd.ZstdDecompressor(dict_data=dict_data)
+
+    def encode(self, records: Dict[str, str]) -> bytes:
+        """Serialize a block in the codec's format."""
+        data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+        if self.block_format == "gzip":
+            return gzip.compress(
+                data, compresslevel=self.level if self.level is not None else 6
+            )
+        if self.block_format == "zstd":
+            return self._compressor.compress(data)
+        return data
+
+    def decode(self, data: bytes, suffix: str) -> Dict[str, str]:
+        """Deserialize a block read from a file with the given suffix."""
+        if suffix == BLOCK_FORMATS["gzip"]:
+            data = gzip.decompress(data)
+        elif suffix == BLOCK_FORMATS["zstd"]:
+            data = self._zstd_decompressor(data).decompress(data)
+        return json.loads(data.decode("utf-8"))
+
+    def suffixes(self) -> List[str]:
+        """File suffixes to look for when reading, the codec's own first."""
+        return [self.suffix] + [s for s in BLOCK_FORMATS.values() if s != self.suffix]
+
+
+def block_suffix(filename: str) -> Optional[str]:
+    """Return the block format suffix of `filename`, or None."""
+    for suffix in sorted(BLOCK_FORMATS.values(), key=len, reverse=True):
+        if filename.endswith(suffix):
+            return suffix
+    return None
+
+
+def iter_block_texts(block_dir: str, max_texts: Optional[int] = None):
+    """Yield the texts of the blocks in `block_dir`, in any format."""
+    codec = BlockCodec(block_dir)
+    count = 0
+    for name in sorted(os.listdir(block_dir)):
+        suffix = block_suffix(name)
+        if suffix is None:
+            continue
+        with open(os.path.join(block_dir, name), "rb") as f:
+            records = codec.decode(f.read(), suffix)
+        for text in records.values():
+            yield text
+            count += 1
+            if max_texts is not None and count >= max_texts:
+                return
+
+
+def train_zstd_dictionary(
+    block_dir: str,
+    dict_size: int = DEFAULT_ZSTD_DICT_SIZE,
+    max_samples: int = 20000,
+    texts: Optional[List[str]] = None,
+) -> str:
+    """Train a zstd dictionary and make it the one used for new blocks.
+
+    Args:
+        block_dir: Folder of the blocks (``<DATA_DIR>/blocks``).
+        dict_size: Size of the dictionary in bytes.
+        max_samples: Maximum number of texts sampled from the blocks.
+        texts: Training texts; defaults to texts of the stored blocks.
+
+    Returns:
+        The path of the new dictionary.
+    """
+    import zstandard
+
+    if texts is None:
+        texts = list(iter_block_texts(block_dir))
+        random.shuffle(texts)
+    samples = [text.encode("utf-8") for text in texts[:max_samples] if text]
+    dict_data = zstandard.train_dictionary(dict_size, samples)
+
+    dict_dir = os.path.join(block_dir, ZSTD_DICT_DIR)
+    os.makedirs(dict_dir, exist_ok=True)
+    path = os.path.join(dict_dir, f"{dict_data.dict_id()}.dict")
+    for target in (path, os.path.join(dict_dir, "current.dict")):
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(dict_data.as_bytes())
+        os.replace(tmp_path, target)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinMycelium block formats.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train = subparsers.add_parser(
+        "train-dict", help="Train the zstd dictionary of new blocks"
+    )
+    train.add_argument(
+        "--data-dir", type=str, default=os.environ.get("DATA_DIR"), help="DATA_DIR"
+    )
+    train.add_argument(
+        "--size", type=int, default=DEFAULT_ZSTD_DICT_SIZE, help="Dictionary bytes"
+    )
+    train.add_argument(
+        "--max-samples", type=int, default=20000, help="Texts used for training"
+    )
+    args = parser.parse_args()
+
+    if not args.data_dir:
+        raise ValueError("Pass --data-dir or set DATA_DIR")
+    dict_path = train_zstd_dictionary(
+        os.path.join(args.data_dir, "blocks"), args.size, args.max_samples
+    )
+    print(f"zstd dictionary written to {dict_path}")
@@ -0,0 +1,574 @@
+"""
+Process-wide block store of the texts referenced by raw data and samples.
+
+`finmy.converter.write_text_data_to_block` and `read_text_data_from_block`
+are called once per raw document, matched paragraph and data sample. They go
+through one `BlockStore` per data folder, created on first use by
+`get_block_store` and shared by all threads, instead of a new block manager
+(directory check and block indexing) per call.
+
+Layout:
+
+    <DATA_DIR>/blocks/<block_id>.json[.gz|.zst]
+
+Each block file maps record keys to texts and holds at most ``block_size``
+records. New blocks are written in the format of ``FINMY_BLOCK_FORMAT``
+(``json``, ``gzip`` or ``zstd``, see `finmy.block_codec`); blocks of every
+format are read. Keys name their block (``text_<time><rand>@<block_id>``), so a read
+opens exactly one block file and no index has to be built. Every store
+instance writes its own blocks (``<writer_id>_<seq>``), so processes sharing
+the data folder never rewrite each other's files.
+
+Writes are buffered in the current block and persisted when the block is
+full, on `flush` and on `close`; a flush atomically rewrites the current
+block with the records buffered so far, and the next records still go to it
+until it is full. Records are readable from the writing process as soon as
+they are written; the pipeline flushes before it stores the locations of the
+records in the database (in batches when streaming), so other processes only
+see persisted records. Stores are flushed at interpreter exit.
+
+With ``FINMY_BLOCK_KEY_MODE=content``, records are content-addressed
+instead: the key is the SHA-256 of the UTF-8 bytes of the text
+(``sha256_<hex>``). The text is stored once, as a record of the block or
+segment backend, and a SQLite index (``<DATA_DIR>/blocks/content.sqlite3``,
+WAL mode) maps the key to the key of that record. Writing indexed content is
+a no-op, so identical paragraphs of different documents and runs share one
+record. Index rows are committed on `flush`, after the records they point
+to; when two processes store the same new text, the first row wins and the
+other record is left unused. The key covers the exact text, so texts
+differing only in case or whitespace are distinct records; near-identical
+documents are merged by `finmy.dedup` instead.
+
+`write_many` and `read_many` handle many records with one lock
+acquisition and touch every block file once: a block is serialized when it is
+full, and the records of one block are read with a single load.
+
+Reads go through a read-through LRU cache of record texts (`TextCache`),
+bounded by the total UTF-8 bytes of the cached texts
+(``FINMY_BLOCK_CACHE_BYTES``, 64 MiB by default, 0 disables it), so records
+read again by the matcher, the builder input or the web UI are not decoded
+again. Writing a key drops its cached text.
+
+With ``FINMY_BLOCK_BACKEND=segments``, time-keyed records are appended to
+the segment files of `finmy.segment_store.SegmentStore` instead of blocks
+(keys ``seg_<writer_id>_<n>``), read by slicing a memory map at the offset
+found in a SQLite index. Records of either backend are read whatever the
+backend of new records. `read_spans` reads spans of segment records from the
+map without reading the whole record; records in blocks are decoded whole
+and sliced.
+
+Keys without a block (written before this store existed) are read through
+lmbase's `BlockBasedStoreManager`.
+"""
+
+import os
+import time
+import hashlib
+import uuid
+import random
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from lmbase.utils.tools import BlockBasedStoreManager
+
+from finmy.block_codec import BlockCodec
+from finmy.metrics import record_cache_lookup
+from finmy.segment_store import LOOKUP_BATCH, SEGMENT_KEY_PREFIX, SegmentStore
+
+BLOCK_SIZE = 1000
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+CONTENT_KEY_PREFIX = "sha256_"
+KEY_MODES = ("time", "content")
+BACKENDS = ("blocks", "segments")
+
+
+class TextCache:
+    """Thread-safe LRU cache of record texts bounded by their total bytes.
+
+    Args:
+        max_bytes: Maximum total UTF-8 bytes of the cached texts; texts
+            larger than this are not cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text of `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+        record_cache_lookup(entry is not None)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, text: str) -> None:
+        """Cache `text` under `key`, evicting the least recently used texts
+        beyond ``max_bytes``."""
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (text, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, key: str) -> None:
+        """Drop the cached text of `key`."""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Drop all cached texts."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return the hit/miss/eviction counters, the hit rate, the number
+        of cached texts and their total bytes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class BlockStore:
+    """Thread-safe store of text records in block files.
+
+    Args:
+        folder: Data folder; blocks are written to ``<folder>/blocks``.
+        block_size: Maximum number of records per block file.
+        cache_bytes: Byte budget of the read cache; 0 disables it.
+        key_mode: "time" for time-based keys of records in blocks, "content"
+            for content-addressed records.
+        block_format: File format of new blocks; see `finmy.block_codec`.
+        backend: "blocks" to write time-keyed records to block files,
+            "segments" to append them to a `SegmentStore`.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        block_size: int = BLOCK_SIZE,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        key_mode: str = "time",
+        block_format: str = "json",
+        backend: str = "blocks",
+    ):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unknown block key mode: {key_mode} in {KEY_MODES}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown block backend: {backend} in {BACKENDS}")
+        self.folder = folder
+        self.block_dir = os.path.join(folder, "blocks")
+        self.key_mode = key_mode
+        self.backend = backend
+        self.block_size = block_size
+        self.writer_id = uuid.uuid4().hex[:8]
+        # Process owning the buffered block; a forked child gets its own store
+        self.pid = os.getpid()
+        self.closed = False
+
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._block_id = self._next_block_id()
+        self._block: Dict[str, str] = {}
+        self._dirty = False
+        self._legacy: Optional[BlockBasedStoreManager] = None
+        self._segments: Optional[SegmentStore] = None
+        self._content_index: Optional[sqlite3.Connection] = None
+        # Content keys written since the last flush -> keys of their records
+        self._content_pending: Dict[str, str] = {}
+        # Last block loaded from disk: consecutive reads mostly hit one block
+        self._last_block: Tuple[Optional[str], Dict[str, str]] = (None, {})
+        self.cache = TextCache(cache_bytes) if cache_bytes > 0 else None
+        self.codec = BlockCodec(self.block_dir, block_format)
+
+        os.makedirs(self.block_dir, exist_ok=True)
+
+    def _next_block_id(self) -> str:
+        block_id = f"{self.writer_id}_{self._seq:06d}"
+        self._seq += 1
+        return block_id
+
+    def _block_path(self, block_id: str, suffix: Optional[str] = None) -> str:
+        return os.path.join(self.block_dir, block_id + (suffix or self.codec.suffix))
+
+    @staticmethod
+    def block_of(key: str) -> Optional[str]:
+        """Return the block ID named by `key`, or None for content-addressed
+        and legacy keys."""
+        _, sep, block_id = key.rpartition("@")
+        return block_id if sep else None
+
+    def _content_db(self) -> sqlite3.Connection:
+        """Return the connection to the content index; the caller holds the
+        lock."""
+        if self._content_index is None:
+            conn = sqlite3.connect(
+                os.path.join(self.block_dir, "content.sqlite3"),
+                timeout=30.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS content (
+                    key TEXT PRIMARY KEY,
+                    location TEXT NOT NULL
+                ) WITHOUT ROWID
+                """)
+            self._content_index = conn
+        return self._content_index
+
+    def _content_locations(self, keys: List[str]) -> Dict[str, str]:
+        """Return the keys of the records holding the texts of the indexed
+        content keys among `keys`."""
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Block store of '{self.folder}' is closed")
+            locations = {
+                key: self._content_pending[key]
+                for key in keys
+                if key in self._content_pending
+            }
+            missing = [key for key in keys if key not in locations]
+            for start in range(0, len(missing), LOOKUP_BATCH):
+                batch = missing[start : start + LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                locations.update(
+                    self._content_db().execute(
+                        "SELECT key, location FROM content "
+                        f"WHERE key IN ({placeholders})",
+                        batch,
+                    )
+                )
+        return locations
+
+    def _write_content(self, texts: List[str]) -> List[str]:
+        """Store the texts missing from the content index as records of the
+        backend; the caller holds the lock."""
+        keys = [
+            CONTENT_KEY_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+            for text in texts
+        ]
+        indexed = self._content_locations(list(dict.fromkeys(keys)))
+        new_texts = {}
+        for key, text in zip(keys, texts):
+            if key not in indexed:
+                new_texts.setdefault(key, text)
+        locations = self._write_records(list(new_texts.values()))
+        self._content_pending.update(zip(new_texts, locations))
+        return keys
+
+    def _legacy_store(self) -> BlockBasedStoreManager:
+        if self._legacy is None:
+            self._legacy = BlockBasedStoreManager(
+                folder=self.folder, file_format="json", block_size=BLOCK_SIZE
+            )
+        return self._legacy
+
+    def _segment_store(self) -> SegmentStore:
+        with self._lock:
+            if self._segments is None:
+                self._segments = SegmentStore(self.folder)
+            return self._segments
+
+    def _write_block(self, block_id: str, records: Dict[str, str]) -> None:
+        path = self._block_path(block_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.codec.encode(records))
+        os.replace(tmp_path, path)
+
+    def _load_block(self, block_id: str) -> Dict[str, str]:
+        for suffix in self.codec.suffixes():
+            try:
+                with open(self._block_path(block_id, suffix), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            return self.codec.decode(data, suffix)
+        raise FileNotFoundError(self._block_path(block_id))
+
+    def _append(self, text: str) -> str:
+        """Add `text` to the current block; the caller holds the lock."""
+        key = None
+        while key is None or key in self._block:
+            key = (
+                f"text_{int(time.time() * 1e6)}{random.randint(1000, 9999)}"
+                f"@{self._block_id}"
+            )
+        self._block[key] = text
+        self._dirty = True
+        if self.cache is not None:
+            self.cache.invalidate(key)
+        if len(self._block) >= self.block_size:
+            self.flush()
+            self._block_id = self._next_block_id()
+            self._block = {}
+        return key
+
+    def write(self, text: str) -> str:
+        """Add `text` to the current block.
+
+        Returns:
+            The key of the new record.
+        """
+        return self.write_many([text])[0]
+
+    def _write_records(self, texts: List[str]) -> List[str]:
+        """Write `texts` as time-keyed records of the backend; the caller
+        holds the lock."""
+        if self.backend == "blocks":
+            return [self._append(text) for text in texts]
+        return self._segment_store().write_many(texts)
+
+    def write_many(self, texts: List[str]) -> List[str]:
+        """Add `texts` to the current block, opening new blocks as they fill.
+
+        Returns:
+            The keys of the new records, in the order of `texts`.
+        """
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Block store of '{self.folder}' is closed")
+            if self.key_mode == "content":
+                return self._write_content(texts)
+            return self._write_records(texts)
+
+    def _block_records(self, block_id: str, keys: List[str]) -> Dict[str, str]:
+        """Return the records of `block_id` holding `keys`."""
+        with self._lock:
+            if block_id == self._block_id:
+                return self._block
+            last_id, last_records = self._last_block
+        if last_id == block_id and all(key in last_records for key in keys):
+            return last_records
+        # Blocks of other processes may have grown since they were loaded
+        try:
+            records = self._load_block(block_id)
+        except FileNotFoundError:
+            raise KeyError(keys[0])
+        with self._lock:
+            self._last_block = (block_id, records)
+        return records
+
+    def read(self, key: str) -> str:
+        """Return the text of record `key`.
+
+        Raises:
+            KeyError: If the record does not exist.
+        """
+        return self.read_many([key])[0]
+
+    def read_many(self, keys: List[str]) -> List[str]:
+        """Return the texts of records `keys`, in order; each block is loaded
+        once.
+
+        Raises:
+            KeyError: If a record does not exist.
+        """
+        texts: Dict[str, str] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            text = self.cache.get(key) if self.cache is not None else None
+            if text is not None:
+                texts[key] = text
+            else:
+                missing.append(key)
+
+        content_keys = [key for key in missing if key.startswith(CONTENT_KEY_PREFIX)]
+        if content_keys:
+            locations = self._content_locations(content_keys)
+            for key in content_keys:
+                if key not in locations:
+                    raise KeyError(key)
+            location_texts = self._load_many(list(locations.values()))
+            for key in content_keys:
+                texts[key] = location_texts[locations[key]]
+        texts.update(
+            self._load_many(
+                [key for key in missing if not key.startswith(CONTENT_KEY_PREFIX)]
+            )
+        )
+        if self.cache is not None:
+            for key in missing:
+                self.cache.put(key, texts[key])
+        return [texts[key] for key in keys]
+
+    def _load_many(self, keys: List[str]) -> Dict[str, str]:
+        """Read the time-keyed, segment and legacy records `keys` from disk
+        or the current block, bypassing the read cache."""
+        texts: Dict[str, str] = {}
+        keys_by_block: Dict[Optional[str], List[str]] = {}
+        for key in dict.fromkeys(keys):
+            keys_by_block.setdefault(self.block_of(key), []).append(key)
+
+        for block_id, block_keys in keys_by_block.items():
+            if block_id is None:
+                segment_keys = [
+                    key for key in block_keys if key.startswith(SEGMENT_KEY_PREFIX)
+                ]
+                if segment_keys:
+                    segment_texts = self._segment_store().read_many(segment_keys)
+                    texts.update(zip(segment_keys, segment_texts))
+                for key in block_keys:
+                    if not key.startswith(SEGMENT_KEY_PREFIX):
+                        with self._lock:
+                            texts[key] = self._legacy_store().load(key)["text"]
+                continue
+            records = self._block_records(block_id, block_keys)
+            for key in block_keys:
+                texts[key] = records[key]
+        return texts
+
+    def read_spans(self, spans: List[Tuple[str, int, Optional[int]]]) -> List[str]:
+        """Return the character spans ``(key, start, end)`` of records, in
+        order; an `end` of None is the end of the record.
+
+        Spans of segment records missing from the read cache are sliced from
+        the segment maps (`SegmentStore.read_spans`); other records are read
+        whole with `read_many` and sliced.
+
+        Raises:
+            KeyError: If a record does not exist.
+        """
+        texts: List[Optional[str]] = [None] * len(spans)
+        segment_spans = []
+        whole = []
+        for i, (key, start, end) in enumerate(spans):
+            if key.startswith(SEGMENT_KEY_PREFIX) and (start or end is not None):
+                text = self.cache.get(key) if self.cache is not None else None
+                if text is None:
+                    segment_spans.append(i)
+                else:
+                    texts[i] = text[start:end]
+            else:
+                whole.append(i)
+        if whole:
+            records = self.read_many([spans[i][0] for i in whole])
+            for i, text in zip(whole, records):
+                _, start, end = spans[i]
+                texts[i] = text[start:end]
+        if segment_spans:
+            segment_texts = self._segment_store().read_spans(
+                [spans[i] for i in segment_spans]
+            )
+            for i, text in zip(segment_spans, segment_texts):
+                texts[i] = text
+        return texts
+
+    def flush(self) -> None:
+        """Persist the buffered records of the current block."""
+        with self._lock:
+            if self._dirty:
+                self._write_block(self._block_id, self._block)
+                self._dirty = False
+            if self._segments is not None:
+                self._segments.flush()
+            # Index rows are committed once the records they point to persist
+            if self._content_pending:
+                conn = self._content_db()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO content (key, location) "
+                        "VALUES (?, ?)",
+                        self._content_pending.items(),
+                    )
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+                self._content_pending = {}
+
+    def close(self) -> None:
+        """Flush the store and reject further writes; its segment store and
+        content index, if any, are closed too, so segment and content records
+        are read through a new store (`get_block_store`)."""
+        with self._lock:
+            if not self.closed:
+                self.flush()
+                if self._segments is not None:
+                    self._segments.close()
+                if self._content_index is not None:
+                    self._content_index.close()
+                self.closed = True
+
+
+_STORES: Dict[str, BlockStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_block_store(folder: Optional[str] = None) -> BlockStore:
+    """Return the process-wide store of `folder`, creating it on first use.
+
+    Args:
+        folder: Data folder; defaults to the ``DATA_DIR`` environment variable.
+
+    Raises:
+        ValueError: If no folder is given and ``DATA_DIR`` is not set.
+    """
+    folder = folder or os.environ.get("DATA_DIR")
+    if not folder:
+        raise ValueError("Environment variable 'DATA_DIR' is not set")
+    folder = os.path.abspath(folder)
+    with _STORES_LOCK:
+        store = _STORES.get(folder)
+        if store is None or store.closed or store.pid != os.getpid():
+            store = BlockStore(
+                folder,
+                cache_bytes=int(
+                    os.environ.get("FINMY_BLOCK_CACHE_BYTES", DEFAULT_CACHE_BYTES)
+                ),
+                key_mode=os.environ.get("FINMY_BLOCK_KEY_MODE", "time"),
+                block_format=os.environ.get("FINMY_BLOCK_FORMAT", "json"),
+                backend=os.environ.get("FINMY_BLOCK_BACKEND", "blocks"),
+            )
+            _STORES[folder] = store
+        return store
+
+
+def flush_block_stores() -> None:
+    """Persist the buffered records of every store of this process."""
+    with _STORES_LOCK:
+        stores = [s for s in _STORES.values() if s.pid == os.getpid()]
+    for store in stores:
+        store.flush()
+
+
+def close_block_stores() -> None:
+    """Close every store of this process; later calls of `get_block_store`
+    create new ones."""
+    with _STORES_LOCK:
+        stores = [s for s in _STORES.values() if s.pid == os.getpid()]
+        _STORES.clear()
+    for store in stores:
+        store.close()
+
+
+atexit.register(close_block_stores)
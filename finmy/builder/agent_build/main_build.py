@@ -46,6 +46,11 @@ Execution Flow:
    - `integrate_from_files`: Reads saved `*-Result.json` artifacts, reconstructs
      `agent_results` sequence, and delegates to `integrate_results` to assemble the final cascade.
 
+6) Incremental Rebuild
+   - `rebuild`: After new samples are added to a built query, replays the graph of the previous
+     build and re-runs only the affected episodes, their stage descriptions and the event
+     description; the other agent results are reused from the previous save directory.
+
 Architecture:
 - Orchestration: `LangGraph` (`StateGraph`) with conditional routing:
   Skeleton -> SkeletonChecker -> (Participant -> Transaction -> Episode)* -> StageDescription (per-stage) -> EventDescription -> END.
@@ -53,22 +58,25 @@ Architecture:
 - State: `AgentState` carries prompts, inputs, and incremental results throughout the pipeline.
 """
 
-import time
 import copy
 import os
+import asyncio
+import glob
 import json
-from functools import partial
+import shutil
+import logging
+from typing import Any, List, Optional, Tuple
 from pathlib import Path
 
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
 
-from lmbase.inference.base import InferInput, InferOutput
-from finmy.builder.base import BaseBuilder, BuildInput, BuildOutput
+from lmbase.inference.base import InferInput
+from finmy.generic import DataSample
+from finmy.builder.base import BaseBuilder, BuildInput, BuildOutput, PromptAgentMixin
 from finmy.builder.utils import (
     load_python_text,
     filter_dataclass_fields,
-    extract_json_response,
 )
 from finmy.builder.base import AgentState
 from finmy.builder.agent_build.structure import Episode
@@ -152,7 +160,15 @@ _EVENT_DESCRIPTION_SPEC = filter_dataclass_fields(
 )
 
 
-class AgentEventBuilder(BaseBuilder):
+# Agents run once per episode, in order
+_EPISODE_AGENTS = (
+    "ParticipantReconstructor",
+    "TransactionReconstructor",
+    "EpisodeReconstructor",
+)
+
+
+class AgentEventBuilder(PromptAgentMixin, BaseBuilder):
     """Integrated builder that performs the full event reconstruction pipeline:
     1. SkeletonReconstruction: Generates the overall event structure (EventCascade).
     2. SkeletonChecker: Validates and corrects the skeleton structure and timeline.
@@ -290,11 +306,11 @@ class AgentEventBuilder(BaseBuilder):
                 idx += 1
         return skeleton_copy
 
-    def execute_agent(self, state: AgentState, agent_name: str) -> AgentState:
+    def prepare_agent(self, state: AgentState, agent_name: str):
         """
-        Executes a single step (Agent) in the reconstruction pipeline.
+        Prepares a single step (Agent) in the reconstruction pipeline.
 
-        This function handles the prompt construction, context retrieval, and state management
+        This function handles the prompt construction and context retrieval
         for all agents: Skeleton, Participant, Transaction, and Episode Reconstructors.
 
         Key Logic:
@@ -312,21 +328,24 @@ class AgentEventBuilder(BaseBuilder):
             - Retrieves transactions from `state["agent_results"][-1]` and
               participants from `state["agent_results"][-2]` to fully populate the episode.
 
+        The LLM call, the trace persistence and the state update are run by
+        `execute_agent` / `aexecute_agent` of `PromptAgentMixin`.
+
         Args:
             state (AgentState): The current accumulation of build inputs and results.
             agent_name (str): The name of the agent to execute (bound via `partial` in the graph).
 
         Returns:
-            AgentState: Updated state with the new agent result appended.
+            Tuple of the `InferInput`, the prompt variables and the suffix of
+            the save name of the agent's traces.
         """
-        t0 = time.time()
         build_ipt = state["build_input"]
 
         # Common prompt arguments
         prompt_kwargs = {
             "Query": build_ipt.user_query.query_text,
             "Keywords": build_ipt.user_query.key_words,
-            "Content": "\n".join([sample.content for sample in build_ipt.samples]),
+            "Content": build_ipt.content_text(),
         }
 
         # Retrieve templates
@@ -505,29 +524,13 @@ class AgentEventBuilder(BaseBuilder):
         # Since we just injected a JSON schema containing braces, we must escape them.
         sys_msg = sys_msg.replace("{", "{{").replace("}", "}}")
 
-        out: InferOutput = self.agents_lm.run(
-            infer_input=InferInput(system_msg=sys_msg, user_msg=user_msg_template),
-            **prompt_kwargs,
+        return (
+            InferInput(system_msg=sys_msg, user_msg=user_msg_template),
+            prompt_kwargs,
+            savename_suffix,
         )
-        result = out.response
 
-        # Persist traces
-        savename = (
-            self.get_save_name(agent_name, len(state["agent_executed"]) + 1)
-            + savename_suffix
-        )
-        self.save_traces({agent_name: out.to_dict()}, savename, "json")
-
-        parsed_result = extract_json_response(result)
-        self.save_traces(parsed_result, f"{savename}-Result", "json")
-
-        # Update state
-        state["agent_results"].append({agent_name: parsed_result})
-        state["cost"].append({agent_name: {"latency": time.time() - t0}})
-        state["agent_executed"].append(agent_name)
-        return state
-
-    def graph(self) -> CompiledStateGraph:
+    def graph(self, asynchronous: bool = False) -> CompiledStateGraph:
         """
         Constructs and compiles the LangGraph state machine for the reconstruction pipeline.
 
@@ -565,6 +568,10 @@ class AgentEventBuilder(BaseBuilder):
            - Runs after all stages and episodes are fully reconstructed.
            - Synthesizes the global event description based on the complete cascade.
 
+        Args:
+            asynchronous (bool): Whether the graph is run with `ainvoke`
+                (nodes are then `aexecute_agent`).
+
         Returns:
             CompiledStateGraph[AgentState]: The compiled LangGraph ready for execution.
         """
@@ -577,35 +584,35 @@ class AgentEventBuilder(BaseBuilder):
         # Skeleton: Generates the initial structure
         g.add_node(
             "SkeletonReconstructor",
-            partial(self.execute_agent, agent_name="SkeletonReconstructor"),
+            self.agent_node("SkeletonReconstructor", asynchronous),
         )
         g.add_node(
             "SkeletonChecker",
-            partial(self.execute_agent, agent_name="SkeletonChecker"),
+            self.agent_node("SkeletonChecker", asynchronous),
         )
 
         # Episode Level Agents
         g.add_node(
             "ParticipantReconstructor",
-            partial(self.execute_agent, agent_name="ParticipantReconstructor"),
+            self.agent_node("ParticipantReconstructor", asynchronous),
         )
         g.add_node(
             "TransactionReconstructor",
-            partial(self.execute_agent, agent_name="TransactionReconstructor"),
+            self.agent_node("TransactionReconstructor", asynchronous),
         )
         g.add_node(
             "EpisodeReconstructor",
-            partial(self.execute_agent, agent_name="EpisodeReconstructor"),
+            self.agent_node("EpisodeReconstructor", asynchronous),
         )
 
         # Summarization Agents
         g.add_node(
             "StageDescriptionReconstructor",
-            partial(self.execute_agent, agent_name="StageDescriptionReconstructor"),
+            self.agent_node("StageDescriptionReconstructor", asynchronous),
         )
         g.add_node(
             "EventDescriptionReconstructor",
-            partial(self.execute_agent, agent_name="EventDescriptionReconstructor"),
+            self.agent_node("EventDescriptionReconstructor", asynchronous),
         )
 
         # ============================================================================
@@ -798,17 +805,18 @@ class AgentEventBuilder(BaseBuilder):
 
         return final_cascade
 
-    def integrate_from_files(self) -> dict:
+    def load_agent_results(self, save_dir: Optional[str] = None) -> List[dict]:
         """
-        Reconstructs the EventCascade from saved result files in the save directory.
-        Scans for files ending with '-Result.json'.
+        Reads the saved '-Result.json' files of a save directory (default:
+        `self.save_dir`) back into the `agent_results` sequence.
         """
+        save_dir = save_dir or self.save_dir
         # Scan directory
         files_map = {}
-        if not os.path.exists(self.save_dir):
-            raise FileNotFoundError(f"Save directory {self.save_dir} does not exist.")
+        if not os.path.exists(save_dir):
+            raise FileNotFoundError(f"Save directory {save_dir} does not exist.")
 
-        for filename in os.listdir(self.save_dir):
+        for filename in os.listdir(save_dir):
             if filename.endswith("-Result.json"):
                 # Split by '-' to get metadata
                 # Format: AgentName-Index[-Suffix...]-Result.json
@@ -829,31 +837,227 @@ class AgentEventBuilder(BaseBuilder):
 
         # Check if we have results
         if not sorted_indices:
-            raise FileNotFoundError(f"No result files found in {self.save_dir}")
+            raise FileNotFoundError(f"No result files found in {save_dir}")
 
         # Read files and reconstruct agent_results
         agent_results = []
 
         for idx in sorted_indices:
             agent_name, filename = files_map[idx]
-            filepath = os.path.join(self.save_dir, filename)
+            filepath = os.path.join(save_dir, filename)
             with open(filepath, "r", encoding="utf-8") as f:
                 data = json.load(f)
             agent_results.append({agent_name: data})
+        return agent_results
 
+    def integrate_from_files(self) -> dict:
+        """
+        Reconstructs the EventCascade from saved result files in the save directory.
+        Scans for files ending with '-Result.json'.
+        """
         # Create a dummy state
         # integrate_results only needs state["agent_results"]
-        dummy_state = {"agent_results": agent_results}
+        dummy_state = {"agent_results": self.load_agent_results()}
 
         return self.integrate_results(dummy_state)
 
-    def run(self, build_input: BuildInput) -> BuildOutput:
-        """Run the builder pipeline."""
+    def execution_plan(self, event_skeleton: dict) -> List[Tuple[str, int]]:
+        """
+        Returns the agents executed by the graph for a skeleton, in order, as
+        (agent_name, unit) pairs: the unit is the global episode index for the
+        episode agents, the stage index for `StageDescriptionReconstructor`
+        and 0 otherwise.
+        """
+        plan = [("SkeletonReconstructor", 0), ("SkeletonChecker", 0)]
+        episode_idx = 0
+        for stage_idx, stage in enumerate(event_skeleton["stages"]):
+            for _ in stage["episodes"]:
+                for agent_name in _EPISODE_AGENTS:
+                    plan.append((agent_name, episode_idx))
+                episode_idx += 1
+            plan.append(("StageDescriptionReconstructor", stage_idx))
+        plan.append(("EventDescriptionReconstructor", 0))
+        return plan
+
+    @staticmethod
+    def _field_text(value: Any) -> str:
+        """Text of a `VerifiableField` (or plain) value."""
+        if isinstance(value, dict):
+            value = value.get("value")
+        return str(value).strip() if value else ""
+
+    def affected_episodes(
+        self, agent_results: List[dict], added_samples: List[DataSample]
+    ) -> List[int]:
+        """
+        Returns the global indices of the episodes whose reconstruction the
+        added samples may change: the episodes whose name, or the name of one
+        of their participants, occurs in an added sample (case-insensitive).
+        """
+        added_content = "\n".join(s.content for s in added_samples).lower()
+        if not added_content:
+            return []
+        event_skeleton = self._get_event_skeleton({"agent_results": agent_results})
+        participants = [
+            r["ParticipantReconstructor"]["participants"]
+            for r in agent_results
+            if "ParticipantReconstructor" in r
+        ]
+        affected = []
+        episode_idx = 0
+        for stage in event_skeleton["stages"]:
+            for episode in stage["episodes"]:
+                terms = [self._field_text(episode.get("name"))]
+                if episode_idx < len(participants):
+                    terms += [
+                        self._field_text(p.get("name"))
+                        for p in participants[episode_idx]
+                    ]
+                if any(len(t) >= 2 and t.lower() in added_content for t in terms):
+                    affected.append(episode_idx)
+                episode_idx += 1
+        return affected
+
+    @staticmethod
+    def load_cost_records(save_dir: str) -> List[dict]:
+        """
+        Reads the `Cost.json` records of a save directory; empty when they
+        are missing or unreadable.
+        """
+        try:
+            with open(os.path.join(save_dir, "Cost.json"), "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return records if isinstance(records, list) else []
+
+    def _reuse_result(
+        self,
+        state: AgentState,
+        agent_name: str,
+        result: dict,
+        cost: Optional[dict],
+        previous_save_dir: str,
+        execution_idx: int,
+    ) -> None:
+        """Append a previous agent result and its cost record, marked
+        ``reused``, to the state and copy its saved traces into the current
+        save directory."""
+        state["agent_results"].append({agent_name: result})
+        state["agent_executed"].append(agent_name)
+        if cost is not None and isinstance(cost.get(agent_name), dict):
+            state["cost"].append({agent_name: {**cost[agent_name], "reused": True}})
+        if os.path.abspath(previous_save_dir) == os.path.abspath(self.save_dir):
+            return
+        savename = self.get_save_name(agent_name, execution_idx)
+        for pattern in (f"{savename}.json", f"{savename}-*.json"):
+            for path in glob.glob(os.path.join(previous_save_dir, pattern)):
+                shutil.copy2(path, self.ensure_save_dir())
+
+    def rebuild(
+        self,
+        build_input: BuildInput,
+        previous_save_dir: str,
+        added_samples: List[DataSample],
+    ) -> BuildOutput:
+        """
+        Updates a previous build after new samples were added.
+
+        The verified skeleton of the previous build is kept. The graph is
+        replayed in order: the participant, transaction and episode agents of
+        the affected episodes (see `affected_episodes`), the stage
+        descriptions of their stages and the event description are re-run on
+        `build_input`; every other agent result is reused, with its previous
+        cost record marked ``reused`` so that `Cost.json` lists every agent
+        of the build. Falls back to `run` when the previous build is missing
+        or incomplete.
+        """
+        try:
+            previous_results = self.load_agent_results(previous_save_dir)
+            plan = self.execution_plan(
+                self._get_event_skeleton({"agent_results": previous_results})
+            )
+        except (FileNotFoundError, KeyError, IndexError):
+            previous_results, plan = [], []
+        complete = bool(plan) and len(plan) == len(previous_results) and all(
+            agent_name in result
+            for (agent_name, _), result in zip(plan, previous_results)
+        )
+        if not complete:
+            logging.warning(
+                "No complete build in %s, rebuilding from scratch", previous_save_dir
+            )
+            return self.run(build_input)
+        previous_costs = self.load_cost_records(previous_save_dir)
+        if len(previous_costs) != len(plan):
+            previous_costs = [None] * len(plan)
+
+        affected = set(self.affected_episodes(previous_results, added_samples))
+        affected_stages = set()
+        stage_idx = 0
+        for agent_name, unit in plan:
+            if agent_name == "StageDescriptionReconstructor":
+                stage_idx = unit + 1
+            elif agent_name == "EpisodeReconstructor" and unit in affected:
+                affected_stages.add(stage_idx)
+
+        agent_system_msgs, agent_user_msgs = self._get_agent_prompts()
+        state = {
+            "build_input": build_input,
+            "agent_results": [],
+            "agent_executed": [],
+            "cost": [],
+            "agent_system_msgs": agent_system_msgs,
+            "agent_user_msgs": agent_user_msgs,
+        }
+        rerun = []
+        for position, (agent_name, unit) in enumerate(plan):
+            changed = bool(added_samples) and (
+                agent_name == "EventDescriptionReconstructor"
+                or (agent_name in _EPISODE_AGENTS and unit in affected)
+                or (
+                    agent_name == "StageDescriptionReconstructor"
+                    and unit in affected_stages
+                )
+            )
+            if changed:
+                state = self.execute_agent(state, agent_name)
+                rerun.append(agent_name)
+            else:
+                self._reuse_result(
+                    state,
+                    agent_name,
+                    previous_results[position][agent_name],
+                    previous_costs[position],
+                    previous_save_dir,
+                    position + 1,
+                )
+        logging.info(
+            "Incremental rebuild: %d affected episodes, %d/%d agents re-run",
+            len(affected),
+            len(rerun),
+            len(plan),
+        )
+        return self._build_output(
+            state,
+            extras={
+                "incremental": {
+                    "previous_save_dir": previous_save_dir,
+                    "added_samples": len(added_samples),
+                    "affected_episodes": sorted(affected),
+                    "rerun_agents": rerun,
+                    "reused_agents": len(plan) - len(rerun),
+                }
+            },
+        )
+
+    def _initial_state(self, build_input: BuildInput) -> AgentState:
+        """Build the initial graph state of a run."""
         # 1. Get prompts
         agent_system_msgs, agent_user_msgs = self._get_agent_prompts()
 
         # 2. Build initial state
-        state = {
+        return {
             "build_input": build_input,
             "agent_results": [],
             "agent_executed": [],
@@ -862,6 +1066,10 @@ class AgentEventBuilder(BaseBuilder):
             "agent_user_msgs": agent_user_msgs,
         }
 
+    def run(self, build_input: BuildInput) -> BuildOutput:
+        """Run the builder pipeline."""
+        state = self._initial_state(build_input)
+
         # 3. Compile graph
         app = self.graph()
 
@@ -871,7 +1079,25 @@ class AgentEventBuilder(BaseBuilder):
         config = self.build_config["graph_config"]
         final_state = app.invoke(state, config=config)
 
+        return self._build_output(final_state)
+
+    async def arun(self, build_input: BuildInput) -> BuildOutput:
+        """Asynchronous `run`: the graph runs with `ainvoke`, so its LLM calls
+        are awaited on the event loop instead of holding a worker thread."""
+        state = self._initial_state(build_input)
+        app = self.graph(asynchronous=True)
+        config = self.build_config["graph_config"]
+        final_state = await app.ainvoke(state, config=config)
+        # Integrating the results reads and writes the trace files
+        return await asyncio.to_thread(self._build_output, final_state)
+
+    def _build_output(
+        self, final_state: AgentState, extras: Optional[dict] = None
+    ) -> BuildOutput:
+        """Integrate and save the results of a finished graph run."""
         # 5. Integrate results
+        # The cost records are the latency history of `finmy.planner`
+        self.save_traces(final_state["cost"], save_name="Cost", file_format="json")
         cascade_dict = self.integrate_results(final_state)
         self.save_traces(
             cascade_dict,
@@ -891,5 +1117,5 @@ class AgentEventBuilder(BaseBuilder):
             event_cascades=cascade_dict,
             result=final_state,
             logs=final_state["agent_executed"],
-            extras=None,
+            extras=extras,
         )
@@ -3,12 +3,18 @@ Base entities and containers for financial event reconstruction.
 """
 
 import os
+import copy
+import time
+import asyncio
 import json
 import pickle
 import datetime
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import Optional, Any, Dict, List
+from functools import partial
+from typing import Optional, Any, Dict, Iterator, List, Tuple
 
 from langgraph.graph import MessagesState
 from langgraph.graph.state import CompiledStateGraph
@@ -19,7 +25,10 @@ from lmbase.inference.api_call import LangChainAPIInference
 from lmbase.utils.tools import BaseContainer
 
 from finmy.generic import UserQueryInput, DataSample
+from finmy.document import sample_contents
 from finmy.builder.agent_build.structure import EventCascade
+from finmy.builder.utils import extract_json_response
+from finmy.llm_scheduler import PRIORITY_BUILD, acall_llm, allm_request, llm_request
 
 
 @dataclass
@@ -29,6 +38,18 @@ class BuildInput(BaseContainer):
     user_query: UserQueryInput
     samples: List[DataSample]
 
+    def content_text(self) -> str:
+        """Return the sample contents joined by newlines.
+
+        The text is built once per input and shared by all agent calls; the
+        samples are read from their handles only here.
+        """
+        text = self.__dict__.get("_content_text")
+        if text is None:
+            text = "\n".join(sample_contents(self.samples))
+            self._content_text = text
+        return text
+
 
 @dataclass
 class BuildOutput(BaseContainer):
@@ -67,7 +88,7 @@ class AgentState(MessagesState):
     # Logical execution order: list of agent names in the order they ran
     agent_executed: List[str]
 
-    # Optional execution cost items: e.g., {"agent": "...", "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0}
+    # Execution cost items: {agent_name: {"latency": seconds, "prompt_tokens": 0, "completion_tokens": 0}}
     cost: List[Dict[str, Any]]
 
     # Per-agent system prompts (agent_name -> system_prompt)
@@ -79,6 +100,36 @@ class AgentState(MessagesState):
     messages: List[Any] = None
 
 
+# Token counters of the agent step running in the current thread or task
+_STEP_USAGE: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "finmy_builder_step_usage", default=None
+)
+
+
+@contextmanager
+def step_usage() -> Iterator[Dict[str, int]]:
+    """Sum the prompt and completion tokens of the `BaseBuilder.infer_lm`
+    calls made inside the block into the yielded dict.
+
+    The counters live in a context variable, so concurrent steps on other
+    threads or asyncio tasks, even of the same builder, are not counted.
+    """
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    token = _STEP_USAGE.set(usage)
+    try:
+        yield usage
+    finally:
+        _STEP_USAGE.reset(token)
+
+
+def _count_usage(request) -> None:
+    """Add the tokens of a finished scheduler request to the current step."""
+    usage = _STEP_USAGE.get()
+    if usage is not None:
+        usage["prompt_tokens"] += request.prompt_tokens
+        usage["completion_tokens"] += request.completion_tokens
+
+
 class BaseBuilder(ABC):
     """Base class for event cascade builders."""
 
@@ -99,12 +150,43 @@ class BaseBuilder(ABC):
 
         self.define_agent_models()
 
+        self.save_dir = None
+        self.reset_save_dir()
+
+    def reset_save_dir(self) -> str:
+        """Choose a fresh timestamped save directory for the next build.
+
+        The directory is created on the first write (`ensure_save_dir`), so
+        runs served from the result cache leave no empty directory behind.
+
+        Returns
+        - The path of the new save directory.
+        """
         build_output = (
             f"build_output_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}"
         )
-        self.save_dir = os.path.join(build_config["save_folder"], build_output)
+        self.save_dir = os.path.join(self.build_config["save_folder"], build_output)
+        return self.save_dir
 
+    def ensure_save_dir(self) -> str:
+        """Create the save directory if needed and return its path."""
         os.makedirs(self.save_dir, exist_ok=True)
+        return self.save_dir
+
+    def reset_run_state(self) -> None:
+        """Give this builder fresh per-run state: a new save directory."""
+        self.reset_save_dir()
+
+    def spawn(self) -> "BaseBuilder":
+        """Return a copy of this builder with its own per-run state.
+
+        The copy shares the configuration and the language model clients, so it
+        is cheap to create and can run concurrently with the original; its
+        save directory is its own (`reset_run_state`).
+        """
+        builder = copy.copy(self)
+        builder.reset_run_state()
+        return builder
 
     def define_agent_models(self):
         """Define the models for the agent."""
@@ -123,6 +205,51 @@ class BaseBuilder(ABC):
         #         generation_config=self.build_config["generation_config"],
         #     )
 
+    def infer_lm(self, infer_input, lm=None, **prompt_kwargs):
+        """Run one LLM call through the process-wide LLM scheduler.
+
+        Builder calls have the highest priority (`PRIORITY_BUILD`) among the
+        calls waiting for the rate limits of the model. The tokens of the call
+        are added to the enclosing `step_usage` block, if any.
+
+        Parameters
+        - infer_input: The `InferInput` holding the system and user messages.
+        - lm: The inference client; defaults to `self.agents_lm`.
+        - **prompt_kwargs: Variables substituted into the message templates.
+
+        Returns
+        - The `InferOutput` of the call.
+        """
+        lm = lm or self.agents_lm
+        prompt = [infer_input.system_msg, infer_input.user_msg, prompt_kwargs]
+        with llm_request(
+            self.build_config["lm_name"], prompt, PRIORITY_BUILD
+        ) as request:
+            out = lm.run(infer_input=infer_input, **prompt_kwargs)
+            request.finish(out.response, usage=getattr(out, "usage", None))
+        _count_usage(request)
+        return out
+
+    async def ainfer_lm(self, infer_input, lm=None, **prompt_kwargs):
+        """Asynchronous `infer_lm`: the scheduler slot and the LLM call are
+        awaited on the event loop."""
+        lm = lm or self.agents_lm
+        prompt = [infer_input.system_msg, infer_input.user_msg, prompt_kwargs]
+        async with allm_request(
+            self.build_config["lm_name"], prompt, PRIORITY_BUILD
+        ) as request:
+            out = await acall_llm(lm, "run", infer_input=infer_input, **prompt_kwargs)
+            request.finish(out.response, usage=getattr(out, "usage", None))
+        _count_usage(request)
+        return out
+
+    def cost_entry(self, start_time: float, usage: Dict[str, int]) -> Dict[str, Any]:
+        """Return the `AgentState.cost` record of the agent started at
+        `start_time`: its latency in seconds and `usage`, the tokens of all
+        its LLM calls (`step_usage`). These records are the history fitted by
+        `finmy.planner`."""
+        return {"latency": time.time() - start_time, **usage}
+
     def get_save_name(
         self,
         agent_name: str,
@@ -154,7 +281,8 @@ class BaseBuilder(ABC):
         - state: The current state of the agent.
         """
 
-        save_path = os.path.join(self.save_dir, f"{save_name}.{file_format}")
+        save_dir = self.ensure_save_dir()
+        save_path = os.path.join(save_dir, f"{save_name}.{file_format}")
         # Save the traces
         if file_format == "json":
             with open(save_path, "w", encoding="utf-8") as f:
@@ -175,15 +303,36 @@ class BaseBuilder(ABC):
         - Update state.execute_count[agent_name] (increment by 1).
         - Optionally persist artifacts using get_save_name.
 
+        Builders whose stages are one LLM call each can use the
+        implementation of `PromptAgentMixin`.
+
         Returns
         - The updated AgentState after this stage completes.
         """
 
+    async def aexecute_agent(self, state: AgentState, agent_name: str) -> AgentState:
+        """Asynchronous `execute_agent`, the node of the graphs run by `arun`.
+
+        The default implementation executes `execute_agent` in a worker
+        thread; `PromptAgentMixin` awaits the LLM call on the event loop.
+        """
+        return await asyncio.to_thread(self.execute_agent, state, agent_name)
+
+    def agent_node(self, agent_name: str, asynchronous: bool = False):
+        """Return the graph node of `agent_name`: `execute_agent`, or
+        `aexecute_agent` for graphs run asynchronously, bound with partial."""
+        execute = self.aexecute_agent if asynchronous else self.execute_agent
+        return partial(execute, agent_name=agent_name)
+
     @abstractmethod
-    def graph(self) -> CompiledStateGraph:
+    def graph(self, asynchronous: bool = False) -> CompiledStateGraph:
         """Construct and compile the LangGraph for this agent or pipeline.
 
-        Note that the `execute_agent` function should be bound with the 'agent_name' using partial.
+        Note that the `execute_agent` function should be bound with the 'agent_name' using partial (see `agent_node`).
+
+        Parameters
+        - asynchronous: Whether the graph is run with `ainvoke`; its nodes
+          are then `aexecute_agent`.
 
         Returns
         - A CompiledStateGraph with entry point and edges defined.
@@ -207,3 +356,112 @@ class BaseBuilder(ABC):
         Returns:
             BuildOutput: The final output containing the reconstructed event cascades and execution logs.
         """
+
+    def rebuild(
+        self,
+        build_input: BuildInput,
+        previous_save_dir: str,
+        added_samples: List[DataSample],
+    ):
+        """Update a previous build after new samples were added.
+
+        Builders able to reuse the agent results saved in `previous_save_dir`
+        re-run only the agents affected by `added_samples`; the default
+        implementation runs the whole build again.
+
+        Args:
+            build_input (BuildInput): The input of the updated build, holding
+                the previous and the added samples.
+            previous_save_dir (str): Save directory of the previous build.
+            added_samples (List[DataSample]): The samples of `build_input`
+                that were not part of the previous build.
+
+        Returns:
+            BuildOutput: The output of the updated build.
+        """
+        return self.run(build_input)
+
+    async def arun(self, build_input: BuildInput):
+        """Asynchronous `run`, used by `FinmyAsyncPipeline`.
+
+        The default implementation executes `run` in a worker thread of the
+        event loop's default executor; builders with a native async backend
+        override it.
+        """
+        return await asyncio.to_thread(self.run, build_input)
+
+
+class PromptAgentMixin(ABC):
+    """Default `execute_agent` of builders whose stages are one LLM call.
+
+    A stage is prepared by `prepare_agent` (its `InferInput` and prompt
+    variables), run through `infer_lm` and recorded by `record_agent`, which
+    persists its traces and appends its parsed result and cost to the state.
+    Builders opt in by listing the mixin before `BaseBuilder`:
+
+        class LMBuilder(PromptAgentMixin, BaseBuilder): ...
+    """
+
+    @abstractmethod
+    def prepare_agent(
+        self, state: AgentState, agent_name: str
+    ) -> Tuple[Any, Dict[str, Any], str]:
+        """Prepare the LLM call of one stage from the provided state.
+
+        Returns
+        - The `InferInput` of the call, its prompt variables, and the suffix
+          appended to the save name of the stage's traces.
+        """
+
+    def record_agent(
+        self,
+        state: AgentState,
+        agent_name: str,
+        out: Any,
+        start_time: float,
+        usage: Dict[str, int],
+        savename_suffix: str = "",
+    ) -> AgentState:
+        """Persist the traces of a finished stage and append its parsed
+        result, cost (with the token `usage` of its calls) and name to the
+        state."""
+        savename = (
+            self.get_save_name(agent_name, len(state["agent_executed"]) + 1)
+            + savename_suffix
+        )
+        self.save_traces({agent_name: out.to_dict()}, savename, "json")
+        parsed_result = extract_json_response(out.response)
+        self.save_traces(parsed_result, f"{savename}-Result", "json")
+
+        state["agent_results"].append({agent_name: parsed_result})
+        state["cost"].append({agent_name: self.cost_entry(start_time, usage)})
+        state["agent_executed"].append(agent_name)
+        return state
+
+    def execute_agent(self, state: AgentState, agent_name: str) -> AgentState:
+        """Execute one stage: `prepare_agent`, `infer_lm` and `record_agent`.
+
+        Returns
+        - The updated AgentState after this stage completes.
+        """
+        start_time = time.time()
+        with step_usage() as usage:
+            infer_input, prompt_kwargs, suffix = self.prepare_agent(state, agent_name)
+            out = self.infer_lm(infer_input, **prompt_kwargs)
+        return self.record_agent(state, agent_name, out, start_time, usage, suffix)
+
+    async def aexecute_agent(self, state: AgentState, agent_name: str) -> AgentState:
+        """Asynchronous `execute_agent`, the node of the graphs run by `arun`.
+
+        The LLM call is awaited on the event loop; the preparation (which may
+        read the sample contents) and the trace writes run in a worker thread.
+        """
+        start_time = time.time()
+        with step_usage() as usage:
+            infer_input, prompt_kwargs, suffix = await asyncio.to_thread(
+                self.prepare_agent, state, agent_name
+            )
+            out = await self.ainfer_lm(infer_input, **prompt_kwargs)
+        return await asyncio.to_thread(
+            self.record_agent, state, agent_name, out, start_time, usage, suffix
+        )
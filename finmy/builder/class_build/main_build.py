@@ -211,7 +211,7 @@ class ClassEventBuilder(BaseBuilder):
             system_msg="Hello",
             user_msg="Test message",
         )
-        result = test_api_call.run(chatbot)
+        result = self.infer_lm(chatbot, lm=test_api_call)
         logging.info(f"Test response: {result.response}")
         return result.response
 
@@ -266,7 +266,7 @@ class ClassEventBuilder(BaseBuilder):
             + classify.classify_prompt().replace("{", "{{").replace("}", "}}"),
         )
 
-        classify_output = api_call.run(classify_chatbot)
+        classify_output = self.infer_lm(classify_chatbot, lm=api_call)
         classify_output_text = classify_output.response.strip()
         logging.info(f"Classify output text: {classify_output_text}")
 
@@ -286,7 +286,7 @@ class ClassEventBuilder(BaseBuilder):
             user_msg=str(all_content) + "\n\n\n" + escaped_prompt,
         )
 
-        detailed_output = api_call.run(detailed_chatbot)
+        detailed_output = self.infer_lm(detailed_chatbot, lm=api_call)
         output_text = detailed_output.response.strip()
         logging.info("Received detailed output from LLM")
 
@@ -312,7 +312,7 @@ class ClassEventBuilder(BaseBuilder):
                         + "(2) document.open();document.domain='sogou.com';document.close();",
                     )
 
-                    format_output = api_call.run(format_chatbot)
+                    format_output = self.infer_lm(format_chatbot, lm=api_call)
                     format_output_text = format_output.response.strip()
                     event_cascade_json = self.extract_json_response(format_output_text)
                     break
@@ -7,6 +7,15 @@ OTHER_TOKEN_NUM = 3000
 CLASS_BUILD_ESTIMATE_PER_TOKEN_TIME_COST = 1.5e-4
 AGENT_BUILD_ESTIMATE_PER_TOKEN_TIME_COST = 4e-4
 
+# Latency of one LLM call assumed by the dry-run planner without history:
+# fixed overhead plus a cost per prompt and per completion token, in milliseconds
+DEFAULT_CALL_OVERHEAD_MS = 2000.0
+DEFAULT_PROMPT_TOKEN_MS = 0.5
+DEFAULT_COMPLETION_TOKEN_MS = 25.0
+
+# Completion tokens assumed per LLM call without history
+DEFAULT_COMPLETION_TOKENS = 1500
+
 
 class BuildType(Enum):
     """Enumeration of build types for reconstruction tasks.
@@ -7,20 +7,17 @@ This method is to reconstruction the financial event purely by prompting a singl
     samples ->
 """
 
-import time
 from pathlib import Path
-from functools import partial
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.state import CompiledStateGraph
 
-from lmbase.inference.base import InferInput, InferOutput
+from lmbase.inference.base import InferInput
 
-from finmy.builder.base import BaseBuilder, BuildInput, AgentState
+from finmy.builder.base import BaseBuilder, BuildInput, AgentState, PromptAgentMixin
 from finmy.builder.utils import (
     load_python_text,
     extract_dataclass_blocks,
-    extract_json_response,
 )
 
 
@@ -80,17 +77,15 @@ _STRUCTURE_SPEC = (
 )
 
 
-class LMBuilder(BaseBuilder):
+class LMBuilder(PromptAgentMixin, BaseBuilder):
     """
     Build the financial event cascade from the input content using the LM model (Single Inference).
     """
 
-    def execute_agent(self, state: AgentState, agent_name: str) -> AgentState:
+    def prepare_agent(self, state: AgentState, agent_name: str):
         """
-        Execute the single LM inference to generate the EventCascade.
+        Prepare the single LM inference generating the EventCascade.
         """
-        t0 = time.time()
-
         build_ipt: BuildInput = state["build_input"]
 
         # Prepare prompt kwargs
@@ -98,7 +93,7 @@ class LMBuilder(BaseBuilder):
         prompt_kwargs = {
             "Query": build_ipt.user_query.query_text,
             "Keywords": build_ipt.user_query.key_words,
-            "Content": "\n".join([sample.content for sample in build_ipt.samples]),
+            "Content": build_ipt.content_text(),
         }
 
         # 2. Prepare Messages
@@ -114,29 +109,12 @@ class LMBuilder(BaseBuilder):
         sys_msg = sys_msg.replace("{", "{{").replace("}", "}}")
         user_msg = user_msg_template
 
-        # 3. Call LM
-        # Use self.agents_lm which is initialized in BaseBuilder
-        out: InferOutput = self.agents_lm.run(
-            infer_input=InferInput(system_msg=sys_msg, user_msg=user_msg),
-            **prompt_kwargs,
-        )
-
-        result = out.response
-
-        # 4. Persist traces
-        savename = self.get_save_name(agent_name, len(state["agent_executed"]) + 1)
-        self.save_traces({agent_name: out.to_dict()}, savename, "json")
-        parsed_result = extract_json_response(result)
-        self.save_traces(parsed_result, f"{savename}-Result", "json")
-
-        # 5. Update state
-        state["agent_results"].append({agent_name: parsed_result})
-        state["cost"].append({agent_name: {"latency": time.time() - t0}})
-        state["agent_executed"].append(agent_name)
-
-        return state
+        # 3. The LM call (with self.agents_lm, initialized in BaseBuilder),
+        # the trace persistence and the state update are run by
+        # `execute_agent` / `aexecute_agent`
+        return InferInput(system_msg=sys_msg, user_msg=user_msg), prompt_kwargs, ""
 
-    def graph(self) -> CompiledStateGraph:
+    def graph(self, asynchronous: bool = False) -> CompiledStateGraph:
         """
         Define the simple graph for single-shot LM generation.
         """
@@ -145,7 +123,7 @@ class LMBuilder(BaseBuilder):
         # Add single node using partial to bind agent_name
         workflow.add_node(
             "EventReconstructor",
-            partial(self.execute_agent, agent_name="EventReconstructor"),
+            self.agent_node("EventReconstructor", asynchronous),
         )
 
         # Define edges
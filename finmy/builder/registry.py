@@ -21,23 +21,23 @@ Usage:
     builder = registry.get(config)
 """
 
-from typing import Dict, Callable
+from typing import Dict, Callable, Union
+import importlib
 import logging
 
 from .base import BaseBuilder
-from .lm_build import LMBuilder
-from .class_build.main_build import ClassEventBuilder
-from .agent_build.main_build import AgentEventBuilder
 
 # ============================================================================
 # Registry Factory Pattern Implementation
 # ============================================================================
 
 # Builder factory dictionary
-builder_factory: Dict[str, Callable] = {
-    "LMBuilder": LMBuilder,
-    "ClassEventBuilder": ClassEventBuilder,
-    "AgentEventBuilder": AgentEventBuilder,
+# Entries are classes or "module:attribute" paths imported on first use, so
+# that only the configured builder and its prompts are loaded.
+builder_factory: Dict[str, Union[Callable, str]] = {
+    "LMBuilder": "finmy.builder.lm_build:LMBuilder",
+    "ClassEventBuilder": "finmy.builder.class_build.main_build:ClassEventBuilder",
+    "AgentEventBuilder": "finmy.builder.agent_build.main_build:AgentEventBuilder",
 }
 
 
@@ -49,5 +49,9 @@ def get(builder_config: dict) -> BaseBuilder:
             f"Unknown builder type: {builder_type} in {builder_factory.keys()}"
         )
     logging.info("Creating builder: %s.", builder_type)
-    builder = builder_factory[builder_type](build_config=builder_config)
+    factory = builder_factory[builder_type]
+    if isinstance(factory, str):
+        module_name, attr = factory.split(":")
+        factory = getattr(importlib.import_module(module_name), attr)
+    builder = factory(build_config=builder_config)
     return builder
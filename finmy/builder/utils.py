@@ -12,6 +12,7 @@ import ast
 from pathlib import Path
 from typing import List, Set, Dict, Any, Optional
 
+from finmy.context_packer import load_token_counter
 from finmy.builder.constant import (
     OTHER_TOKEN_NUM,
     CLASS_BUILD_ESTIMATE_PER_TOKEN_TIME_COST,
@@ -422,6 +423,9 @@ def extract_json_response(response_text: str) -> Dict[str, Any]:
 def estimate_complete_time(str_list: List[str], build_type: str) -> int:
     """Estimate the time to complete the reconstruction based on the content strings.
 
+    This is a coarse, per-content-token estimate; `finmy.planner.DryRunPlanner`
+    gives an itemized estimate per LLM call in milliseconds.
+
     Parameters:
     - str_list: The list of the content in strings.
     - build_type: The type of build, either "ClassEventBuilder" or "AgentEventBuilder".
@@ -432,25 +436,9 @@ def estimate_complete_time(str_list: List[str], build_type: str) -> int:
     if isinstance(build_type, str):
         build_type = BuildType(build_type)
 
-    all_content = " ".join(str_list)
-
-    # Calculate the length of the build input,
-    # considering the space between words and the length of the words
-    # ( not precisely, just approximately)
-    build_input_length = 0
-    last_word = ""
-    for i in all_content:
-        if i.isspace():
-            if not last_word.isspace():
-                build_input_length += 1
-            last_word = i
-        elif i.isascii():
-            if not last_word.isspace():
-                continue
-            last_word = i
-        else:
-            last_word = i
-            build_input_length += 1
+    # Count the tokens of the build input with the offline tokenizer
+    count_tokens = load_token_counter()
+    build_input_length = sum(count_tokens(text) for text in str_list)
     if build_type == BuildType.CLASS_BUILD:
         return round(
             (build_input_length + OTHER_TOKEN_NUM)
@@ -0,0 +1,212 @@
+"""
+Stage-level checkpoints for the FinMycelium pipeline.
+
+Each pipeline step (raw data collection, user query, summarization, matching,
+build input) persists its output under a run directory. A checkpoint is keyed
+by a hash of the step's inputs and configuration, chained with the keys and
+the output hashes of the steps it depends on, so changing any upstream input
+invalidates every downstream checkpoint, and so does an upstream step that
+produces a different output from the same inputs (e.g. a source whose
+content changed). Outputs are hashed with `stable_hash`, or with the hash of
+a stage-specific fingerprint (IDs and content hashes) given by the caller.
+
+Layout:
+
+    <checkpoint_dir>/<run_key>/<stage>.pkl
+
+where `run_key` hashes the run inputs (sources/contents and query) and
+each `<stage>.pkl` stores `{"key": stage_key, "data": output}`.
+
+With `resume=True`, a stage whose checkpoint is present and carries the
+expected key is loaded instead of executed; re-running a failed build then
+only pays for the steps that did not complete.
+"""
+
+import os
+import json
+import uuid
+import pickle
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def stable_hash(payload: Any) -> str:
+    """Return a short, stable SHA-256 hex digest of a JSON-serializable payload.
+
+    Non-JSON values (e.g. dataclasses) are serialized through `str`.
+    """
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class StageCheckpointer:
+    """Persist and restore the outputs of pipeline stages for one run.
+
+    Args:
+        checkpoint_dir: Root folder holding the run directories.
+        run_inputs: Inputs and configuration identifying the run; hashed into
+            the run directory name.
+        resume: Whether valid checkpoints are loaded instead of re-executing
+            their stages. Outputs are always persisted.
+        logger: Optional logger; defaults to the module logger.
+    """
+
+    def __init__(
+        self,
+        checkpoint_dir: str,
+        run_inputs: Dict[str, Any],
+        resume: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.run_key = stable_hash(run_inputs)
+        self.run_dir = os.path.join(checkpoint_dir, self.run_key)
+        self.resume = resume
+        self.logger = logger or logging.getLogger(__name__)
+        # stage name -> key of the checkpoint produced or loaded in this run
+        self.keys: Dict[str, str] = {}
+        # stage name -> hash of the output produced or loaded in this run
+        self.outputs: Dict[str, str] = {}
+
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.pkl")
+
+    def stage_key(self, stage: str, inputs: Dict[str, Any]) -> str:
+        """Compute the key of `stage` from its inputs."""
+        return stable_hash({"stage": stage, "inputs": inputs})
+
+    def load(self, stage: str, key: str) -> Any:
+        """Load the output of `stage` if its checkpoint exists and matches `key`.
+
+        Returns:
+            The stored output, or None when the checkpoint is missing, stale
+            or unreadable.
+        """
+        path = self._path(stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                record = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            self.logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+        if not isinstance(record, dict) or record.get("key") != key:
+            self.logger.info("Checkpoint %s is stale, recomputing", path)
+            return None
+        return record["data"]
+
+    def save(self, stage: str, key: str, data: Any) -> str:
+        """Atomically persist the output of `stage` under `key`.
+
+        Returns:
+            The path of the checkpoint file.
+        """
+        path = self._path(stage)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"key": key, "data": data}, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def run(
+        self,
+        stage: str,
+        inputs: Dict[str, Any],
+        fn: Callable[[], Any],
+        depends_on: Optional[List[str]] = None,
+        fingerprint: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Execute `fn` for `stage`, or restore its checkpoint when resuming.
+
+        Args:
+            stage: Name of the stage; also the checkpoint file name.
+            inputs: Inputs and configuration of the stage.
+            fn: Zero-argument callable producing the stage output.
+            depends_on: Names of upstream stages already run in this
+                checkpointer; their keys and output hashes are folded into
+                this stage's key.
+            fingerprint: Optional callable returning the JSON-serializable
+                payload hashed in place of the output.
+
+        Returns:
+            The output of the stage.
+        """
+        key, data = self._restore(stage, inputs, depends_on)
+        if data is None:
+            data = fn()
+            self.save(stage, key, data)
+            self.logger.info("Saved checkpoint for stage '%s': %s", stage, key)
+        self._record_output(stage, data, fingerprint)
+        return data
+
+    async def arun(
+        self,
+        stage: str,
+        inputs: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+        depends_on: Optional[List[str]] = None,
+        fingerprint: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Asynchronous `run` for stages produced by a coroutine function.
+
+        Args:
+            stage: Name of the stage; also the checkpoint file name.
+            inputs: Inputs and configuration of the stage.
+            fn: Zero-argument coroutine function producing the stage output.
+            depends_on: Names of upstream stages already run in this
+                checkpointer; their keys and output hashes are folded into
+                this stage's key.
+            fingerprint: Optional callable returning the JSON-serializable
+                payload hashed in place of the output; run in a thread.
+
+        Returns:
+            The output of the stage.
+        """
+        key, data = self._restore(stage, inputs, depends_on)
+        if data is None:
+            data = await fn()
+            self.save(stage, key, data)
+            self.logger.info("Saved checkpoint for stage '%s': %s", stage, key)
+        await asyncio.to_thread(self._record_output, stage, data, fingerprint)
+        return data
+
+    def _record_output(
+        self,
+        stage: str,
+        data: Any,
+        fingerprint: Optional[Callable[[Any], Any]],
+    ) -> None:
+        """Hash the output of `stage` for the keys of downstream stages."""
+        self.outputs[stage] = stable_hash(
+            fingerprint(data) if fingerprint is not None else data
+        )
+
+    def _restore(
+        self,
+        stage: str,
+        inputs: Dict[str, Any],
+        depends_on: Optional[List[str]],
+    ) -> tuple:
+        """Compute the key of `stage` and load its checkpoint when resuming.
+
+        Returns:
+            Tuple of (key, restored output or None).
+        """
+        inputs = dict(inputs)
+        for upstream in depends_on or []:
+            inputs[f"stage:{upstream}"] = {
+                "key": self.keys[upstream],
+                "output": self.outputs[upstream],
+            }
+        key = self.stage_key(stage, inputs)
+        self.keys[stage] = key
+        if self.resume:
+            data = self.load(stage, key)
+            if data is not None:
+                self.logger.info("Resumed stage '%s' from checkpoint %s", stage, key)
+                return key, data
+        return key, None
@@ -0,0 +1,187 @@
+"""
+Relevance-ranked, token-budgeted packing of builder contexts.
+
+Matching keeps every relevant paragraph of every document, so the samples of a
+`BuildInput` can exceed the builder model's context, and the order in which
+documents arrived decides nothing about their value. `ContextPacker` runs
+between matching and the builder and:
+
+1. scores every sample from
+   - the matcher score (`DataSample.score`, e.g. the LM matcher's 0-1 score),
+   - keyword coverage: the share of the query keywords found in the sample,
+   - recency: the sample time, scaled to 0-1 between the oldest and newest
+     sample of the input;
+2. counts the tokens of every sample with the builder's tokenizer (tiktoken
+   when installed, `finmy.metrics.estimate_tokens` otherwise);
+3. keeps the best-scored samples that fit ``token_budget`` (samples that do
+   not fit are skipped so that smaller, lower-ranked ones can still fill the
+   budget), and returns them in their original order.
+"""
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from finmy.document import sample_contents
+from finmy.generic import DataSample, UserQueryInput
+from finmy.metrics import estimate_tokens
+
+
+# Weights of the score components when ``weights`` is not configured
+DEFAULT_WEIGHTS = {"matcher": 0.5, "keywords": 0.3, "recency": 0.2}
+
+# Matcher score assumed for samples whose matcher does not report one
+DEFAULT_MATCHER_SCORE = 0.5
+
+# Formats of `MetaSample.time` / `RawData.time`
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S %Z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d")
+
+
+@lru_cache(maxsize=None)
+def load_token_counter(encoding: str = "cl100k_base") -> Callable[[str], int]:
+    """Return a function counting the tokens of a text.
+
+    Uses the tiktoken `encoding` when tiktoken is installed, and the regex
+    estimate of `finmy.metrics.estimate_tokens` otherwise. Counters are
+    cached per encoding, so the encoder is loaded once per process.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logging.getLogger(__name__).warning(
+            "tiktoken is not installed, estimating token counts"
+        )
+        return estimate_tokens
+    tokenizer = tiktoken.get_encoding(encoding)
+    return lambda text: len(tokenizer.encode(text or "", disallowed_special=()))
+
+
+def parse_sample_time(value: Optional[str]) -> Optional[float]:
+    """Parse a sample time into a POSIX timestamp; None when unparsable."""
+    if not value:
+        return None
+    for time_format in _TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).timestamp()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class ContextPacker:
+    """Select the most relevant samples fitting a token budget.
+
+    Args:
+        token_budget: Maximum total tokens of the selected sample contents.
+        weights: Weights of the ``matcher``, ``keywords`` and ``recency``
+            score components; missing components use `DEFAULT_WEIGHTS`.
+        encoding: tiktoken encoding used to count tokens.
+        logger: Logger reporting the packing decisions.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        weights: Optional[Dict[str, float]] = None,
+        encoding: str = "cl100k_base",
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.token_budget = int(token_budget)
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.count_tokens = load_token_counter(encoding)
+        self.logger = logger or logging.getLogger(__name__)
+
+    @staticmethod
+    def keyword_coverage(content: str, key_words: List[str]) -> float:
+        """Share of `key_words` occurring in `content` (case-insensitive)."""
+        key_words = [k.lower() for k in key_words if k]
+        if not key_words:
+            return 0.0
+        content = content.lower()
+        return sum(k in content for k in key_words) / len(key_words)
+
+    def score(
+        self,
+        user_query: UserQueryInput,
+        samples: List[DataSample],
+        contents: Optional[List[str]] = None,
+    ) -> List[float]:
+        """Return the relevance score of every sample, in input order.
+
+        `contents` are the sample contents when the caller already read them.
+        """
+        if contents is None:
+            contents = [s.content for s in samples]
+        times = [parse_sample_time(s.time) for s in samples]
+        known_times = [t for t in times if t is not None]
+        oldest = min(known_times, default=0.0)
+        newest = max(known_times, default=0.0)
+
+        scores = []
+        for sample, content, sample_time in zip(samples, contents, times):
+            matcher_score = (
+                sample.score if sample.score is not None else DEFAULT_MATCHER_SCORE
+            )
+            if sample_time is None:
+                recency = 0.0
+            elif newest > oldest:
+                recency = (sample_time - oldest) / (newest - oldest)
+            else:
+                recency = 1.0
+            scores.append(
+                self.weights["matcher"] * matcher_score
+                + self.weights["keywords"]
+                * self.keyword_coverage(content, user_query.key_words)
+                + self.weights["recency"] * recency
+            )
+        return scores
+
+    def select(
+        self, scores: List[float], token_counts: List[int]
+    ) -> Tuple[List[int], int]:
+        """Greedily pick indices by decreasing score within the token budget.
+
+        Returns:
+            The selected indices in input order, and their total tokens.
+        """
+        ranked = sorted(range(len(scores)), key=lambda i: (-scores[i], i))
+        selected, used_tokens = [], 0
+        for idx in ranked:
+            if used_tokens + token_counts[idx] <= self.token_budget:
+                selected.append(idx)
+                used_tokens += token_counts[idx]
+        return sorted(selected), used_tokens
+
+    def pack(
+        self, user_query: UserQueryInput, samples: List[DataSample]
+    ) -> List[DataSample]:
+        """Return the samples to send to the builder.
+
+        Args:
+            user_query: The user query; its keywords drive keyword coverage.
+            samples: Candidate samples, typically `BuildInput.samples`.
+
+        Returns:
+            The selected samples, in their original order.
+        """
+        if not samples:
+            return []
+        # Read every sample once: contents of handle-based samples are read
+        # from the block store, one load per block
+        contents = sample_contents(samples)
+        scores = self.score(user_query, samples, contents)
+        token_counts = [self.count_tokens(content) for content in contents]
+        selected, used_tokens = self.select(scores, token_counts)
+        self.logger.info(
+            "Packed %d/%d samples into %d/%d tokens (%d tokens dropped)",
+            len(selected),
+            len(samples),
+            used_tokens,
+            self.token_budget,
+            sum(token_counts) - used_tokens,
+        )
+        return [samples[i] for i in selected]
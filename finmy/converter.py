@@ -21,16 +21,15 @@ from __future__ import annotations
 
 import uuid
 from typing import Optional, List
-import time
-import random
-import os
 from dotenv import load_dotenv
 
-from lmbase.utils.tools import BlockBasedStoreManager
+from finmy.block_store import get_block_store
 from finmy.generic import RawData, MetaSample, UserQueryInput, DataSample
+from finmy.document import DocumentHandle, parse_location, span_location
 from finmy.builder.base import BuildInput
 from finmy.matcher.base import MatchOutput, MatchInput
 from finmy.summarizer.summarizer import SummarizedUserQuery
+from finmy.metrics import record_bytes_read, record_bytes_written
 
 
 load_dotenv()
@@ -38,7 +37,11 @@ load_dotenv()
 
 def write_text_data_to_block(text: str) -> str:
     """
-    Store the given text in a block-based persistent store using a unique key.
+    Store the given text in the block store of DATA_DIR using a unique key.
+
+    The record is buffered by the process-wide store (see
+    `finmy.block_store`) and persisted when its block is full or the store
+    is flushed.
 
     Args:
         text: The string content to be stored.
@@ -49,47 +52,83 @@ def write_text_data_to_block(text: str) -> str:
     Raises:
         ValueError: If the DATA_DIR environment variable is not set.
     """
-
-    data_dir = os.environ.get("DATA_DIR")
-    if not data_dir:
-        raise ValueError("Environment variable 'DATA_DIR' is not set")
-    if not os.path.isdir(data_dir):
-        os.makedirs(data_dir, exist_ok=True)
-    bbsm = BlockBasedStoreManager(
-        folder=os.environ["DATA_DIR"], file_format="json", block_size=1000
-    )
-    # Generate a unique filename using UUID
-
-    file_key = f"text_{int(time.time()*1e6)}{random.randint(1000, 9999)}"
-
-    bbsm.save(savename=file_key, data={"text": text})
+    file_key = get_block_store().write(text)
+    record_bytes_written(len(text.encode("utf-8")))
     return file_key
 
 
 def read_text_data_from_block(filekey: str) -> str:
     """
-    Read text content from a file in the directory specified by the DATA_DIR environment variable,
-    using the given file key as the record identifier.
+    Read text content from the block store of the directory specified by the
+    DATA_DIR environment variable, using the given file key as the record
+    identifier.
 
     Args:
-        filekey: The unique file key representing the stored record.
+        filekey: The unique file key representing the stored record, or the
+            location of a span of it (see `finmy.document.span_location`).
 
     Returns:
         The loaded text content associated with the file key.
 
     Raises:
-        ValueError: If the DATA_DIR environment variable is not set or the directory does not exist.
+        ValueError: If the DATA_DIR environment variable is not set.
+        RuntimeError: If the record cannot be loaded.
     """
-
-    bbsm = BlockBasedStoreManager(
-        folder=os.environ["DATA_DIR"], file_format="json", block_size=1000
-    )
+    store = get_block_store()
     try:
-        return bbsm.load(filekey)["text"]
+        text = store.read_spans([parse_location(filekey)])[0]
     except Exception as e:
         raise RuntimeError(
             f"Error loading text data from block for filekey '{filekey}': {e}"
         )
+    record_bytes_read(len(text.encode("utf-8")))
+    return text
+
+
+def write_text_data_to_block_many(texts: List[str]) -> List[str]:
+    """
+    Store many texts in the block store of DATA_DIR.
+
+    The texts are added under one lock acquisition and every block is
+    serialized once, when it is full or the store is flushed.
+
+    Args:
+        texts: The string contents to be stored.
+
+    Returns:
+        The file keys of the stored records, in the order of `texts`.
+
+    Raises:
+        ValueError: If the DATA_DIR environment variable is not set.
+    """
+    file_keys = get_block_store().write_many(texts)
+    record_bytes_written(sum(len(text.encode("utf-8")) for text in texts))
+    return file_keys
+
+
+def read_text_data_from_block_many(filekeys: List[str]) -> List[str]:
+    """
+    Read many records from the block store of DATA_DIR, loading every block
+    once.
+
+    Args:
+        filekeys: The file keys of the records, or locations of spans of
+            them (see `BlockStore.read_spans`).
+
+    Returns:
+        The text contents of the records, in the order of `filekeys`.
+
+    Raises:
+        ValueError: If the DATA_DIR environment variable is not set.
+        RuntimeError: If a record cannot be loaded.
+    """
+    store = get_block_store()
+    try:
+        texts = store.read_spans([parse_location(filekey) for filekey in filekeys])
+    except Exception as e:
+        raise RuntimeError(f"Error loading text data from blocks: {e}")
+    record_bytes_read(sum(len(text.encode("utf-8")) for text in texts))
+    return texts
 
 
 def match_output_to_meta_samples(
@@ -105,6 +144,12 @@ def match_output_to_meta_samples(
     and creates a corresponding `MetaSample` record. The `MetaSample` represents
     a processed sample derived from the raw data, typically after matching.
 
+    Items located in the raw data text (`MatchItem.start`/`end`, and the
+    stored text at those offsets is the paragraph) reference their span of
+    the raw data record (``<location>#<start>:<end>``, see
+    `finmy.document.span_location`) and are not copied; the other paragraphs
+    are written to new block records.
+
     Args:
         match_output: The `MatchOutput` containing matched items and raw data metadata.
         category: Optional high-level category label for the sample.
@@ -122,25 +167,91 @@ def match_output_to_meta_samples(
     """
     meta_samples: List[MetaSample] = []
 
-    for matched_item in match_output.items:
-        file_key = write_text_data_to_block(matched_item.paragraph)
+    # Offsets are character positions in the text of `raw_data.location`
+    located = [
+        bool(raw_data.location)
+        and item.start is not None
+        and item.end is not None
+        and item.end - item.start == len(item.paragraph)
+        for item in match_output.items
+    ]
+    if any(located):
+        try:
+            raw_text = read_text_data_from_block(raw_data.location)
+        except RuntimeError:
+            # Offsets into a record that cannot be read are not trusted
+            raw_text = None
+        located = [
+            is_located
+            and raw_text is not None
+            and raw_text[item.start : item.end] == item.paragraph
+            for item, is_located in zip(match_output.items, located)
+        ]
+    copied = [
+        item.paragraph
+        for item, is_located in zip(match_output.items, located)
+        if not is_located
+    ]
+    copied_keys = iter(write_text_data_to_block_many(copied) if copied else [])
+    for matched_item, is_located in zip(match_output.items, located):
+        if is_located:
+            location = span_location(
+                raw_data.location, matched_item.start, matched_item.end
+            )
+        else:
+            location = next(copied_keys)
         meta_samples.append(
             MetaSample(
                 sample_id=str(uuid.uuid4()),
                 raw_data_id=raw_data.raw_data_id,
-                location=file_key,
+                location=location,
                 time=raw_data.time,
                 category=category,
                 knowledge_field=knowledge_field,
                 tag=raw_data.tag,
                 method=raw_data.method or match_output.method,
                 reviews=[],
+                score=matched_item.extras.get("score"),
             )
         )
 
     return meta_samples
 
 
+def raw_data_to_meta_samples(
+    raw_data: RawData,
+    category: Optional[str] = None,
+    knowledge_field: Optional[str] = None,
+) -> List[MetaSample]:
+    """
+    Turn a whole `RawData` into a `MetaSample` without matching.
+
+    The sample references the block of the raw data, so its content is
+    neither read nor copied to a new block.
+
+    Args:
+        raw_data: The raw data record covered by the sample.
+        category: Optional high-level category label for the sample.
+        knowledge_field: Optional primary knowledge domain (e.g., "AI", "Finance").
+
+    Returns:
+        A list holding the `MetaSample` of the raw data.
+    """
+    return [
+        MetaSample(
+            sample_id=str(uuid.uuid4()),
+            raw_data_id=raw_data.raw_data_id,
+            location=raw_data.location,
+            time=raw_data.time,
+            category=category,
+            knowledge_field=knowledge_field,
+            tag=raw_data.tag,
+            method=raw_data.method,
+            reviews=[],
+        )
+    ]
+
+
 def raw_data_and_summarized_query_to_match_input(
     raw_data: RawData, summarized_query: SummarizedUserQuery
 ) -> MatchInput:
@@ -169,6 +280,10 @@ def convert_to_build_input(
     """
     Construct a BuildInput object for use with event reconstruction builders.
 
+    The samples reference their stored content, or its span of the raw data
+    record, through a `DocumentHandle`; the text is read when a consumer
+    accesses `DataSample.content`.
+
     Args:
         user_query: UserQueryInput instance describing the user query.
         meta_samples: List of MetaSample objects to be included.
@@ -185,11 +300,13 @@ def convert_to_build_input(
             DataSample(
                 sample_id=meta_sample.sample_id,
                 raw_data_id=meta_sample.raw_data_id,
-                content=read_text_data_from_block(meta_sample.location),
+                handle=DocumentHandle.from_location(meta_sample.location),
                 category=meta_sample.category,
                 knowledge_field=meta_sample.knowledge_field,
                 tag=meta_sample.tag,
                 method=meta_sample.method,
+                time=meta_sample.time,
+                score=meta_sample.score,
             )
         )
     return BuildInput(user_query=user_query, samples=data_samples)
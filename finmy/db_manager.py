@@ -14,12 +14,14 @@ keeping the rest of the codebase focused on domain logic.
 """
 
 import uuid
+import asyncio
 from typing import Optional, Any, Dict, List
 
 import pandas as pd
 from sqlalchemy import create_engine, text
 
 from finmy.generic import RawData, MetaSample, UserQueryInput
+from finmy.metrics import record_db_rows
 
 
 class PDDataBaseManager:
@@ -179,6 +181,7 @@ class PDDataBaseManager:
             index=index,
             **kwargs,
         )
+        record_db_rows(len(df))
 
 
 class DataManager(PDDataBaseManager):
@@ -333,6 +336,24 @@ class DataManager(PDDataBaseManager):
         )
         return record
 
+    # Async writes ---------------------------------------------------------
+    #
+    # The engine is synchronous (no async MySQL driver is installed), so the
+    # writes run in a worker thread of the event loop's default executor and
+    # the pooled connections are shared with the synchronous methods.
+
+    async def ainsert_raw_data_batch(self, raws: List[RawData]) -> dict:
+        """Asynchronous `insert_raw_data_batch`."""
+        return await asyncio.to_thread(self.insert_raw_data_batch, raws)
+
+    async def ainsert_meta_samples(self, samples: List[MetaSample]) -> list:
+        """Asynchronous `insert_meta_samples`."""
+        return await asyncio.to_thread(self.insert_meta_samples, samples)
+
+    async def ainsert_user_query(self, uq: UserQueryInput) -> dict:
+        """Asynchronous `insert_user_query`."""
+        return await asyncio.to_thread(self.insert_user_query, uq)
+
     # Simple query helpers -------------------------------------------------
 
     def fetch_raw_data_by_id(self, raw_data_id: str) -> pd.DataFrame:
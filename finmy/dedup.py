@@ -0,0 +1,347 @@
+"""
+Content-hash deduplication of raw documents at ingestion.
+
+The same article often reaches the pipeline several times, e.g. from Bocha,
+Baidu and a user-supplied URL list. `ContentDeduplicator` fingerprints the
+normalized content of every ingested document so that:
+
+- exact duplicates reuse the `RawData` record (and its block) created for the
+  first copy instead of writing a new block and a new database row;
+- near duplicates (optional) are detected with a 64-bit SimHash and resolved
+  to the same record when their Hamming distance is within a threshold;
+- matching results are cached per (raw data, summarized query) so a document
+  already matched against the same query is not sent to the matcher again.
+
+The fingerprint index is a SQLite database (WAL mode) shared by all runs of
+one `FinmyPipeline` instance (including `run_batch` jobs) and, when it is a
+file, by every process using the same file: it maps content fingerprints and
+SimHash bands to the canonical `RawData` and records the raw data and meta
+samples written to the database. A record registered by another process is
+only reused once that process has stored it, so its block and database row
+exist. The match cache stays in memory and keeps the ``max_cached_matches``
+most recently used entries. All methods are thread-safe.
+"""
+
+import re
+import json
+import uuid
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import dataclasses
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from finmy.generic import RawData, MetaSample
+
+
+# Number of bits of the SimHash fingerprint
+SIMHASH_BITS = 64
+# The fingerprint is split into this many bands for candidate lookup; two
+# fingerprints within `SIMHASH_BANDS - 1` bits share at least one band.
+SIMHASH_BANDS = 4
+
+# Identifiers per query, below SQLite's limit of bound variables
+LOOKUP_BATCH = 500
+DEFAULT_MAX_CACHED_MATCHES = 10000
+
+_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before fingerprinting.
+
+    Applies NFKC normalization, lowercasing and whitespace collapsing so that
+    formatting differences between sources do not change the fingerprint.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.lower().split())
+
+
+def content_fingerprint(text: str) -> str:
+    """Return the SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str, bits: int = SIMHASH_BITS) -> int:
+    """Compute the SimHash of a text.
+
+    Features are word bigrams for latin text and character bigrams for
+    Chinese, each weighted by its frequency.
+    """
+    tokens = _TOKEN_PATTERN.findall(normalize_text(text))
+    if len(tokens) > 1:
+        features = [a + " " + b for a, b in zip(tokens, tokens[1:])]
+    else:
+        features = tokens
+    weights = [0] * bits
+    for feature in features:
+        digest = hashlib.blake2b(
+            feature.encode("utf-8"), digest_size=bits // 8
+        ).digest()
+        value = int.from_bytes(digest, "big")
+        for i in range(bits):
+            weights[i] += 1 if (value >> i) & 1 else -1
+    fingerprint = 0
+    for i, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+class ContentDeduplicator:
+    """Fingerprint index of ingested raw documents.
+
+    Args:
+        near_duplicate: Whether near duplicates are resolved via SimHash.
+        simhash_threshold: Maximum Hamming distance between the SimHash of two
+            near-duplicate documents. Must be smaller than `SIMHASH_BANDS`.
+        index_path: SQLite file of the index, shared across processes; None
+            keeps the index in memory for this instance only.
+        max_cached_matches: Maximum number of (raw data, query) entries of
+            the match cache.
+    """
+
+    def __init__(
+        self,
+        near_duplicate: bool = False,
+        simhash_threshold: int = 3,
+        index_path: Optional[str] = None,
+        max_cached_matches: int = DEFAULT_MAX_CACHED_MATCHES,
+    ):
+        if simhash_threshold >= SIMHASH_BANDS:
+            raise ValueError(
+                f"simhash_threshold must be smaller than {SIMHASH_BANDS}, "
+                f"got {simhash_threshold}"
+            )
+        self.near_duplicate = near_duplicate
+        self.simhash_threshold = simhash_threshold
+        self.index_path = index_path
+        self.max_cached_matches = max_cached_matches
+        # Rows registered by this instance are visible to it before they are
+        # stored
+        self.writer_id = uuid.uuid4().hex
+
+        self._lock = threading.Lock()
+        # (raw_data_id, query signature) -> meta samples, least recent first
+        self._matches: "OrderedDict[Tuple[str, str], List[MetaSample]]" = (
+            OrderedDict()
+        )
+        self._conn = self._connect(index_path or ":memory:")
+
+        # Counters reported in the logs
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.match_hits = 0
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        bands = "".join(f"band{i} INTEGER, " for i in range(SIMHASH_BANDS))
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS raw_data (
+                fingerprint TEXT NOT NULL,
+                writer TEXT NOT NULL,
+                raw_data_id TEXT NOT NULL,
+                record TEXT NOT NULL,
+                simhash TEXT,
+                {bands}stored INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (fingerprint, writer)
+            )
+            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS raw_data_id ON raw_data (raw_data_id)"
+        )
+        for i in range(SIMHASH_BANDS):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS raw_data_band{i} ON raw_data (band{i})"
+            )
+        for table, column in (
+            ("stored_raw_data", "raw_data_id"),
+            ("stored_meta_samples", "sample_id"),
+        ):
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                f"({column} TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+        return conn
+
+    @staticmethod
+    def _band_keys(fingerprint: int) -> List[Tuple[int, int]]:
+        width = SIMHASH_BITS // SIMHASH_BANDS
+        mask = (1 << width) - 1
+        return [(i, (fingerprint >> (i * width)) & mask) for i in range(SIMHASH_BANDS)]
+
+    def _canonical(self, fingerprint: str) -> Optional[RawData]:
+        """Return the canonical record of `fingerprint` visible to this
+        instance; the caller holds the lock."""
+        row = self._conn.execute(
+            "SELECT record FROM raw_data WHERE fingerprint = ? "
+            "AND (stored = 1 OR writer = ?) ORDER BY stored DESC LIMIT 1",
+            (fingerprint, self.writer_id),
+        ).fetchone()
+        return RawData(**json.loads(row[0])) if row is not None else None
+
+    def lookup(self, text: str) -> Optional[RawData]:
+        """Return the canonical raw data of a duplicate of `text`, if any."""
+        fingerprint = content_fingerprint(text)
+        with self._lock:
+            raw_data = self._canonical(fingerprint)
+            if raw_data is not None:
+                self.exact_hits += 1
+                return raw_data
+        if not self.near_duplicate:
+            return None
+        text_simhash = simhash(text)
+        condition = " OR ".join(f"band{i} = ?" for i in range(SIMHASH_BANDS))
+        with self._lock:
+            for candidate, record in self._conn.execute(
+                "SELECT simhash, record FROM raw_data "
+                f"WHERE ({condition}) AND (stored = 1 OR writer = ?)",
+                [value for _, value in self._band_keys(text_simhash)]
+                + [self.writer_id],
+            ):
+                if (
+                    hamming_distance(int(candidate, 16), text_simhash)
+                    <= self.simhash_threshold
+                ):
+                    self.near_hits += 1
+                    return RawData(**json.loads(record))
+        return None
+
+    def register(self, text: str, raw_data: RawData) -> RawData:
+        """Index `raw_data` as the canonical record of `text`.
+
+        Returns:
+            The canonical record; when another thread registered the same
+            content first, or another process stored it, that record is
+            returned instead of `raw_data`.
+        """
+        fingerprint = content_fingerprint(text)
+        text_simhash = simhash(text) if self.near_duplicate else None
+        bands = (
+            [value for _, value in self._band_keys(text_simhash)]
+            if text_simhash is not None
+            else [None] * SIMHASH_BANDS
+        )
+        with self._lock:
+            existing = self._canonical(fingerprint)
+            if existing is not None:
+                return existing
+            self._conn.execute(
+                "INSERT INTO raw_data (fingerprint, writer, raw_data_id, record, "
+                f"simhash, {', '.join(f'band{i}' for i in range(SIMHASH_BANDS))}) "
+                f"VALUES ({', '.join('?' * (5 + SIMHASH_BANDS))})",
+                [
+                    fingerprint,
+                    self.writer_id,
+                    raw_data.raw_data_id,
+                    json.dumps(dataclasses.asdict(raw_data), ensure_ascii=False),
+                    f"{text_simhash:x}" if text_simhash is not None else None,
+                ]
+                + bands,
+            )
+        return raw_data
+
+    def get_matches(
+        self, raw_data_id: str, query_signature: str
+    ) -> Optional[List[MetaSample]]:
+        """Return the cached meta samples of a raw data / query pair."""
+        with self._lock:
+            meta_samples = self._matches.get((raw_data_id, query_signature))
+            if meta_samples is not None:
+                self._matches.move_to_end((raw_data_id, query_signature))
+                self.match_hits += 1
+            return meta_samples
+
+    def put_matches(
+        self, raw_data_id: str, query_signature: str, meta_samples: List[MetaSample]
+    ) -> None:
+        """Cache the meta samples of a raw data / query pair, evicting the
+        least recently used entries beyond ``max_cached_matches``."""
+        with self._lock:
+            self._matches[(raw_data_id, query_signature)] = list(meta_samples)
+            self._matches.move_to_end((raw_data_id, query_signature))
+            while len(self._matches) > self.max_cached_matches:
+                self._matches.popitem(last=False)
+
+    def _stored_ids(self, table: str, column: str, ids: List[str]) -> set:
+        """Return the identifiers among `ids` recorded in `table`."""
+        stored = set()
+        with self._lock:
+            for start in range(0, len(ids), LOOKUP_BATCH):
+                batch = ids[start : start + LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                stored.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT {column} FROM {table} "
+                        f"WHERE {column} IN ({placeholders})",
+                        batch,
+                    )
+                )
+        return stored
+
+    def _mark_stored(self, table: str, column: str, ids: List[str]) -> None:
+        """Record `ids` in `table`, and stored raw data as visible to other
+        processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)",
+                    [(i,) for i in ids],
+                )
+                if table == "stored_raw_data":
+                    self._conn.executemany(
+                        "UPDATE raw_data SET stored = 1 "
+                        "WHERE raw_data_id = ? AND writer = ?",
+                        [(i, self.writer_id) for i in ids],
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def unstored_raw_data(self, raw_data_records: Iterable[RawData]) -> List[RawData]:
+        """Filter out raw data already written to the database."""
+        raw_data_records = list(raw_data_records)
+        stored = self._stored_ids(
+            "stored_raw_data",
+            "raw_data_id",
+            [raw_data.raw_data_id for raw_data in raw_data_records],
+        )
+        return [r for r in raw_data_records if r.raw_data_id not in stored]
+
+    def mark_raw_data_stored(self, raw_data_records: Iterable[RawData]) -> None:
+        """Record raw data as written to the database."""
+        self._mark_stored(
+            "stored_raw_data", "raw_data_id", [r.raw_data_id for r in raw_data_records]
+        )
+
+    def unstored_meta_samples(
+        self, meta_samples: Iterable[MetaSample]
+    ) -> List[MetaSample]:
+        """Filter out meta samples already written to the database."""
+        meta_samples = list(meta_samples)
+        stored = self._stored_ids(
+            "stored_meta_samples",
+            "sample_id",
+            [meta_sample.sample_id for meta_sample in meta_samples],
+        )
+        return [m for m in meta_samples if m.sample_id not in stored]
+
+    def mark_meta_samples_stored(self, meta_samples: Iterable[MetaSample]) -> None:
+        """Record meta samples as written to the database."""
+        self._mark_stored(
+            "stored_meta_samples", "sample_id", [m.sample_id for m in meta_samples]
+        )
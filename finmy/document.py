@@ -0,0 +1,146 @@
+"""
+Lazy handles on stored document text.
+
+A `DocumentHandle` references the text of a block record (`location`), or a
+character span of it, and reads the text only when `text` is called. Samples
+carry handles instead of their text (`DataSample.handle`), so a corpus is not
+held in memory once per pipeline step: the text of a sample exists only while
+a consumer (context packer, builder) uses it, and the builder joins the
+sample texts once per build (`BuildInput.content_text`).
+
+The text is read from the block store on every `text` call; no copy is kept
+by the handle itself. Spans of records of the segment backend are sliced from
+the memory-mapped segment (`BlockStore.read_spans`), while records in JSON
+blocks are decoded whole and sliced. `read_texts` reads many handles with one
+load per block.
+
+A stored location may reference a span of a record as
+``<location>#<start>:<end>`` (`span_location`): meta samples of matched
+paragraphs point into the record of their raw data instead of copying the
+paragraph to a new record. `parse_location` splits such a location and
+`DocumentHandle.from_location` turns it into a handle.
+"""
+
+import re
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from finmy.generic import DataSample
+
+
+SPAN_SEPARATOR = "#"
+# Span suffix of a location: ``<start>:<end>``, with an optional end
+_SPAN_PATTERN = re.compile(r"^(\d+):(\d*)$")
+
+
+def parse_location(location: str) -> Tuple[str, int, Optional[int]]:
+    """Split a location into its record key and span offsets.
+
+    Only a suffix ``#<start>:<end>`` of digits is a span, so keys or paths
+    that contain ``#`` otherwise are whole records.
+
+    Returns:
+        ``(key, start, end)``; ``(location, 0, None)`` for a whole record.
+    """
+    key, sep, span = location.rpartition(SPAN_SEPARATOR)
+    match = _SPAN_PATTERN.match(span) if sep else None
+    if match is None:
+        return location, 0, None
+    start, end = match.groups()
+    return key, int(start), int(end) if end else None
+
+
+class DocumentHandle:
+    """Reference to the text of a block record, or to a span of it.
+
+    Args:
+        location: Block key of the record (see
+            `finmy.converter.write_text_data_to_block`).
+        start: Character offset of the span in the record text.
+        end: End offset of the span; None for the end of the text.
+    """
+
+    __slots__ = ("location", "start", "end")
+
+    def __init__(self, location: str, start: int = 0, end: Optional[int] = None):
+        self.location = location
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_location(cls, location: str) -> "DocumentHandle":
+        """Return a handle on a stored location, whole record or span."""
+        return cls(*parse_location(location))
+
+    def to_location(self) -> str:
+        """Return the stored location of the handle (see `parse_location`)."""
+        if self.start == 0 and self.end is None:
+            return self.location
+        end = "" if self.end is None else self.end
+        return f"{self.location}{SPAN_SEPARATOR}{self.start}:{end}"
+
+    def text(self) -> str:
+        """Read the referenced text from the block store."""
+        # Imported here: the converter imports the data models using handles
+        from finmy.converter import read_text_data_from_block
+
+        return read_text_data_from_block(self.to_location())
+
+    def span(self, start: int, end: Optional[int] = None) -> "DocumentHandle":
+        """Return a handle on the span `start:end` of this handle's text."""
+        absolute_end = None if end is None else self.start + end
+        if self.end is not None:
+            absolute_end = (
+                self.end if absolute_end is None else min(absolute_end, self.end)
+            )
+        return DocumentHandle(self.location, self.start + start, absolute_end)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DocumentHandle):
+            return NotImplemented
+        return (self.location, self.start, self.end) == (
+            other.location,
+            other.start,
+            other.end,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.location, self.start, self.end))
+
+    def __getstate__(self):
+        return (self.location, self.start, self.end)
+
+    def __setstate__(self, state):
+        self.location, self.start, self.end = state
+
+    def __repr__(self) -> str:
+        return f"DocumentHandle({self.location!r}, {self.start}, {self.end})"
+
+
+def span_location(location: str, start: int, end: Optional[int] = None) -> str:
+    """Return the location of the span `start:end` of the text at `location`,
+    which may itself be a span."""
+    return DocumentHandle.from_location(location).span(start, end).to_location()
+
+
+def read_texts(handles: List[DocumentHandle]) -> List[str]:
+    """Read the texts of `handles`, in order, loading every block once."""
+    from finmy.converter import read_text_data_from_block_many
+
+    return read_text_data_from_block_many([h.to_location() for h in handles])
+
+
+def sample_contents(samples: List["DataSample"]) -> List[str]:
+    """Return the contents of `samples`, in order; the contents read from
+    handles are read together (see `read_texts`)."""
+    contents = [sample._content for sample in samples]
+    lazy = [
+        i
+        for i, sample in enumerate(samples)
+        if contents[i] is None and sample.handle is not None
+    ]
+    if lazy:
+        texts = read_texts([samples[i].handle for i in lazy])
+        for i, text in zip(lazy, texts):
+            contents[i] = text
+    return contents
@@ -3,7 +3,10 @@ Generic variables used across the whole project.
 """
 
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
+
+if TYPE_CHECKING:
+    from finmy.document import DocumentHandle
 
 
 @dataclass
@@ -62,7 +65,8 @@ class MetaSample:
     Fields:
     - `sample_id`: identifier of the sample; typically aligned to `raw_data_id`
     - `raw_data_id`: the UUID from `RawData` that this sample originates from
-    - `location`: storage URI of the sample content (same as `RawData.location`)
+    - `location`: storage URI of the sample content (same as `RawData.location`,
+      or `<RawData.location>#<start>:<end>` for a span of it)
     - `time`: ISO 8601 timestamp of the sample (same as `RawData.time`)
     - `category`: high-level category label of the sample (user-defined)
       Example: `NULL` or a domain grouping
@@ -74,6 +78,7 @@ class MetaSample:
       `{ "reviewer_name": str, "review_time": ISO8601 str, "comment": str }`
       where `comment` ∈ { `Pending`, `Approved`, `Rejected` } and `review_time`
       follows ISO 8601 (e.g., `2024-05-21 14:30:00 UTC`).
+    - `score`: relevance score (0-1) reported by the matcher, if any
     """
 
     sample_id: str
@@ -85,16 +90,18 @@ class MetaSample:
     tag: Optional[str] = None
     method: Optional[str] = None
     reviews: List[Dict[str, str]] = field(default_factory=list)
+    score: Optional[float] = None
 
 
-@dataclass
+@dataclass(init=False)
 class DataSample:
     """Data sample descriptor
 
     Fields:
     - `sample_id`: identifier of the sample; typically aligned to `raw_data_id`
     - `raw_data_id`: the UUID from `RawData` that this sample originates from
-    - `content`: content of the sample
+    - `content`: content of the sample; read from `handle` on every access
+      when the sample was created with a handle instead of its text
     - `category`: high-level category label of the sample (user-defined)
     - `knowledge_field`: primary knowledge domain (second-level category)
     - `tag`: inherited tag from `RawData.tag`
@@ -103,12 +110,58 @@ class DataSample:
       `{ "reviewer_name": str, "review_time": ISO8601 str, "comment": str }`
       where `comment` ∈ { `Pending`, `Approved`, `Rejected` } and `review_time`
       follows ISO 8601 (e.g., `2024-05-21 14:30:00 UTC`).
+    - `time`: inherited timestamp from `MetaSample.time`
+    - `score`: inherited matcher score from `MetaSample.score`
+    - `handle`: `DocumentHandle` on the stored content, read lazily
+
+    `content` is a property: the dataclass fields hold the text given to the
+    sample (`_content`, None for samples created from a handle) and the
+    handle, so repr, comparison and `dataclasses.asdict` never read the
+    store.
     """
 
     sample_id: str
     raw_data_id: str
-    content: str
     category: Optional[str] = None
     knowledge_field: Optional[str] = None
     tag: Optional[str] = None
     method: Optional[str] = None
+    time: Optional[str] = None
+    score: Optional[float] = None
+    handle: Optional["DocumentHandle"] = None
+    _content: Optional[str] = field(default=None, repr=False)
+
+    def __init__(
+        self,
+        sample_id: str,
+        raw_data_id: str,
+        content: Optional[str] = None,
+        category: Optional[str] = None,
+        knowledge_field: Optional[str] = None,
+        tag: Optional[str] = None,
+        method: Optional[str] = None,
+        time: Optional[str] = None,
+        score: Optional[float] = None,
+        handle: Optional["DocumentHandle"] = None,
+    ):
+        self.sample_id = sample_id
+        self.raw_data_id = raw_data_id
+        self.category = category
+        self.knowledge_field = knowledge_field
+        self.tag = tag
+        self.method = method
+        self.time = time
+        self.score = score
+        self.handle = handle
+        self._content = content
+
+    @property
+    def content(self) -> Optional[str]:
+        # Samples created from a handle do not hold their text: it is read on access
+        if self._content is None and self.handle is not None:
+            return self.handle.text()
+        return self._content
+
+    @content.setter
+    def content(self, value: Optional[str]) -> None:
+        self._content = value
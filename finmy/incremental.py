@@ -0,0 +1,129 @@
+"""
+Records of past builds, keyed by user query ID, for incremental rebuilds.
+
+After every build the pipeline records which raw data were matched, which
+meta samples were sent to the builder and where the builder saved its agent
+results (`QueryRunRecord`). When new sources are added to the query,
+`FinmyPipeline.lm_build_pipeline_incremental`:
+
+1. collects and matches only the raw data not in the record, compared by
+   raw data ID and by content fingerprint (`finmy.dedup.content_fingerprint`),
+   so re-submitted sources collected under new IDs are not matched again;
+2. diffs the resulting meta samples against the recorded ones
+   (`diff_meta_samples`);
+3. calls `BaseBuilder.rebuild`, which re-runs only the builder agents whose
+   inputs changed (for `AgentEventBuilder`: the affected episodes, their stage
+   descriptions and the event description) and reuses the other results.
+
+Records are JSON files ``<record_dir>/<user_query_id>.json``, replaced
+atomically.
+"""
+
+import os
+import json
+import time
+import uuid
+import dataclasses
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from finmy.generic import MetaSample
+
+
+@dataclass
+class QueryRunRecord:
+    """Last build of a user query.
+
+    Fields:
+    - `user_query_id`: ID of the `UserQueryInput`
+    - `query_text` / `key_words`: the query
+    - `raw_data_ids`: raw data already matched against the query
+    - `content_fingerprints`: content fingerprints of those raw data
+    - `meta_samples`: meta samples of the build
+    - `builder_type`: builder of the build
+    - `save_dir`: save directory of the builder's agent results
+    - `updated_at`: POSIX time of the build
+    """
+
+    user_query_id: str
+    query_text: Optional[str]
+    key_words: List[str]
+    raw_data_ids: List[str] = field(default_factory=list)
+    content_fingerprints: List[str] = field(default_factory=list)
+    meta_samples: List[MetaSample] = field(default_factory=list)
+    builder_type: Optional[str] = None
+    save_dir: Optional[str] = None
+    updated_at: float = 0.0
+
+
+@dataclass
+class MetaSampleDiff:
+    """Difference between the meta samples of a new build and a recorded one.
+
+    Fields:
+    - `added`: samples of raw data that were not part of the recorded build
+    - `unchanged`: recorded samples kept as they are
+    """
+
+    added: List[MetaSample] = field(default_factory=list)
+    unchanged: List[MetaSample] = field(default_factory=list)
+
+    @property
+    def samples(self) -> List[MetaSample]:
+        """All samples of the new build, recorded ones first."""
+        return self.unchanged + self.added
+
+
+def diff_meta_samples(
+    previous: List[MetaSample], current: List[MetaSample]
+) -> MetaSampleDiff:
+    """Diff newly matched meta samples against the recorded ones.
+
+    A raw data record is matched once per query, so new samples of raw data
+    that already produced recorded samples (e.g. duplicates resolved by the
+    deduplicator) are dropped.
+    """
+    known_raw_ids = {sample.raw_data_id for sample in previous}
+    return MetaSampleDiff(
+        added=[s for s in current if s.raw_data_id not in known_raw_ids],
+        unchanged=list(previous),
+    )
+
+
+class QueryRunStore:
+    """JSON store of `QueryRunRecord`, one file per user query.
+
+    Args:
+        record_dir: Folder of the record files.
+    """
+
+    def __init__(self, record_dir: str):
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def _path(self, user_query_id: str) -> str:
+        return os.path.join(self.record_dir, f"{user_query_id}.json")
+
+    def load(self, user_query_id: str) -> Optional[QueryRunRecord]:
+        """Return the record of `user_query_id`, or None when there is none."""
+        path = self._path(user_query_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["meta_samples"] = [MetaSample(**s) for s in data["meta_samples"]]
+        return QueryRunRecord(**data)
+
+    def save(self, record: QueryRunRecord) -> str:
+        """Write `record`, replacing the previous record of its query.
+
+        Returns:
+            The path of the record file.
+        """
+        record.updated_at = time.time()
+        path = self._path(record.user_query_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dataclasses.asdict(record), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
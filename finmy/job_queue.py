@@ -0,0 +1,889 @@
+"""
+Broker-less job queue for running pipeline jobs on several workers.
+
+Jobs (`PipelineJob`) are enqueued once and executed by any number of worker
+processes, on one box or on several boxes sharing a filesystem:
+
+- `lease`: a worker takes the oldest available job for ``lease_seconds``;
+- `heartbeat`: the worker extends its lease while the job is running;
+- `complete` / `fail`: the worker reports the outcome. A failed job is made
+  available again after ``retry_delay`` seconds until it has been tried
+  ``max_attempts`` times;
+- a lease that was not extended in time (crashed or stuck worker) counts as a
+  failed attempt, and its job is re-leased by the next `lease` call.
+
+Two backends implement these semantics:
+
+- `SQLiteJobQueue`: one SQLite database (WAL mode). Recommended for workers on
+  one box; SQLite locking is not reliable on network filesystems.
+- `FileJobQueue`: one directory per job state, where every state transition is
+  an atomic `os.rename`. Works on shared filesystems (e.g. NFS) across boxes.
+  Lease deadlines use wall-clock time, so the clocks of the boxes must be
+  synchronized.
+
+Workers run `FinmyPipeline.run_job`, which dispatches to
+`lm_build_pipeline_main` (jobs with ``data_sources``) or
+`lm_build_pipeline_with_contents` (jobs with ``contents``).
+
+Usage:
+    python -m finmy.job_queue enqueue -c configs/pipline.yml --query "..." --sources URL ...
+    python -m finmy.job_queue worker -c configs/pipline.yml
+    python -m finmy.job_queue status -c configs/pipline.yml
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+import dataclasses
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+from finmy.pipeline import FinmyPipeline, PipelineJob
+from finmy.sqlite_cache import sqlite_transaction
+
+
+@dataclass
+class JobLease:
+    """A job leased by a worker.
+
+    Fields:
+    - `job_id`: identifier of the job
+    - `job`: the job to execute
+    - `attempt`: 1-based number of this execution attempt
+    - `worker_id`: identifier of the worker holding the lease
+    - `token`: identifier of this lease; a re-leased job gets a new token
+    - `expires_at`: wall-clock time (seconds since the epoch) the lease expires
+    """
+
+    job_id: str
+    job: PipelineJob
+    attempt: int
+    worker_id: str
+    token: str
+    expires_at: float
+
+
+@dataclass
+class JobRecord:
+    """Snapshot of a queued job.
+
+    Fields:
+    - `job_id`: identifier of the job
+    - `state`: one of "pending", "leased", "done", "failed"
+    - `job`: the job
+    - `attempts`: number of finished (completed, failed or expired) attempts
+    - `max_attempts`: number of attempts before the job is marked failed
+    - `error`: error of the last failed attempt
+    - `result`: result reported by `complete`
+    """
+
+    job_id: str
+    state: str
+    job: PipelineJob
+    attempts: int = 0
+    max_attempts: int = 3
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+class BaseJobQueue(ABC):
+    """Abstract job queue with lease, heartbeat and retry semantics.
+
+    Args:
+        lease_seconds: Duration of a lease; workers must heartbeat before it
+            expires.
+        max_attempts: Default number of attempts of a job before it is marked
+            failed.
+        retry_delay: Seconds before a failed job becomes available again.
+    """
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+    STATES = (PENDING, LEASED, DONE, FAILED)
+
+    def __init__(
+        self,
+        lease_seconds: float = 600.0,
+        max_attempts: int = 3,
+        retry_delay: float = 0.0,
+    ):
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = int(max_attempts)
+        self.retry_delay = float(retry_delay)
+
+    @staticmethod
+    def _prepare_job(job) -> PipelineJob:
+        job = PipelineJob(**job) if isinstance(job, dict) else job
+        if job.job_id is None:
+            job.job_id = str(uuid.uuid4())
+        return job
+
+    @abstractmethod
+    def enqueue(self, job, max_attempts: Optional[int] = None) -> str:
+        """Add a job to the queue.
+
+        Args:
+            job: A `PipelineJob` (or a dict with the same fields); a job ID is
+                assigned when missing.
+            max_attempts: Number of attempts of this job; defaults to the
+                queue's ``max_attempts``.
+
+        Returns:
+            The job ID.
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str) -> Optional[JobLease]:
+        """Lease the oldest available job, re-queuing expired leases first.
+
+        Returns:
+            The lease, or None when no job is available.
+        """
+
+    @abstractmethod
+    def heartbeat(self, lease: JobLease) -> bool:
+        """Extend `lease` by ``lease_seconds``.
+
+        Returns:
+            False when the lease was lost (expired and re-queued).
+        """
+
+    @abstractmethod
+    def complete(self, lease: JobLease, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark the leased job done with a JSON-serializable `result`.
+
+        Returns:
+            False when the lease was lost; the result is then discarded.
+        """
+
+    @abstractmethod
+    def fail(self, lease: JobLease, error: str, retry: bool = True) -> bool:
+        """Record a failed attempt of the leased job.
+
+        The job is retried after ``retry_delay`` unless `retry` is False or it
+        has used all its attempts, in which case it is marked failed.
+
+        Returns:
+            False when the lease was lost.
+        """
+
+    @abstractmethod
+    def release_expired(self) -> int:
+        """Re-queue (or fail) the jobs whose lease has expired.
+
+        Returns:
+            The number of expired leases released.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """Return the record of a job, or None when it is unknown."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per state."""
+
+
+# ============================================================================
+# SQLite Backend
+# ============================================================================
+
+
+class SQLiteJobQueue(BaseJobQueue):
+    """Job queue stored in a SQLite database.
+
+    Every operation runs in its own connection and ``BEGIN IMMEDIATE``
+    transaction, so the queue can be shared by threads and processes.
+
+    Args:
+        path: Path of the SQLite database file.
+        **kwargs: Arguments of `BaseJobQueue`.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_token TEXT,
+                    lease_expires REAL,
+                    error TEXT,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_state "
+                "ON jobs (state, available_at, created_at)"
+            )
+
+    def _transaction(self) -> ContextManager[sqlite3.Connection]:
+        return sqlite_transaction(self.path)
+
+    def enqueue(self, job, max_attempts: Optional[int] = None) -> str:
+        job = self._prepare_job(job)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, payload, state, max_attempts, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.job_id,
+                    json.dumps(dataclasses.asdict(job), ensure_ascii=False),
+                    self.PENDING,
+                    max_attempts or self.max_attempts,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+        return job.job_id
+
+    def _release_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        rows = conn.execute(
+            "SELECT job_id, attempts, max_attempts, lease_owner FROM jobs "
+            "WHERE state = ? AND lease_expires < ?",
+            (self.LEASED, now),
+        ).fetchall()
+        for job_id, attempts, max_attempts, lease_owner in rows:
+            self._finish_attempt(
+                conn,
+                job_id,
+                attempts + 1,
+                max_attempts,
+                f"Lease of worker {lease_owner} expired",
+                now,
+            )
+        return len(rows)
+
+    def _finish_attempt(
+        self,
+        conn: sqlite3.Connection,
+        job_id: str,
+        attempts: int,
+        max_attempts: int,
+        error: str,
+        now: float,
+        retry: bool = True,
+    ) -> None:
+        state = self.PENDING if retry and attempts < max_attempts else self.FAILED
+        conn.execute(
+            "UPDATE jobs SET state = ?, attempts = ?, error = ?, available_at = ?, "
+            "lease_owner = NULL, lease_token = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE job_id = ?",
+            (state, attempts, error, now + self.retry_delay, now, job_id),
+        )
+
+    def release_expired(self) -> int:
+        with self._transaction() as conn:
+            return self._release_expired(conn, time.time())
+
+    def lease(self, worker_id: str) -> Optional[JobLease]:
+        now = time.time()
+        with self._transaction() as conn:
+            self._release_expired(conn, now)
+            row = conn.execute(
+                "SELECT job_id, payload, attempts FROM jobs "
+                "WHERE state = ? AND available_at <= ? "
+                "ORDER BY available_at, created_at LIMIT 1",
+                (self.PENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, attempts = row
+            token = uuid.uuid4().hex
+            expires_at = now + self.lease_seconds
+            conn.execute(
+                "UPDATE jobs SET state = ?, lease_owner = ?, lease_token = ?, "
+                "lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                (self.LEASED, worker_id, token, expires_at, now, job_id),
+            )
+        return JobLease(
+            job_id=job_id,
+            job=PipelineJob(**json.loads(payload)),
+            attempt=attempts + 1,
+            worker_id=worker_id,
+            token=token,
+            expires_at=expires_at,
+        )
+
+    def heartbeat(self, lease: JobLease) -> bool:
+        now = time.time()
+        expires_at = now + self.lease_seconds
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_token = ? AND state = ?",
+                (expires_at, now, lease.job_id, lease.token, self.LEASED),
+            ).rowcount
+        if updated:
+            lease.expires_at = expires_at
+        return bool(updated)
+
+    def complete(self, lease: JobLease, result: Optional[Dict[str, Any]] = None) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, result = ?, "
+                "error = NULL, lease_owner = NULL, lease_token = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE job_id = ? AND lease_token = ? AND state = ?",
+                (
+                    self.DONE,
+                    json.dumps(result, ensure_ascii=False, default=str),
+                    now,
+                    lease.job_id,
+                    lease.token,
+                    self.LEASED,
+                ),
+            ).rowcount
+        return bool(updated)
+
+    def fail(self, lease: JobLease, error: str, retry: bool = True) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE job_id = ? AND lease_token = ? AND state = ?",
+                (lease.job_id, lease.token, self.LEASED),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            self._finish_attempt(
+                conn, lease.job_id, attempts + 1, max_attempts, error, now, retry
+            )
+        return True
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT state, payload, attempts, max_attempts, error, result "
+                "FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        state, payload, attempts, max_attempts, error, result = row
+        return JobRecord(
+            job_id=job_id,
+            state=state,
+            job=PipelineJob(**json.loads(payload)),
+            attempts=attempts,
+            max_attempts=max_attempts,
+            error=error,
+            result=json.loads(result) if result else None,
+        )
+
+    def counts(self) -> Dict[str, int]:
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        counts = {state: 0 for state in self.STATES}
+        counts.update(dict(rows))
+        return counts
+
+
+# ============================================================================
+# Filesystem Backend
+# ============================================================================
+
+
+class FileJobQueue(BaseJobQueue):
+    """Job queue stored as JSON files, one directory per state.
+
+    Layout:
+
+        <root>/pending/<available_at_ms>__<job_id>.json
+        <root>/leased/<job_id>__<lease_token>__<expires_at_ms>.json
+        <root>/done/<job_id>.json
+        <root>/failed/<job_id>.json
+        <root>/tmp/                  staging area of in-flight transitions
+
+    A transition first claims the job file by renaming it into ``tmp`` (only
+    one worker can win the rename), rewrites it there and publishes it by
+    renaming it into the target state directory. Leasing is a single rename
+    from ``pending`` to ``leased``, and a heartbeat renames the lease file to
+    its new deadline, so a lease released by another worker fails to renew.
+
+    Args:
+        root: Root directory of the queue; may be on a shared filesystem.
+        **kwargs: Arguments of `BaseJobQueue`.
+    """
+
+    TMP = "tmp"
+
+    def __init__(self, root: str, **kwargs):
+        super().__init__(**kwargs)
+        self.root = root
+        for state in (*self.STATES, self.TMP):
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    # ---------- file naming ----------
+
+    def _dir(self, state: str) -> str:
+        return os.path.join(self.root, state)
+
+    def _pending_path(self, job_id: str, available_at: float) -> str:
+        return os.path.join(
+            self._dir(self.PENDING), f"{int(available_at * 1000):015d}__{job_id}.json"
+        )
+
+    def _leased_path(self, job_id: str, token: str, expires_at: float) -> str:
+        return os.path.join(
+            self._dir(self.LEASED),
+            f"{job_id}__{token}__{int(expires_at * 1000):015d}.json",
+        )
+
+    def _final_path(self, state: str, job_id: str) -> str:
+        return os.path.join(self._dir(state), f"{job_id}.json")
+
+    @staticmethod
+    def _split_name(name: str) -> List[str]:
+        return name[: -len(".json")].split("__")
+
+    # ---------- record IO ----------
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Any]:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, path: str, record: Dict[str, Any]) -> None:
+        tmp_path = os.path.join(self._dir(self.TMP), f".{uuid.uuid4().hex}.json")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def _claim(self, path: str, job_id: str) -> Optional[str]:
+        """Move `path` into the staging area; None when another worker won."""
+        staging_path = os.path.join(
+            self._dir(self.TMP), f"{job_id}__{uuid.uuid4().hex}.json"
+        )
+        try:
+            os.rename(path, staging_path)
+        except FileNotFoundError:
+            return None
+        return staging_path
+
+    def _publish(
+        self, staging_path: str, record: Dict[str, Any], target_path: str
+    ) -> None:
+        record["updated_at"] = time.time()
+        self._write(staging_path, record)
+        os.rename(staging_path, target_path)
+
+    def _finish_attempt(
+        self,
+        staging_path: str,
+        record: Dict[str, Any],
+        error: str,
+        now: float,
+        retry: bool = True,
+    ) -> None:
+        record["attempts"] += 1
+        record["error"] = error
+        if retry and record["attempts"] < record["max_attempts"]:
+            target_path = self._pending_path(record["job_id"], now + self.retry_delay)
+        else:
+            target_path = self._final_path(self.FAILED, record["job_id"])
+        self._publish(staging_path, record, target_path)
+
+    # ---------- queue operations ----------
+
+    def enqueue(self, job, max_attempts: Optional[int] = None) -> str:
+        job = self._prepare_job(job)
+        now = time.time()
+        record = {
+            "job_id": job.job_id,
+            "job": dataclasses.asdict(job),
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._write(self._pending_path(job.job_id, now), record)
+        return job.job_id
+
+    def release_expired(self) -> int:
+        now = time.time()
+        released = 0
+        for name in os.listdir(self._dir(self.LEASED)):
+            job_id, _, expires_ms = self._split_name(name)
+            if int(expires_ms) >= now * 1000:
+                continue
+            staging_path = self._claim(
+                os.path.join(self._dir(self.LEASED), name), job_id
+            )
+            if staging_path is None:
+                continue
+            record = self._read(staging_path)
+            self._finish_attempt(staging_path, record, "Lease expired", now)
+            released += 1
+
+        # Transitions interrupted by a crash leave their job in the staging
+        # area; give them back to the queue once they are clearly abandoned
+        for name in os.listdir(self._dir(self.TMP)):
+            path = os.path.join(self._dir(self.TMP), name)
+            if name.startswith("."):
+                continue
+            try:
+                if os.path.getmtime(path) + self.lease_seconds >= now:
+                    continue
+            except FileNotFoundError:
+                continue
+            job_id = self._split_name(name)[0]
+            staging_path = self._claim(path, job_id)
+            if staging_path is None:
+                continue
+            record = self._read(staging_path)
+            self._finish_attempt(staging_path, record, "Transition interrupted", now)
+            released += 1
+        return released
+
+    def lease(self, worker_id: str) -> Optional[JobLease]:
+        self.release_expired()
+        now = time.time()
+        for name in sorted(os.listdir(self._dir(self.PENDING))):
+            available_ms, job_id = self._split_name(name)
+            if int(available_ms) > now * 1000:
+                # Names sort by availability time
+                break
+            token = uuid.uuid4().hex
+            expires_at = now + self.lease_seconds
+            leased_path = self._leased_path(job_id, token, expires_at)
+            try:
+                os.rename(os.path.join(self._dir(self.PENDING), name), leased_path)
+            except FileNotFoundError:
+                # Leased by another worker
+                continue
+            record = self._read(leased_path)
+            return JobLease(
+                job_id=job_id,
+                job=PipelineJob(**record["job"]),
+                attempt=record["attempts"] + 1,
+                worker_id=worker_id,
+                token=token,
+                expires_at=expires_at,
+            )
+        return None
+
+    def heartbeat(self, lease: JobLease) -> bool:
+        expires_at = time.time() + self.lease_seconds
+        try:
+            os.rename(
+                self._leased_path(lease.job_id, lease.token, lease.expires_at),
+                self._leased_path(lease.job_id, lease.token, expires_at),
+            )
+        except FileNotFoundError:
+            return False
+        lease.expires_at = expires_at
+        return True
+
+    def complete(self, lease: JobLease, result: Optional[Dict[str, Any]] = None) -> bool:
+        staging_path = self._claim(
+            self._leased_path(lease.job_id, lease.token, lease.expires_at),
+            lease.job_id,
+        )
+        if staging_path is None:
+            return False
+        record = self._read(staging_path)
+        record["attempts"] += 1
+        record["error"] = None
+        record["result"] = result
+        self._publish(
+            staging_path, record, self._final_path(self.DONE, lease.job_id)
+        )
+        return True
+
+    def fail(self, lease: JobLease, error: str, retry: bool = True) -> bool:
+        staging_path = self._claim(
+            self._leased_path(lease.job_id, lease.token, lease.expires_at),
+            lease.job_id,
+        )
+        if staging_path is None:
+            return False
+        record = self._read(staging_path)
+        self._finish_attempt(staging_path, record, error, time.time(), retry)
+        return True
+
+    def _find(self, job_id: str):
+        for state in (self.DONE, self.FAILED):
+            path = self._final_path(state, job_id)
+            if os.path.exists(path):
+                return state, path
+        for state in (self.PENDING, self.LEASED):
+            for name in os.listdir(self._dir(state)):
+                if job_id in self._split_name(name):
+                    return state, os.path.join(self._dir(state), name)
+        return None, None
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        state, path = self._find(job_id)
+        if state is None:
+            return None
+        try:
+            record = self._read(path)
+        except FileNotFoundError:
+            # The job moved while reading; retry once
+            state, path = self._find(job_id)
+            if state is None:
+                return None
+            record = self._read(path)
+        return JobRecord(
+            job_id=job_id,
+            state=state,
+            job=PipelineJob(**record["job"]),
+            attempts=record["attempts"],
+            max_attempts=record["max_attempts"],
+            error=record["error"],
+            result=record["result"],
+        )
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(os.listdir(self._dir(state))) for state in self.STATES}
+
+
+# ============================================================================
+# Factory and Worker
+# ============================================================================
+
+
+# Job queue factory dictionary
+job_queue_factory: Dict[str, Callable] = {
+    "sqlite": SQLiteJobQueue,
+    "filesystem": FileJobQueue,
+}
+
+
+def create_job_queue(job_queue_config: dict) -> BaseJobQueue:
+    """Create the job queue described by ``job_queue_config``.
+
+    Args:
+        job_queue_config: Dict with ``backend`` ("sqlite" or "filesystem"),
+            ``path`` (database file or root directory) and optionally
+            ``lease_seconds``, ``max_attempts`` and ``retry_delay``.
+    """
+    backend = job_queue_config.get("backend", "sqlite")
+    if backend not in job_queue_factory:
+        raise ValueError(
+            f"Unknown job queue backend: {backend} in {job_queue_factory.keys()}"
+        )
+    return job_queue_factory[backend](
+        job_queue_config["path"],
+        lease_seconds=job_queue_config.get("lease_seconds", 600.0),
+        max_attempts=job_queue_config.get("max_attempts", 3),
+        retry_delay=job_queue_config.get("retry_delay", 0.0),
+    )
+
+
+def execute_lease(
+    pipeline: FinmyPipeline,
+    job_queue: BaseJobQueue,
+    lease: JobLease,
+    heartbeat_interval: Optional[float] = None,
+) -> bool:
+    """Run a leased job on `pipeline`, heartbeating until it finishes.
+
+    Args:
+        pipeline: Pipeline executing the job.
+        job_queue: Queue the job was leased from.
+        lease: The lease.
+        heartbeat_interval: Seconds between heartbeats; defaults to a third
+            of the lease duration.
+
+    Returns:
+        True when the job succeeded.
+    """
+    logger = pipeline.logger or logging.getLogger(__name__)
+    heartbeat_interval = heartbeat_interval or job_queue.lease_seconds / 3
+    finished = threading.Event()
+
+    def _heartbeat():
+        while not finished.wait(heartbeat_interval):
+            if not job_queue.heartbeat(lease):
+                logger.warning(
+                    "Lost the lease of job %s; it will be retried elsewhere",
+                    lease.job_id,
+                )
+                return
+
+    heartbeat_thread = threading.Thread(
+        target=_heartbeat, name=f"finmy-heartbeat-{lease.job_id}", daemon=True
+    )
+    heartbeat_thread.start()
+    try:
+        job_result = pipeline.run_job(lease.job)
+    finally:
+        finished.set()
+        heartbeat_thread.join()
+
+    if job_result.error is not None:
+        job_queue.fail(lease, job_result.error)
+        return False
+    reported = job_queue.complete(
+        lease,
+        {
+            "save_dir": job_result.save_dir,
+            "time_cost": job_result.time_cost,
+            "metrics": job_result.metrics.to_dict() if job_result.metrics else None,
+        },
+    )
+    if not reported:
+        logger.warning(
+            "Job %s finished after its lease was lost; result discarded",
+            lease.job_id,
+        )
+    return reported
+
+
+def run_worker(
+    pipeline: FinmyPipeline,
+    job_queue: BaseJobQueue,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 2.0,
+    heartbeat_interval: Optional[float] = None,
+    max_jobs: Optional[int] = None,
+    exit_when_empty: bool = False,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """Lease and execute jobs until stopped.
+
+    Args:
+        pipeline: Pipeline executing the jobs; its components are shared by
+            all jobs of this worker.
+        job_queue: Queue to lease jobs from.
+        worker_id: Identifier of the worker (default: ``<hostname>-<pid>``).
+        poll_interval: Seconds to wait when no job is available.
+        heartbeat_interval: Seconds between lease heartbeats.
+        max_jobs: Stop after this many jobs.
+        exit_when_empty: Stop when no job is available instead of polling.
+        stop_event: Event stopping the worker between jobs when set.
+
+    Returns:
+        The number of jobs executed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stop_event = stop_event or threading.Event()
+    logger = pipeline.logger or logging.getLogger(__name__)
+    logger.info("Worker %s started", worker_id)
+
+    executed = 0
+    while not stop_event.is_set() and (max_jobs is None or executed < max_jobs):
+        lease = job_queue.lease(worker_id)
+        if lease is None:
+            if exit_when_empty:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        logger.info(
+            "Worker %s leased job %s (attempt %d)",
+            worker_id,
+            lease.job_id,
+            lease.attempt,
+        )
+        execute_lease(pipeline, job_queue, lease, heartbeat_interval)
+        executed += 1
+
+    logger.info("Worker %s stopped after %d jobs", worker_id, executed)
+    return executed
+
+
+def main():
+    """Command line entry point: enqueue jobs, run a worker or show status."""
+    import yaml
+
+    parser = argparse.ArgumentParser(description="FinMycelium job queue.")
+    parser.add_argument(
+        "command", choices=["enqueue", "worker", "status"], help="Action to run"
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=str,
+        default="configs/pipline.yml",
+        help="Path to YAML config file for pipeline",
+    )
+    parser.add_argument("--query", type=str, help="enqueue: query text")
+    parser.add_argument(
+        "--key-words", nargs="*", default=[], help="enqueue: keyword hints"
+    )
+    parser.add_argument(
+        "--sources", nargs="*", default=[], help="enqueue: URLs or PDF paths"
+    )
+    parser.add_argument(
+        "--contents", nargs="*", default=[], help="enqueue: raw text contents"
+    )
+    parser.add_argument("--worker-id", type=str, default=None, help="worker: ID")
+    parser.add_argument(
+        "--max-jobs", type=int, default=None, help="worker: stop after N jobs"
+    )
+    parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="worker: stop when the queue is empty",
+    )
+    parser.add_argument("--job-id", type=str, default=None, help="status: job ID")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    job_queue_config = config["job_queue_config"]
+    job_queue = create_job_queue(job_queue_config)
+
+    if args.command == "enqueue":
+        if not args.query:
+            parser.error("enqueue requires --query")
+        job_id = job_queue.enqueue(
+            PipelineJob(
+                query_text=args.query,
+                key_words=args.key_words,
+                data_sources=args.sources,
+                contents=args.contents,
+            )
+        )
+        print(job_id)
+    elif args.command == "status":
+        if args.job_id:
+            print(job_queue.get(args.job_id))
+        else:
+            print(job_queue.counts())
+    else:
+        pipeline = FinmyPipeline(config)
+        run_worker(
+            pipeline,
+            job_queue,
+            worker_id=args.worker_id,
+            poll_interval=job_queue_config.get("poll_interval", 2.0),
+            heartbeat_interval=job_queue_config.get("heartbeat_interval"),
+            max_jobs=args.max_jobs,
+            exit_when_empty=args.exit_when_empty,
+        )
+
+
+if __name__ == "__main__":
+    main()
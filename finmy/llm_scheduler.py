@@ -0,0 +1,470 @@
+"""
+Process-wide scheduler of LLM calls.
+
+Summarizers, matchers and builders each create their own inference client, so
+without coordination concurrent runs (`run_batch`, the async pipeline, job
+queue workers with several threads) exceed the provider's rate limits and get
+HTTP 429 responses, and bulk matching can starve the builder.
+
+Every LLM call goes through `llm_request`, which waits for a slot of the
+model's `ModelLimiter`:
+
+- requests per minute and tokens per minute are enforced with token buckets
+  (capacity: one minute of budget). A call reserves its estimated prompt
+  tokens; the difference with the tokens actually used is settled when the
+  call finishes;
+- at most ``max_concurrency`` calls per model run at the same time;
+- waiting calls are served by priority (`PRIORITY_BUILD` before
+  `PRIORITY_SUMMARIZE` before `PRIORITY_MATCH`), then in arrival order.
+
+Limits are configured per model name (``llm_scheduler_config``); models
+without limits are only tracked. Each limiter reports its queue depth, calls
+in flight, waiting time and token usage (`LLMScheduler.stats`,
+`LLMScheduler.to_prometheus`), and the waiting time of every call is recorded
+into the current pipeline step metrics (`llm_wait_time`).
+
+Threads wait for a slot with `llm_request`, blocking the calling thread.
+Coroutines of the async pipeline wait with `allm_request`, which suspends the
+task instead, and call the native async method of the inference client with
+`acall_llm`; both kinds of callers share the same limiters and queue.
+
+Usage:
+    with llm_request(model_name, prompt, PRIORITY_MATCH) as request:
+        output = client.run(...)
+        request.finish(output.response, usage=getattr(output, "usage", None))
+
+    async with allm_request(model_name, prompt, PRIORITY_MATCH) as request:
+        output = await acall_llm(client, "run", ...)
+        request.finish(output.response, usage=getattr(output, "usage", None))
+"""
+
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    ContextManager,
+    Dict,
+    Iterator,
+    Optional,
+)
+
+from finmy.metrics import (
+    estimate_tokens,
+    record_llm_call,
+    record_llm_wait,
+    usage_tokens,
+)
+
+
+# Priorities of LLM calls; lower values are served first
+PRIORITY_BUILD = 0
+PRIORITY_SUMMARIZE = 1
+PRIORITY_MATCH = 2
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``.
+
+    The level may become negative when more tokens than reserved were used;
+    the debt is paid back by the refill before the next reservation.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        refill = (now - self.updated_at) * self.rate
+        self.level = min(self.capacity, self.level + refill)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 when they are).
+
+        Amounts above the capacity only wait for a full bucket.
+        """
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        """Take `amount` tokens (negative amounts give tokens back)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ModelLimiter:
+    """Rate and concurrency limiter of one model.
+
+    Args:
+        model: Name of the model.
+        requests_per_minute: Request budget; None for unlimited.
+        tokens_per_minute: Token budget (prompt + completion); None for
+            unlimited.
+        max_concurrency: Maximum calls in flight; None for unlimited.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.model = model
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+
+        self._cond = threading.Condition()
+        # (event loop, event) of the coroutines waiting in `aacquire`
+        self._async_waiters = set()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self.in_flight = 0
+        self.counters = {
+            "calls": 0,
+            "tokens": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "max_queue_depth": 0,
+        }
+
+    def _wait_time(self, tokens: int, now: float) -> Optional[float]:
+        """Seconds until a call of `tokens` may start; None while the
+        concurrency limit is reached."""
+        if (
+            self.max_concurrency is not None
+            and self.in_flight >= self.max_concurrency
+        ):
+            return None
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _notify_all(self) -> None:
+        """Wake up the waiting threads and coroutines; the caller holds the
+        condition."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self, priority: int):
+        """Add a waiting call to the queue; the caller holds the condition."""
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiting, ticket)
+        self.counters["max_queue_depth"] = max(
+            self.counters["max_queue_depth"], len(self._waiting)
+        )
+        return ticket
+
+    def _dequeue(self, ticket) -> None:
+        """Remove an interrupted call from the queue; the caller holds the
+        condition."""
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._notify_all()
+
+    def _start(self, tokens: int, start_time: float) -> float:
+        """Start the call at the head of the queue; the caller holds the
+        condition.
+
+        Returns:
+            The seconds the call waited.
+        """
+        heapq.heappop(self._waiting)
+        now = time.monotonic()
+        if self.requests is not None:
+            self.requests.consume(1, now)
+        if self.tokens is not None:
+            self.tokens.consume(tokens, now)
+        self.in_flight += 1
+        waited = now - start_time
+        self.counters["calls"] += 1
+        self.counters["wait_time"] += waited
+        self.counters["max_wait_time"] = max(self.counters["max_wait_time"], waited)
+        # Let the next waiter check whether it may start as well
+        self._notify_all()
+        return waited
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_MATCH) -> float:
+        """Block until a call reserving `tokens` may start.
+
+        Returns:
+            The seconds spent waiting.
+        """
+        start_time = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = self._wait_time(tokens, time.monotonic())
+                        if wait == 0:
+                            break
+                    # Woken up by `release`, by a served call or by the refill
+                    self._cond.wait(wait)
+            except BaseException:
+                # Interrupted while waiting: leave the queue
+                self._dequeue(ticket)
+                raise
+            return self._start(tokens, start_time)
+
+    async def aacquire(self, tokens: int, priority: int = PRIORITY_MATCH) -> float:
+        """Wait, without blocking the event loop, until a call reserving
+        `tokens` may start.
+
+        Returns:
+            The seconds spent waiting.
+        """
+        start_time = time.monotonic()
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            ticket = self._enqueue(priority)
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                with self._cond:
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = self._wait_time(tokens, time.monotonic())
+                        if wait == 0:
+                            self._async_waiters.discard(waiter)
+                            return self._start(tokens, start_time)
+                    waiter[1].clear()
+                # Woken up by `release`, by a served call or by the refill
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled while waiting: leave the queue
+            with self._cond:
+                self._async_waiters.discard(waiter)
+                self._dequeue(ticket)
+            raise
+
+    def release(
+        self, reserved_tokens: int, used_tokens: Optional[int] = None
+    ) -> None:
+        """End a call; settle its token usage when known."""
+        with self._cond:
+            self.in_flight -= 1
+            if used_tokens is not None:
+                self.counters["tokens"] += used_tokens
+                if self.tokens is not None:
+                    self.tokens.consume(
+                        used_tokens - reserved_tokens, time.monotonic()
+                    )
+            self._notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current queue depth, calls in flight and counters."""
+        with self._cond:
+            return {
+                "queue_depth": len(self._waiting),
+                "in_flight": self.in_flight,
+                **self.counters,
+            }
+
+
+class LLMRequest:
+    """A scheduled LLM call, yielded by `LLMScheduler.request`."""
+
+    def __init__(self, prompt: Any, reserved_tokens: int, wait_time: float):
+        self.prompt = prompt
+        self.reserved_tokens = reserved_tokens
+        self.wait_time = wait_time
+        self.used_tokens: Optional[int] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def finish(self, response: Any, usage: Any = None) -> None:
+        """Record the call's response into the step metrics and settle its
+        token usage with the model budget."""
+        record_llm_call(self.prompt, response, usage=usage)
+        self.prompt_tokens, self.completion_tokens = usage_tokens(
+            self.prompt, response, usage
+        )
+        self.used_tokens = self.prompt_tokens + self.completion_tokens
+
+
+class LLMScheduler:
+    """Registry of the `ModelLimiter` of every model.
+
+    Args:
+        llm_scheduler_config: Dict with ``default`` limits applied to every
+            model and per-model limits under ``models``; each with
+            ``requests_per_minute``, ``tokens_per_minute`` and
+            ``max_concurrency``.
+    """
+
+    def __init__(self, llm_scheduler_config: Optional[dict] = None):
+        config = llm_scheduler_config or {}
+        self.default_limits = config.get("default") or {}
+        self.model_limits = config.get("models") or {}
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model: str) -> ModelLimiter:
+        """Return the limiter of `model`, creating it on first use."""
+        with self._lock:
+            if model not in self._limiters:
+                limits = {**self.default_limits, **self.model_limits.get(model, {})}
+                self._limiters[model] = ModelLimiter(
+                    model,
+                    requests_per_minute=limits.get("requests_per_minute"),
+                    tokens_per_minute=limits.get("tokens_per_minute"),
+                    max_concurrency=limits.get("max_concurrency"),
+                )
+            return self._limiters[model]
+
+    @contextmanager
+    def request(
+        self, model: str, prompt: Any, priority: int = PRIORITY_MATCH
+    ) -> Iterator[LLMRequest]:
+        """Hold a slot of `model` for the enclosed LLM call.
+
+        Args:
+            model: Name of the model.
+            prompt: Prompt (text, messages or prompt parts); its estimated
+                token count is reserved from the token budget.
+            priority: `PRIORITY_BUILD`, `PRIORITY_SUMMARIZE` or
+                `PRIORITY_MATCH`.
+
+        Yields:
+            The `LLMRequest`; call its `finish` with the response.
+        """
+        limiter = self.limiter(model)
+        reserved_tokens = estimate_tokens(prompt)
+        wait_time = limiter.acquire(reserved_tokens, priority)
+        record_llm_wait(wait_time)
+        request = LLMRequest(prompt, reserved_tokens, wait_time)
+        try:
+            yield request
+        finally:
+            limiter.release(reserved_tokens, request.used_tokens)
+
+    @asynccontextmanager
+    async def arequest(
+        self, model: str, prompt: Any, priority: int = PRIORITY_MATCH
+    ) -> AsyncIterator[LLMRequest]:
+        """Asynchronous `request`: the slot is awaited without blocking the
+        event loop."""
+        limiter = self.limiter(model)
+        reserved_tokens = estimate_tokens(prompt)
+        wait_time = await limiter.aacquire(reserved_tokens, priority)
+        record_llm_wait(wait_time)
+        request = LLMRequest(prompt, reserved_tokens, wait_time)
+        try:
+            yield request
+        finally:
+            limiter.release(reserved_tokens, request.used_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the stats of every model limiter, by model name."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.model: limiter.stats() for limiter in limiters}
+
+    def to_prometheus(self) -> str:
+        """Render the limiter stats in the Prometheus text exposition format."""
+        metrics = {
+            "queue_depth": ("finmy_llm_queue_depth", "gauge", "LLM calls waiting"),
+            "in_flight": ("finmy_llm_in_flight", "gauge", "LLM calls in flight"),
+            "calls": ("finmy_llm_calls_total", "counter", "LLM calls started"),
+            "tokens": ("finmy_llm_tokens_total", "counter", "LLM tokens used"),
+            "wait_time": (
+                "finmy_llm_wait_seconds_total",
+                "counter",
+                "Seconds LLM calls waited for the scheduler",
+            ),
+        }
+        stats = self.stats()
+        lines = []
+        for field_name, (metric, metric_type, help_text) in metrics.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for model, model_stats in stats.items():
+                value = model_stats[field_name]
+                lines.append(f'{metric}{{model="{model}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+_SCHEDULER = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler."""
+    return _SCHEDULER
+
+
+def configure_llm_scheduler(llm_scheduler_config: Optional[dict]) -> LLMScheduler:
+    """Replace the process-wide scheduler with one using the given limits.
+
+    Calls already holding a slot of the previous scheduler finish normally.
+    """
+    global _SCHEDULER
+    _SCHEDULER = LLMScheduler(llm_scheduler_config)
+    return _SCHEDULER
+
+
+def llm_request(
+    model: str, prompt: Any, priority: int = PRIORITY_MATCH
+) -> ContextManager[LLMRequest]:
+    """Hold a slot of `model` in the process-wide scheduler; see
+    `LLMScheduler.request`."""
+    return get_llm_scheduler().request(model, prompt, priority)
+
+
+def allm_request(
+    model: str, prompt: Any, priority: int = PRIORITY_MATCH
+) -> AsyncContextManager[LLMRequest]:
+    """Await a slot of `model` in the process-wide scheduler; see
+    `LLMScheduler.arequest`."""
+    return get_llm_scheduler().arequest(model, prompt, priority)
+
+
+# Native async counterparts of the methods of the inference clients
+ASYNC_CLIENT_METHODS = {"run": "arun", "_inference": "_ainference"}
+_SYNC_CLIENTS_WARNED = set()
+
+
+async def acall_llm(client: Any, method: str, *args, **kwargs) -> Any:
+    """Call `method` of an inference client from a coroutine.
+
+    The native async counterpart of the method (`ASYNC_CLIENT_METHODS`) is
+    awaited on the event loop. Clients without one are called in a worker
+    thread, with a warning logged once per client class.
+
+    Args:
+        client: The inference client, e.g. lmbase's `LangChainAPIInference`.
+        method: Name of the synchronous method, ``"run"`` or ``"_inference"``.
+        *args, **kwargs: Arguments of the call.
+    """
+    native = getattr(client, ASYNC_CLIENT_METHODS.get(method, ""), None)
+    if native is not None and asyncio.iscoroutinefunction(native):
+        return await native(*args, **kwargs)
+    client_type = type(client).__name__
+    if client_type not in _SYNC_CLIENTS_WARNED:
+        _SYNC_CLIENTS_WARNED.add(client_type)
+        logging.getLogger(__name__).warning(
+            "%s has no async %s, calling it in a worker thread", client_type, method
+        )
+    return await asyncio.to_thread(getattr(client, method), *args, **kwargs)
@@ -22,8 +22,9 @@ Implementers should:
 """
 
 import time
+import asyncio
 from dataclasses import dataclass, field
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Union
 from abc import ABC, abstractmethod
 
 
@@ -99,11 +100,13 @@ class BaseMatcher(ABC):
         self.method_name = method_name
 
     @abstractmethod
-    def match(self, match_input: MatchInput) -> List[str]:
+    def match(self, match_input: MatchInput) -> List[Union[str, Dict[str, Any]]]:
         """Produce raw output and selection items for positional mapping.
 
         Return:
         - List[str]: list of strings, each string is a matched sub-content that may containing one target paragraph or multiple paragraphs.
+          An item may also be a dict with the matched sub-content under `quote`; its other
+          keys (e.g., `score`, `reason`) are kept in `MatchItem.extras`.
         """
 
     def map_positions(
@@ -133,14 +136,53 @@ class BaseMatcher(ABC):
         start_time = time.time()
         matches = self.match(match_input)
         end_time = time.time()
+        return self._match_output(match_input, matches, end_time - start_time)
+
+    async def amatch(
+        self, match_input: MatchInput
+    ) -> List[Union[str, Dict[str, Any]]]:
+        """Asynchronous `match`.
+
+        The default implementation executes `match` in a worker thread, which
+        suits the rule-based and index-based matchers; LLM-based matchers
+        override it to await the model natively.
+        """
+        return await asyncio.to_thread(self.match, match_input)
+
+    def _match_output(
+        self,
+        match_input: MatchInput,
+        matches: List[Union[str, Dict[str, Any]]],
+        elapsed: float,
+    ) -> MatchOutput:
+        """Locate the quotes of `matches` and build the `MatchOutput`."""
+        # Split dict matches into the quote to locate and its extras
+        quotes, extras = [], []
+        for match in matches:
+            if isinstance(match, dict):
+                match = dict(match)
+                quote = match.pop("quote", "")
+            else:
+                quote, match = match, {}
+            if quote:
+                quotes.append(quote)
+                extras.append(match)
         items: List[PositionWisedParagraph] = self.map_positions(
-            match_input.match_data, matches
+            match_input.match_data, quotes
         )
 
         return MatchOutput(
             items=[
-                MatchItem(paragraph=i.text, start=i.start, end=i.end) for i in items
+                MatchItem(paragraph=i.text, start=i.start, end=i.end, extras=e)
+                for i, e in zip(items, extras)
             ],
             method=self.method_name,
-            time=end_time - start_time,
+            time=elapsed,
         )
+
+    async def arun(self, match_input: MatchInput) -> MatchOutput:
+        """Asynchronous `run`, used by `FinmyAsyncPipeline`: the matching
+        goes through `amatch`."""
+        start_time = time.time()
+        matches = await self.amatch(match_input)
+        return self._match_output(match_input, matches, time.time() - start_time)
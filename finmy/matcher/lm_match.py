@@ -13,6 +13,7 @@ from lmbase.inference.base import InferInput
 
 from .utils import safe_parse_json
 from .base import MatchInput, BaseMatcher
+from ..llm_scheduler import PRIORITY_MATCH, acall_llm, allm_request, llm_request
 
 
 SYSTEM_PROMPT = """
@@ -76,25 +77,58 @@ class LLMMatcher(BaseMatcher):
             generation_config=self.config.get("generation_config", {}),
         )
 
+    def _infer_kwargs(self, match_input: MatchInput) -> dict:
+        """Return the arguments of the inference client's `run` call."""
+        sq = match_input.summarized_query
+        return {
+            "infer_input": InferInput(
+                system_msg=self.config.get("system_prompt", SYSTEM_PROMPT),
+                user_msg=self.config.get("user_prompt", HUMAN_PROMPT_TEMPLATE),
+            ),
+            "query_text": sq.summarization,
+            "keywords_joined": sq.key_words,
+            "content": match_input.match_data,
+        }
+
+    @staticmethod
+    def _scheduler_prompt(infer_kwargs: dict) -> list:
+        """Return the prompt parts whose tokens the LLM scheduler reserves."""
+        infer_input = infer_kwargs["infer_input"]
+        return [
+            infer_input.system_msg,
+            infer_input.user_msg,
+            infer_kwargs["query_text"],
+            infer_kwargs["keywords_joined"],
+            infer_kwargs["content"],
+        ]
+
     def match(self, match_input: MatchInput) -> List[Union[str, Any]]:
         """Produce selection dicts representing matched paragraph ranges.
 
         - Uses `summarization` as the primary intent and `keywords` as hints
         - Returns a list of dicts with `paragraph_indices` for position mapping
         """
-        sq = match_input.summarized_query
-        # Obtain the inference output `base.InferOutput`
-
-        output = self.api_infer.run(
-            infer_input=InferInput(
-                system_msg=self.config.get("system_prompt", SYSTEM_PROMPT),
-                user_msg=self.config.get("user_prompt", HUMAN_PROMPT_TEMPLATE),
-            ),
-            query_text=sq.summarization,
-            keywords_joined=sq.key_words,
-            content=match_input.match_data,
-        )
-
+        infer_kwargs = self._infer_kwargs(match_input)
+        prompt = self._scheduler_prompt(infer_kwargs)
+        # Matching is bulk work: builder and summarizer calls go first
+        with llm_request(self.model_name, prompt, PRIORITY_MATCH) as request:
+            # Obtain the inference output `base.InferOutput`
+            output = self.api_infer.run(**infer_kwargs)
+            request.finish(output.response, usage=getattr(output, "usage", None))
+        return self._parse_output(output)
+
+    async def amatch(self, match_input: MatchInput) -> List[Union[str, Any]]:
+        """Asynchronous `match`: the scheduler slot and the LLM call are
+        awaited on the event loop."""
+        infer_kwargs = self._infer_kwargs(match_input)
+        prompt = self._scheduler_prompt(infer_kwargs)
+        async with allm_request(self.model_name, prompt, PRIORITY_MATCH) as request:
+            output = await acall_llm(self.api_infer, "run", **infer_kwargs)
+            request.finish(output.response, usage=getattr(output, "usage", None))
+        return self._parse_output(output)
+
+    def _parse_output(self, output) -> List[dict]:
+        """Validate the LLM output and turn it into selection dicts."""
         # Automatically parse and normalize response from LLM
         print("Output Response:")
         print(output.response)
@@ -207,7 +241,15 @@ class LLMMatcher(BaseMatcher):
                 validated_items.append(item)
 
             output.response = validated_items
-            return [item["quote"] for item in output.response]
+            # Keep the score and reason as `MatchItem.extras`
+            return [
+                {
+                    "quote": item["quote"],
+                    "score": float(item["score"]),
+                    "reason": item["reason"],
+                }
+                for item in output.response
+            ]
 
         except (ValueError, TypeError, KeyError, json.JSONDecodeError) as e:
             error_msg = (
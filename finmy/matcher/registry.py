@@ -23,20 +23,21 @@ Usage:
     matcher = registry.get(config)
 """
 
-from typing import Dict, Callable
+from typing import Dict, Callable, Union
+import importlib
 import logging
 
 from .base import BaseMatcher
-from .lm_match import LLMMatcher
-from .lx_match import KWMatcher, LMMatcher as LXMatcher, VectorMatcher
 
 
 # Matcher factory dictionary
-matcher_factory: Dict[str, Callable] = {
-    "LLMMatcher": LLMMatcher,
-    "KWMatcher": KWMatcher,
-    "LXMatcher": LXMatcher,
-    "VectorMatcher": VectorMatcher,
+# Entries are classes or "module:attribute" paths imported on first use, so
+# that importing the registry does not load LlamaIndex.
+matcher_factory: Dict[str, Union[Callable, str]] = {
+    "LLMMatcher": "finmy.matcher.lm_match:LLMMatcher",
+    "KWMatcher": "finmy.matcher.lx_match:KWMatcher",
+    "LXMatcher": "finmy.matcher.lx_match:LMMatcher",
+    "VectorMatcher": "finmy.matcher.lx_match:VectorMatcher",
 }
 
 
@@ -48,5 +49,9 @@ def get(matcher_config: dict) -> BaseMatcher:
             f"Unknown matcher type: {matcher_type} in {matcher_factory.keys()}"
         )
     logging.info("Creating matcher: %s.", matcher_type)
-    matcher = matcher_factory[matcher_type](matcher_config)
+    factory = matcher_factory[matcher_type]
+    if isinstance(factory, str):
+        module_name, attr = factory.split(":")
+        factory = getattr(importlib.import_module(module_name), attr)
+    matcher = factory(matcher_config)
     return matcher
@@ -0,0 +1,389 @@
+"""
+Per-stage performance metrics of the FinMycelium pipeline.
+
+A `PipelineMetrics` object is activated for every pipeline run. While it is
+active, each step executed inside `stage(name)` accumulates into its
+`StageMetrics`:
+
+- `wall_time`: wall-clock seconds spent in the step. Per-document steps
+  (matching) run on worker threads, so their wall time is the sum over
+  documents rather than the elapsed time;
+- `cpu_time`: CPU seconds of the threads executing the step;
+- `items`: number of items produced by the step (records, samples, ...);
+- `bytes_read` / `bytes_written`: text bytes read from / written to block
+  storage (see `finmy.converter`);
+- `db_rows`: rows inserted into the database (see `finmy.db_manager`);
+- `llm_calls`, `prompt_tokens`, `completion_tokens`: LLM usage. Token counts
+  come from the backend when it reports them and are estimated from the text
+  otherwise;
+- `llm_wait_time`: seconds LLM calls waited for the rate limits of the
+  process-wide LLM scheduler (see `finmy.llm_scheduler`);
+- `cache_hits` / `cache_misses`: lookups of persistent caches (e.g. the
+  summarization cache) answered from / missing in the cache.
+
+Pipeline step methods are wrapped with `timed_stage(name)`. Counters are
+recorded by the low-level helpers through module functions
+(`record_bytes_read`, `record_db_rows`, `record_llm_call`, ...), which are
+no-ops when no run is active. The active run and step are held in context
+variables, so concurrent runs (e.g. `run_batch`) do not mix their numbers.
+Work submitted to thread pools must carry the context with
+`submit_with_context` to be attributed to the submitting step; asyncio tasks
+and `asyncio.to_thread` copy the context by themselves.
+
+Metrics can be saved per run as JSON (`<run_id>.json`) and in the Prometheus
+text exposition format (`<run_id>.prom`).
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import inspect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+_CURRENT_RUN: contextvars.ContextVar = contextvars.ContextVar(
+    "finmy_pipeline_metrics", default=None
+)
+_CURRENT_STAGE: contextvars.ContextVar = contextvars.ContextVar(
+    "finmy_stage_metrics", default=None
+)
+
+# Approximate tokenization: one token per CJK character, word or punctuation
+_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]|\w+|[^\w\s]")
+
+
+@dataclass
+class StageMetrics:
+    """Counters of one pipeline step."""
+
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    items: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    db_rows: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_wait_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Number of times the step was entered (e.g. once per matched document)
+    calls: int = 0
+
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def add(self, **counters: float) -> None:
+        """Thread-safely add values to the given counters."""
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict."""
+        return {
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "items": self.items,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "db_rows": self.db_rows,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "llm_wait_time": self.llm_wait_time,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "calls": self.calls,
+        }
+
+
+# Counters exported to Prometheus: field -> (metric suffix, help text)
+_PROMETHEUS_FIELDS = {
+    "wall_time": ("wall_seconds", "Wall time spent in the pipeline stage"),
+    "cpu_time": ("cpu_seconds", "CPU time of the threads running the stage"),
+    "items": ("items", "Items produced by the stage"),
+    "bytes_read": ("bytes_read", "Bytes read from block storage"),
+    "bytes_written": ("bytes_written", "Bytes written to block storage"),
+    "db_rows": ("db_rows", "Rows inserted into the database"),
+    "llm_calls": ("llm_calls", "LLM calls issued by the stage"),
+    "prompt_tokens": ("prompt_tokens", "LLM prompt tokens"),
+    "completion_tokens": ("completion_tokens", "LLM completion tokens"),
+    "llm_wait_time": ("llm_wait_seconds", "Seconds LLM calls waited for slots"),
+    "cache_hits": ("cache_hits", "Cache lookups answered from the cache"),
+    "cache_misses": ("cache_misses", "Cache lookups missing in the cache"),
+}
+
+
+@dataclass
+class PipelineMetrics:
+    """Metrics of one pipeline run.
+
+    Fields:
+    - `run_id`: identifier of the run
+    - `stages`: step name -> `StageMetrics`, in the order steps first ran
+    - `wall_time`: wall-clock seconds of the whole run
+    - `cpu_time`: CPU seconds of the thread driving the run
+    """
+
+    run_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    stages: Dict[str, StageMetrics] = field(default_factory=dict)
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def get_stage(self, name: str) -> StageMetrics:
+        """Return the metrics of step `name`, creating them if needed."""
+        with self._lock:
+            if name not in self.stages:
+                self.stages[name] = StageMetrics(name=name)
+            return self.stages[name]
+
+    @contextmanager
+    def activate(self) -> Iterator["PipelineMetrics"]:
+        """Make this run the active one and time it."""
+        run_token = _CURRENT_RUN.set(self)
+        stage_token = _CURRENT_STAGE.set(None)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield self
+        finally:
+            self.wall_time += time.perf_counter() - wall_start
+            self.cpu_time += time.thread_time() - cpu_start
+            _CURRENT_STAGE.reset(stage_token)
+            _CURRENT_RUN.reset(run_token)
+
+    def totals(self) -> Dict[str, float]:
+        """Sum the counters of all steps."""
+        totals = {name: 0 for name in _PROMETHEUS_FIELDS}
+        for stage_metrics in self.stages.values():
+            for name in totals:
+                totals[name] += getattr(stage_metrics, name)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the run metrics as a JSON-serializable dict."""
+        return {
+            "run_id": self.run_id,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "totals": self.totals(),
+            "stages": [s.to_dict() for s in self.stages.values()],
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the run metrics in the Prometheus text exposition format."""
+        lines = []
+        run_label = f'run_id="{self.run_id}"'
+        for name, (suffix, help_text) in _PROMETHEUS_FIELDS.items():
+            metric = f"finmy_stage_{suffix}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for stage_metrics in self.stages.values():
+                value = getattr(stage_metrics, name)
+                lines.append(
+                    f'{metric}{{{run_label},stage="{stage_metrics.name}"}} {value}'
+                )
+        lines.append("# HELP finmy_run_wall_seconds Wall time of the pipeline run")
+        lines.append("# TYPE finmy_run_wall_seconds gauge")
+        lines.append(f"finmy_run_wall_seconds{{{run_label}}} {self.wall_time}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, save_dir: str) -> Dict[str, str]:
+        """Write `<run_id>.json` and `<run_id>.prom` into `save_dir`.
+
+        Returns:
+            Mapping of format ("json", "prometheus") to the written path.
+        """
+        os.makedirs(save_dir, exist_ok=True)
+        json_path = os.path.join(save_dir, f"{self.run_id}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        prom_path = os.path.join(save_dir, f"{self.run_id}.prom")
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        return {"json": json_path, "prometheus": prom_path}
+
+
+def current_run() -> Optional[PipelineMetrics]:
+    """Return the metrics of the active run, if any."""
+    return _CURRENT_RUN.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Optional[StageMetrics]]:
+    """Attribute the enclosed work to step `name` of the active run.
+
+    Yields the `StageMetrics` of the step, or None when no run is active.
+    """
+    run = _CURRENT_RUN.get()
+    if run is None:
+        yield None
+        return
+    stage_metrics = run.get_stage(name)
+    token = _CURRENT_STAGE.set(stage_metrics)
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield stage_metrics
+    finally:
+        stage_metrics.add(
+            wall_time=time.perf_counter() - wall_start,
+            cpu_time=time.thread_time() - cpu_start,
+            calls=1,
+        )
+        _CURRENT_STAGE.reset(token)
+
+
+def timed_stage(name: str) -> Callable:
+    """Decorator running the wrapped function inside `stage(name)`.
+
+    The number of items returned (length of a list or tuple result, 1 for any
+    other non-None result) is recorded as the step's items. Coroutine functions
+    are supported; their step then spans the awaited execution.
+    """
+
+    def _record_items(stage_metrics: Optional[StageMetrics], result: Any) -> None:
+        if stage_metrics is not None and result is not None:
+            count = len(result) if isinstance(result, (list, tuple)) else 1
+            stage_metrics.add(items=count)
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name) as stage_metrics:
+                    result = await fn(*args, **kwargs)
+                    _record_items(stage_metrics, result)
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name) as stage_metrics:
+                result = fn(*args, **kwargs)
+                _record_items(stage_metrics, result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """Submit `fn` to `executor` within a copy of the current context, so
+    that its counters are attributed to the current run and step."""
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+def _record(**counters: float) -> None:
+    stage_metrics = _CURRENT_STAGE.get()
+    if stage_metrics is not None:
+        stage_metrics.add(**counters)
+
+
+def record_items(count: int) -> None:
+    """Record items produced by the current step."""
+    _record(items=count)
+
+
+def record_bytes_read(count: int) -> None:
+    """Record bytes read from block storage."""
+    _record(bytes_read=count)
+
+
+def record_bytes_written(count: int) -> None:
+    """Record bytes written to block storage."""
+    _record(bytes_written=count)
+
+
+def record_db_rows(count: int) -> None:
+    """Record rows inserted into the database."""
+    _record(db_rows=count)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Record one cache lookup of the current step."""
+    if hit:
+        _record(cache_hits=1)
+    else:
+        _record(cache_misses=1)
+
+
+def estimate_tokens(text: Any) -> int:
+    """Roughly estimate the number of tokens of a text."""
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = str(text)
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def usage_tokens(prompt: Any, response: Any, usage: Any = None) -> Tuple[int, int]:
+    """Return the prompt and completion tokens of one LLM call.
+
+    Args:
+        prompt: Prompt text (or messages) sent to the model.
+        response: Text returned by the model.
+        usage: Optional token usage reported by the backend, as a dict or an
+            object with `prompt_tokens` / `completion_tokens` (or `input_tokens`
+            / `output_tokens`). Counts are estimated from the text otherwise.
+    """
+
+    def _usage_value(*names):
+        for name in names:
+            if isinstance(usage, dict) and usage.get(name) is not None:
+                return int(usage[name])
+            if usage is not None and getattr(usage, name, None) is not None:
+                return int(getattr(usage, name))
+        return None
+
+    prompt_tokens = _usage_value("prompt_tokens", "input_tokens")
+    completion_tokens = _usage_value("completion_tokens", "output_tokens")
+    return (
+        prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt),
+        (
+            completion_tokens
+            if completion_tokens is not None
+            else estimate_tokens(response)
+        ),
+    )
+
+
+def record_llm_call(prompt: Any, response: Any, usage: Any = None) -> None:
+    """Record one LLM call of the current step.
+
+    Args:
+        prompt: Prompt text (or messages) sent to the model.
+        response: Text returned by the model.
+        usage: Optional token usage reported by the backend; see `usage_tokens`.
+    """
+    if _CURRENT_STAGE.get() is None:
+        return
+    prompt_tokens, completion_tokens = usage_tokens(prompt, response, usage)
+    _record(
+        llm_calls=1,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+    )
+
+
+def record_llm_wait(seconds: float) -> None:
+    """Record time an LLM call of the current step waited for a slot."""
+    _record(llm_wait_time=seconds)
@@ -20,7 +20,6 @@ from .base import (
     PDFCollectorOutputSample,
     PDFCollectorOutput,
 )
-from .pdf_collector import PDFCollector
 
 __all__ = [
     "BasePDFCollector",
@@ -29,3 +28,12 @@ __all__ = [
     "PDFCollectorOutput",
     "PDFCollector",
 ]
+
+
+def __getattr__(name):
+    # PDFCollector pulls in PyPDF2 and requests; import it on first access
+    if name == "PDFCollector":
+        from .pdf_collector import PDFCollector
+
+        return PDFCollector
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
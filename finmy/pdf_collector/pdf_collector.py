@@ -7,7 +7,10 @@ This module contains the PDFCollector class which provides methods to parse PDF
 import os
 import json
 import time
+import uuid
+import shutil
 import logging
+from typing import List
 
 from .base import (
     BasePDFCollector,
@@ -202,3 +205,77 @@ class PDFCollector(BasePDFCollector):
             logging.info("  - Filtered information saved to: %s", filtered_info_path)
 
         return filtered_info
+
+    def run_files(
+        self,
+        pdf_paths: List[str],
+        keywords: List[str] = None,
+    ) -> PDFCollectorOutput:
+        """
+        Parse several individual PDF files as a single Mineru batch.
+
+        The files are staged (symlinked, or copied where symlinks are not
+        available) into a temporary directory under `output_dir`, which is
+        then processed like an input directory. The `Source` of each record is
+        mapped back to the original file path.
+
+        Args:
+            pdf_paths (List[str]): Paths of the PDF files to parse.
+            keywords (List[str], optional): Keywords used to filter the records.
+
+        Returns:
+            PDFCollectorOutput: Filtered results of all files.
+        """
+        if len(pdf_paths) == 1:
+            return self.run(
+                PDFCollectorInput(
+                    input_dir="",
+                    input_pdf_path=os.path.abspath(pdf_paths[0]),
+                    keywords=keywords or [],
+                )
+            )
+
+        # The Mineru helpers expect a directory of PDFs
+        staging_dir = os.path.join(
+            self.output_dir, f"_batch_temp_{uuid.uuid4().hex[:8]}"
+        )
+        os.makedirs(staging_dir, exist_ok=True)
+        # Staged file name -> original absolute path
+        staged_files = {}
+        try:
+            for pdf_path in pdf_paths:
+                src_path = os.path.abspath(pdf_path)
+                stem, ext = os.path.splitext(os.path.basename(src_path))
+                name = f"{stem}{ext}"
+                # Keep distinct names for files sharing a base name
+                suffix = 1
+                while name in staged_files:
+                    name = f"{stem}_{suffix}{ext}"
+                    suffix += 1
+                dest_path = os.path.join(staging_dir, name)
+                try:
+                    os.symlink(src_path, dest_path)
+                except OSError:
+                    shutil.copy2(src_path, dest_path)
+                staged_files[name] = src_path
+
+            logging.info(
+                "  - Staged %d PDF files into one batch: %s",
+                len(staged_files),
+                staging_dir,
+            )
+            output = self.run(
+                PDFCollectorInput(
+                    input_dir=staging_dir,
+                    input_pdf_path="",
+                    keywords=keywords or [],
+                )
+            )
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        for sample in output.records:
+            original = staged_files.get(os.path.basename(sample.Source))
+            if original:
+                sample.Source = original
+        return output
@@ -16,37 +16,161 @@ framework for financial data processing and knowledge extraction.
 """
 
 import os
+import time
 import uuid
+import queue
 import logging
+import threading
+import contextvars
+from dataclasses import dataclass, field
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
 from urllib.parse import urlparse
 
 import pytz
 
-from finmy.generic import RawData, UserQueryInput
+from finmy.generic import RawData, MetaSample, UserQueryInput, DataSample
 from finmy.converter import (
     write_text_data_to_block,
     raw_data_and_summarized_query_to_match_input,
     convert_to_build_input,
     match_output_to_meta_samples,
+    raw_data_to_meta_samples,
 )
 from finmy.db_manager import DataManager
-from finmy.builder.base import BuildInput, BaseBuilder
+from finmy.block_store import flush_block_stores
+from finmy.checkpoint import StageCheckpointer, stable_hash
+from finmy.dedup import ContentDeduplicator, content_fingerprint
+from finmy.context_packer import ContextPacker
+from finmy.llm_scheduler import configure_llm_scheduler
+from finmy.planner import DryRunPlanner, RunEstimate
+from finmy.incremental import QueryRunRecord, QueryRunStore, diff_meta_samples
+from finmy.result_cache import RunResultCache, source_fingerprint
+from finmy.metrics import (
+    PipelineMetrics,
+    stage as metrics_stage,
+    submit_with_context,
+    timed_stage,
+)
+from finmy.builder.base import BuildInput, BuildOutput, BaseBuilder
 from finmy.builder.registry import get as get_builder
 from finmy.summarizer.summarizer import BaseSummarizer
 from finmy.summarizer.registry import get as get_summarizer
 from finmy.matcher.base import MatchInput, SummarizedUserQuery, BaseMatcher
 from finmy.matcher.registry import get as get_matcher
 from finmy.pdf_collector import PDFCollectorOutput
-from finmy.pdf_collector.pdf_collector import PDFCollector
 from finmy.pdf_collector.base import PDFCollectorInput
 from finmy.url_collector.base import URLCollectorOutput, URLCollectorInput
-from finmy.url_collector.url_parser import URLParser
-from finmy.matcher.base import MatchOutput, MatchItem
 from finmy.converter import read_text_data_from_block
-from finmy.builder.agent_build import prompts as agent_build_prompts
+
+if TYPE_CHECKING:
+    # Collectors pull in PyPDF2 / Selenium and are imported on first use
+    from finmy.pdf_collector.pdf_collector import PDFCollector
+    from finmy.url_collector.url_parser import URLParser
+
+
+# ============================================================================
+# Batch Job Containers
+# ============================================================================
+
+
+@dataclass
+class PipelineJob:
+    """A single reconstruction job executed by `FinmyPipeline.run_batch`.
+
+    Fields:
+    - `query_text`: natural language query text
+    - `key_words`: keyword hints for the query
+    - `data_sources`: URLs or PDF paths collected through `lm_build_pipeline_main`
+    - `contents`: raw text contents built through `lm_build_pipeline_with_contents`;
+      used when `data_sources` is empty
+    - `job_id`: identifier of the job; a UUID is assigned when not given
+    - `resume`: whether valid stage checkpoints of a previous run are restored
+    """
+
+    query_text: str
+    key_words: List[str] = field(default_factory=list)
+    data_sources: List[str] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    job_id: Optional[str] = None
+    resume: bool = False
+
+
+@dataclass
+class PipelineJobResult:
+    """Result of one `PipelineJob`.
+
+    Fields:
+    - `job_id`: identifier of the job
+    - `build_output`: output of the builder, None when the job failed
+    - `save_dir`: directory where the builder saved this job's traces
+    - `time_cost`: wall time of the job in seconds
+    - `error`: error message when the job failed
+    - `metrics`: per-stage metrics of the job
+    """
+
+    job_id: str
+    build_output: Optional[BuildOutput] = None
+    save_dir: Optional[str] = None
+    time_cost: float = 0.0
+    error: Optional[str] = None
+    metrics: Optional[PipelineMetrics] = None
+
+
+@dataclass
+class BatchOutput:
+    """Output of `FinmyPipeline.run_batch`.
+
+    Fields:
+    - `results`: one `PipelineJobResult` per job, in the order of the input jobs
+    - `init_time`: seconds spent initializing the shared pipeline components,
+      including the warm-up of the summarizer, matcher and builder
+    - `total_time`: wall time of the whole batch in seconds
+    - `mean_job_time`: average wall time per job in seconds
+    - `num_succeeded` / `num_failed`: job counts by outcome
+    """
+
+    results: List[PipelineJobResult] = field(default_factory=list)
+    init_time: float = 0.0
+    total_time: float = 0.0
+    mean_job_time: float = 0.0
+    num_succeeded: int = 0
+    num_failed: int = 0
+
+
+@dataclass
+class BuilderRunResult:
+    """Result of one builder of `FinmyPipeline.lm_build_pipeline_fanout`.
+
+    Fields:
+    - `builder_type`: type of the builder
+    - `build_output`: output of the builder, None when it failed
+    - `save_dir`: directory where the builder saved its traces
+    - `latency`: wall time of the builder in seconds
+    - `llm_calls`: LLM calls issued by the builder
+    - `prompt_tokens` / `completion_tokens`: LLM tokens used by the builder
+    - `error`: error message when the builder failed
+    """
+
+    builder_type: str
+    build_output: Optional[BuildOutput] = None
+    save_dir: Optional[str] = None
+    latency: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    error: Optional[str] = None
+
+
+# Work modules created before the jobs of a batch start
+BATCH_WARMUP_COMPONENTS = ["summarizer", "matcher", "builder"]
 
 
 # ============================================================================
@@ -87,35 +211,140 @@ class FinmyPipeline:
         # stateful modules
         self.logger: Optional[logging.Logger] = None
         self.data_manager: Optional[DataManager] = None
-
-        # Work modules
-        self.pdf_collector: Optional[PDFCollector] = None
-        self.url_collector: Optional[URLParser] = None
-        self.summarizer: Optional[BaseSummarizer] = None
-        self.matcher: Optional[BaseMatcher] = None
-        self.builder: Optional[BaseBuilder] = None
+        self.deduplicator: Optional[ContentDeduplicator] = None
+        self.query_runs: Optional[QueryRunStore] = None
+        self.result_cache: Optional[RunResultCache] = None
+        # Holds `last_metrics` per thread, so that concurrent runs do not mix
+        self._metrics_local = threading.local()
+
+        # Work modules, created lazily on first use (see `warmup`)
+        self._components: Dict[str, object] = {}
+        self._components_lock = threading.RLock()
+
+        # Seconds spent in `initialize`, reported by `run_batch`
+        start_time = time.time()
         self.initialize()
+        self.init_time = time.time() - start_time
 
     def initialize(self):
         """
         Initialize the pipeline components.
 
-        This method sets up logging, data manager, and component factories.
+        This method sets up logging and the data manager. The work modules
+        (collectors, summarizer, matcher, builder) are created on first use,
+        so a content-only run never loads the PDF/URL collectors; call
+        `warmup` to create them upfront in long-lived services.
         """
         # Initialize the Stateful modules
         self.logger = self.setup_logging()
         self.data_manager = DataManager(self.db_config)
-
-        # Initialize the Work modules
-        self.pdf_collector = PDFCollector(self.pdf_collector_config)
-        self.url_collector = URLParser(self.url_collector_config)
-        self.summarizer = self._create_summarizer()
-        if self.matcher_config["use_matcher"]:
-            self.matcher = self._create_matcher()
-        else:
+        self.deduplicator = self._create_deduplicator()
+        self.query_runs = self._create_query_run_store()
+        self.result_cache = self._create_result_cache()
+        # LLM rate limits are process-wide: shared by all pipelines and stages
+        if "llm_scheduler_config" in self.config:
+            configure_llm_scheduler(self.config["llm_scheduler_config"])
+        if not self.matcher_config["use_matcher"]:
             self.logger.info("not using matcher")
-            self.matcher = None
-        self.builder = self._create_builder()
+
+    def warmup(self, components: Optional[List[str]] = None) -> Dict[str, float]:
+        """
+        Eagerly create the work modules, e.g. before serving requests.
+
+        Args:
+            components: Names of the modules to create, among ``"summarizer"``,
+                ``"matcher"``, ``"builder"``, ``"pdf_collector"``,
+                ``"url_collector"`` and ``"context_packer"``. Defaults to all
+                of them.
+
+        Returns:
+            Mapping of module name to the seconds spent creating it (0 when it
+            already existed).
+        """
+        timings = {}
+        for name in components or list(self._component_factories()):
+            start_time = time.time()
+            getattr(self, name)
+            timings[name] = time.time() - start_time
+        self.logger.info("Warmup finished: %s", timings)
+        return timings
+
+    def _component_factories(self) -> Dict[str, Callable[[], object]]:
+        """Factories of the lazily created work modules, by attribute name."""
+        return {
+            "summarizer": self._create_summarizer,
+            "matcher": self._create_matcher,
+            "builder": self._create_builder,
+            "pdf_collector": self._create_pdf_collector,
+            "url_collector": self._create_url_collector,
+            "context_packer": self._create_context_packer,
+        }
+
+    def _get_component(self, name: str):
+        """Return work module `name`, creating it on first access."""
+        if name not in self._components:
+            with self._components_lock:
+                if name not in self._components:
+                    start_time = time.time()
+                    self._components[name] = self._component_factories()[name]()
+                    self.logger.info(
+                        "Created %s in %.2fs", name, time.time() - start_time
+                    )
+        return self._components[name]
+
+    @property
+    def summarizer(self) -> BaseSummarizer:
+        """Lazily created summarizer."""
+        return self._get_component("summarizer")
+
+    @summarizer.setter
+    def summarizer(self, value: BaseSummarizer):
+        self._components["summarizer"] = value
+
+    @property
+    def matcher(self) -> Optional[BaseMatcher]:
+        """Lazily created matcher (None when ``use_matcher`` is disabled)."""
+        return self._get_component("matcher")
+
+    @matcher.setter
+    def matcher(self, value: Optional[BaseMatcher]):
+        self._components["matcher"] = value
+
+    @property
+    def builder(self) -> BaseBuilder:
+        """Lazily created builder."""
+        return self._get_component("builder")
+
+    @builder.setter
+    def builder(self, value: BaseBuilder):
+        self._components["builder"] = value
+
+    @property
+    def pdf_collector(self) -> "PDFCollector":
+        """Lazily created PDF collector."""
+        return self._get_component("pdf_collector")
+
+    @pdf_collector.setter
+    def pdf_collector(self, value: "PDFCollector"):
+        self._components["pdf_collector"] = value
+
+    @property
+    def url_collector(self) -> "URLParser":
+        """Lazily created URL collector."""
+        return self._get_component("url_collector")
+
+    @url_collector.setter
+    def url_collector(self, value: "URLParser"):
+        self._components["url_collector"] = value
+
+    @property
+    def context_packer(self) -> Optional[ContextPacker]:
+        """Lazily created context packer (None when packing is disabled)."""
+        return self._get_component("context_packer")
+
+    @context_packer.setter
+    def context_packer(self, value: Optional[ContextPacker]):
+        self._components["context_packer"] = value
 
     # ------------------------------------------------------------------
     # Internal helpers for configurable component selection (Registry-based)
@@ -139,13 +368,16 @@ class FinmyPipeline:
                 )
         return get_summarizer(config)
 
-    def _create_matcher(self) -> BaseMatcher:
+    def _create_matcher(self) -> Optional[BaseMatcher]:
         """
         Factory for the matcher component using registry pattern.
 
         Returns:
-            A matcher instance based on ``matcher_type`` configuration.
+            A matcher instance based on ``matcher_type`` configuration, or None
+            when ``use_matcher`` is disabled.
         """
+        if not self.matcher_config["use_matcher"]:
+            return None
         config = self.matcher_config.copy()
         if "matcher_type" not in config:
             raise ValueError("matcher_config must contain 'matcher_type'")
@@ -153,6 +385,91 @@ class FinmyPipeline:
         self.logger.info("Creating matcher: %s", matcher_type)
         return get_matcher(config)
 
+    def _create_deduplicator(self) -> Optional[ContentDeduplicator]:
+        """
+        Create the content deduplicator from ``dedup_config``.
+
+        Returns None when deduplication is disabled or not configured.
+        """
+        dedup_config = self.config.get("dedup_config", {})
+        if not dedup_config.get("enabled", False):
+            return None
+        index_path = dedup_config.get(
+            "index_path", os.path.join(self.output_dir, "dedup.sqlite3")
+        )
+        if index_path:
+            os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        return ContentDeduplicator(
+            near_duplicate=dedup_config.get("near_duplicate", False),
+            simhash_threshold=int(dedup_config.get("simhash_threshold", 3)),
+            index_path=index_path,
+            max_cached_matches=int(dedup_config.get("max_cached_matches", 10000)),
+        )
+
+    def _create_query_run_store(self) -> Optional[QueryRunStore]:
+        """
+        Create the store of build records from ``incremental_config``.
+
+        Returns None when incremental builds are disabled or not configured.
+        """
+        incremental_config = self.config.get("incremental_config", {})
+        if not incremental_config.get("enabled", False):
+            return None
+        return QueryRunStore(
+            incremental_config.get(
+                "record_dir", os.path.join(self.output_dir, "query_runs")
+            )
+        )
+
+    def _create_result_cache(self) -> Optional[RunResultCache]:
+        """
+        Create the whole-run result cache from ``result_cache_config``.
+
+        Returns None when the cache is disabled or not configured.
+        """
+        result_cache_config = self.config.get("result_cache_config", {})
+        if not result_cache_config.get("enabled", False):
+            return None
+        return RunResultCache(
+            path=result_cache_config.get(
+                "path", os.path.join(self.output_dir, "cache", "runs.sqlite3")
+            ),
+            ttl_seconds=result_cache_config.get("ttl_seconds", 24 * 3600),
+            max_entries=result_cache_config.get("max_entries", 1000),
+        )
+
+    def _create_context_packer(self) -> Optional[ContextPacker]:
+        """
+        Create the builder context packer from ``context_config``.
+
+        Returns None when context packing is disabled or not configured.
+        """
+        context_config = self.config.get("context_config", {})
+        if not context_config.get("enabled", False):
+            return None
+        return ContextPacker(
+            token_budget=context_config["token_budget"],
+            weights=context_config.get("weights"),
+            encoding=context_config.get("encoding", "cl100k_base"),
+            logger=self.logger,
+        )
+
+    def _create_pdf_collector(self) -> "PDFCollector":
+        """
+        Factory for the PDF collector; requires ``MINERU_API_KEY``.
+        """
+        from finmy.pdf_collector.pdf_collector import PDFCollector
+
+        return PDFCollector(self._resolve_pdf_collector_config())
+
+    def _create_url_collector(self) -> "URLParser":
+        """
+        Factory for the URL collector.
+        """
+        from finmy.url_collector.url_parser import URLParser
+
+        return URLParser(self._resolve_url_collector_config())
+
     def _create_builder(self) -> BaseBuilder:
         """
         Factory for the builder component using registry pattern.
@@ -160,7 +477,14 @@ class FinmyPipeline:
         Returns:
             A builder instance based on ``builder_type`` configuration.
         """
-        config = self.builder_config
+        builder = self._create_builder_from_config(self.builder_config)
+        self.save_builder_dir_path = builder.save_dir
+        return builder
+
+    def _create_builder_from_config(self, config: dict) -> BaseBuilder:
+        """
+        Create a builder from a complete builder configuration.
+        """
         if "builder_type" not in config:
             # Fallback to "type" if "builder_type" is not present
             if "type" in config:
@@ -170,9 +494,7 @@ class FinmyPipeline:
         if "output_dir" not in config:
             config["output_dir"] = self.output_dir
         
-        builder = get_builder(config)
-        self.save_builder_dir_path = builder.save_dir
-        return builder
+        return get_builder(config)
 
     def setup_logging(self) -> logging.Logger:
         """
@@ -221,6 +543,7 @@ class FinmyPipeline:
         logger.info("Logging initialized. Log file: %s", log_file)
         return logger
 
+    @timed_stage("collect")
     def create_raw_data_records(self, texts: List[str]) -> List[RawData]:
         """
         Convert raw text content into RawData objects and store them in block storage.
@@ -233,6 +556,11 @@ class FinmyPipeline:
         """
         raw_data_records = []
         for text in texts:
+            # Reuse the record of an already ingested copy of this text
+            duplicate = self._find_duplicate(text)
+            if duplicate is not None:
+                raw_data_records.append(duplicate)
+                continue
             # Write content to block storage
             filename = write_text_data_to_block(text)
             # Create RawData object
@@ -247,7 +575,7 @@ class FinmyPipeline:
                 tag="",
                 method="mock_input",
             )
-            raw_data_records.append(raw_data)
+            raw_data_records.append(self._register_content(text, raw_data))
         return raw_data_records
 
     def create_raw_data_from_pdf_output(
@@ -263,6 +591,11 @@ class FinmyPipeline:
         for sample in pdf_output.records:
             # sample.Location is already a markdown file path produced by PDFCollector
             # We treat it as the storage location for the raw content.
+            content = self._read_content_for_dedup(sample.Location)
+            duplicate = self._find_duplicate(content)
+            if duplicate is not None:
+                raw_data_records.append(duplicate)
+                continue
             time_str = sample.Time or datetime.now(pytz.UTC).strftime(
                 "%Y-%m-%d %H:%M:%S %Z"
             )
@@ -276,7 +609,7 @@ class FinmyPipeline:
                 method=sample.Method or "PDFCollector",
                 tag=sample.Tag or "",
             )
-            raw_data_records.append(raw_data)
+            raw_data_records.append(self._register_content(content, raw_data))
         return raw_data_records
 
     def create_raw_data_from_url_output(
@@ -302,6 +635,12 @@ class FinmyPipeline:
             if not content:
                 continue
 
+            # Reuse the record of an already ingested copy of this page
+            duplicate = self._find_duplicate(content)
+            if duplicate is not None:
+                raw_data_records.append(duplicate)
+                continue
+
             # Persist the cleaned content into block storage
             filename = write_text_data_to_block(content)
 
@@ -317,10 +656,11 @@ class FinmyPipeline:
                 method="URLParser",
                 tag="url",
             )
-            raw_data_records.append(raw_data)
+            raw_data_records.append(self._register_content(content, raw_data))
 
         return raw_data_records
 
+    @timed_stage("store_raw_data")
     def store_raw_data(self, raw_data_records: List[RawData]) -> None:
         """
         Store RawData objects in the database.
@@ -329,10 +669,21 @@ class FinmyPipeline:
             raw_data_records: List of RawData objects to be stored
         """
         self.logger.info("Writing and saving RawData objects...")
-        self.data_manager.insert_raw_data_batch(raw_data_records)
+        # Persist the block records before their locations reach the database
+        flush_block_stores()
+        new_records = self._unstored_raw_data(raw_data_records)
+        if len(new_records) < len(raw_data_records):
+            self.logger.info(
+                "Skipping %d RawData objects already in database",
+                len(raw_data_records) - len(new_records),
+            )
+        self.data_manager.insert_raw_data_batch(new_records)
+        if self.deduplicator is not None:
+            self.deduplicator.mark_raw_data_stored(new_records)
         self.logger.info("RawData objects saved successfully")
         self.logger.info("=" * 25)
 
+    @timed_stage("user_query")
     def create_and_store_user_query(
         self,
         query_text: str,
@@ -350,6 +701,7 @@ class FinmyPipeline:
         """
         self.logger.info("Creating user query input object...")
         user_query_input = UserQueryInput(
+            user_query_id=str(uuid.uuid4()),
             query_text=query_text,
             key_words=key_words,
         )
@@ -360,6 +712,7 @@ class FinmyPipeline:
         self.logger.info("=" * 25)
         return user_query_input
 
+    @timed_stage("summarize")
     def summarize_user_query(
         self, user_query_input: UserQueryInput
     ) -> SummarizedUserQuery:
@@ -373,11 +726,12 @@ class FinmyPipeline:
             SummarizedUserQuery object containing the summarized query
         """
         self.logger.info("Generating summarized query using Summarizer...")
-        summarized_query = self.summarizer.summarize(user_query_input)
+        summarized_query = self.summarizer.run(user_query_input)
         self.logger.info("Summarized query created: %s", summarized_query)
         self.logger.info("=" * 25)
         return summarized_query
 
+    @timed_stage("match_input")
     def match_raw_data_with_query(
         self, raw_data: RawData, summarized_query: SummarizedUserQuery
     ) -> MatchInput:
@@ -402,6 +756,7 @@ class FinmyPipeline:
         self.logger.info("=" * 25)
         return match_input
 
+    @timed_stage("llm_matching")
     def perform_llm_matching(self, match_input: MatchInput):
         """
         Perform matching using LLM matcher.
@@ -417,6 +772,7 @@ class FinmyPipeline:
         self.logger.info("=" * 25)
         return match_output
 
+    @timed_stage("meta_samples")
     def create_meta_samples(self, match_output, raw_data: RawData):
         """
         Convert match output into meta samples.
@@ -439,6 +795,7 @@ class FinmyPipeline:
         self.logger.info("=" * 25)
         return meta_samples
 
+    @timed_stage("store_meta_samples")
     def store_meta_samples(self, meta_samples) -> None:
         """
         Store meta samples in the database.
@@ -447,10 +804,18 @@ class FinmyPipeline:
             meta_samples: List of MetaSample objects to be stored
         """
         self.logger.info("Saving meta_samples to database...")
+        # Persist the block records before their locations reach the database
+        flush_block_stores()
+        if self.deduplicator is not None:
+            # Meta samples reused from the match cache are already stored
+            meta_samples = self.deduplicator.unstored_meta_samples(meta_samples)
         self.data_manager.insert_meta_samples(meta_samples)
+        if self.deduplicator is not None:
+            self.deduplicator.mark_meta_samples_stored(meta_samples)
         self.logger.info("Meta samples saved successfully")
         self.logger.info("=" * 25)
 
+    @timed_stage("build_input")
     def create_build_input(
         self, user_query_input: UserQueryInput, meta_samples
     ) -> BuildInput:
@@ -472,6 +837,8 @@ class FinmyPipeline:
             meta_samples=meta_samples,
             extras={},
         )
+        if self.context_packer is not None:
+            build_input.samples = self.pack_context(build_input)
         self.logger.info(
             "BuildInput object created: query_text: %s, key_words: %s, use samples: %s",
             build_input.user_query.query_text,
@@ -481,6 +848,118 @@ class FinmyPipeline:
         self.logger.info("=" * 25)
         return build_input
 
+    @timed_stage("pack_context")
+    def pack_context(self, build_input: BuildInput) -> List[DataSample]:
+        """
+        Select the most relevant samples of `build_input` that fit the
+        builder token budget (see `finmy.context_packer`).
+
+        Args:
+            build_input: BuildInput holding every matched sample
+
+        Returns:
+            The selected samples, in their original order
+        """
+        self.logger.info("Packing builder context...")
+        return self.context_packer.pack(build_input.user_query, build_input.samples)
+
+    # ------------------------------------------------------------------
+    # Internal helpers for content deduplication
+    # ------------------------------------------------------------------
+
+    def _find_duplicate(self, content: Optional[str]) -> Optional[RawData]:
+        """
+        Return the RawData of an already ingested copy of `content`, if any.
+        """
+        if self.deduplicator is None or not content:
+            return None
+        duplicate = self.deduplicator.lookup(content)
+        if duplicate is not None:
+            self.logger.info(
+                "Reusing RawData %s for duplicate content", duplicate.raw_data_id
+            )
+        return duplicate
+
+    def _register_content(self, content: Optional[str], raw_data: RawData) -> RawData:
+        """
+        Register `raw_data` as the canonical record of `content`.
+
+        Returns:
+            The canonical record for `content`
+        """
+        if self.deduplicator is None or not content:
+            return raw_data
+        return self.deduplicator.register(content, raw_data)
+
+    @staticmethod
+    def _read_location(location: str) -> str:
+        """
+        Read the content at `location`, a file path or a block key.
+        """
+        if os.path.isfile(location):
+            with open(location, "r", encoding="utf-8") as f:
+                return f.read()
+        return read_text_data_from_block(location)
+
+    def _read_content_for_dedup(self, location: str) -> Optional[str]:
+        """
+        Read the content at `location` (file path or block key) for
+        fingerprinting; returns None when deduplication is disabled or the
+        content cannot be read.
+        """
+        if self.deduplicator is None or not location:
+            return None
+        try:
+            return self._read_location(location)
+        except Exception as e:
+            self.logger.warning("Cannot read %s for deduplication: %s", location, e)
+            return None
+
+    def _raw_data_fingerprint(self, raw_data_records: List[RawData]) -> list:
+        """
+        Pair the ID of every raw data record with the hash of its content;
+        hashed into the checkpoint keys of the stages using the records, so
+        that they are recomputed when a source's content changes.
+        """
+        fingerprint = []
+        for raw_data in raw_data_records:
+            try:
+                content = stable_hash(self._read_location(raw_data.location))
+            except Exception as e:
+                self.logger.warning(
+                    "Cannot read %s for checkpointing: %s", raw_data.location, e
+                )
+                content = raw_data.location
+            fingerprint.append([raw_data.raw_data_id, content])
+        return fingerprint
+
+    def _unstored_raw_data(self, raw_data_records: List[RawData]) -> List[RawData]:
+        """
+        Drop repeated records and records already written to the database.
+        """
+        unique_records = list(
+            {raw_data.raw_data_id: raw_data for raw_data in raw_data_records}.values()
+        )
+        if self.deduplicator is None:
+            return unique_records
+        return self.deduplicator.unstored_raw_data(unique_records)
+
+    def _query_signature(self, summarized_query: SummarizedUserQuery) -> str:
+        """
+        Hash the parts of the summarized query and matcher configuration that
+        determine the match output.
+        """
+        matcher_config = {
+            k: v for k, v in self.matcher_config.items() if k != "max_concurrency"
+        }
+        return stable_hash(
+            {
+                "summarization": summarized_query.summarization,
+                "key_words": summarized_query.key_words,
+                "matcher_config": matcher_config,
+            }
+        )
+
     def _is_url(self, source: str) -> bool:
         """
         Check if a source string is a URL.
@@ -512,22 +991,15 @@ class FinmyPipeline:
         """
         return source.lower().endswith(".pdf")
 
-    def _collect_data_from_sources(
-        self,
-        data_sources: List[str],
-        pdf_collector_config: Optional[dict] = None,
-        url_collector_config: Optional[dict] = None,
-    ) -> List[RawData]:
+    def _split_data_sources(self, data_sources: List[str]):
         """
-        Collect data from URLs or PDF paths using collectors.
+        Separate data sources into URLs and PDF paths (files or directories).
 
         Args:
             data_sources: List of URLs or PDF file paths
-            pdf_collector_config: Optional configuration for PDF collector
-            url_collector_config: Optional configuration for URL collector
 
         Returns:
-            List of RawData objects created from collected data
+            Tuple of (urls, pdf_paths)
         """
         urls = []
         pdf_paths = []
@@ -553,88 +1025,247 @@ class FinmyPipeline:
                         self.logger.warning(
                             "Warning: Unknown source type: %s, skipping...", source
                         )
+        return urls, pdf_paths
 
-        raw_data_records: List[RawData] = []
+    def _resolve_pdf_collector_config(
+        self, pdf_collector_config: Optional[dict] = None
+    ) -> dict:
+        """
+        Fill in the defaults of the PDF collector configuration.
 
-        # Process PDFs
-        if pdf_paths:
-            # Default PDF collector config
-            # Use collector_config from self.config as base
-            default_pdf_config = self.pdf_collector_config
-
-            # Ensure output_dir is set if not present
-            if "output_dir" not in default_pdf_config:
-                default_pdf_config["output_dir"] = os.path.join(
-                    self.config["save_folder"], "pdf_collector_output"
-                )
+        Args:
+            pdf_collector_config: Optional configuration overriding the defaults
 
-            # Set other defaults if not present
-            if "batch_size" not in default_pdf_config:
-                default_pdf_config["batch_size"] = 200
-            if "language" not in default_pdf_config:
-                default_pdf_config["language"] = "ch"
-            if "check_pdf_limits" not in default_pdf_config:
-                default_pdf_config["check_pdf_limits"] = True
-            if "env_file" not in default_pdf_config:
-                default_pdf_config["env_file"] = ".env"
-
-            if pdf_collector_config:
-                default_pdf_config.update(pdf_collector_config)
-
-            pdf_collector = PDFCollector(default_pdf_config)
-
-            # Group PDF paths: if it's a directory, use input_dir;
-            # if it's a file, use input_pdf_path
-            pdf_dirs = [p for p in pdf_paths if os.path.isdir(p)]
-            pdf_files = [p for p in pdf_paths if os.path.isfile(p)]
-
-            # Process directories
-            for pdf_dir in pdf_dirs:
-                pdf_input = PDFCollectorInput(
-                    input_dir=pdf_dir,
-                    input_pdf_path="",
-                    keywords=[],
-                )
-                pdf_output = pdf_collector.run(pdf_input)
-                raw_data_records.extend(
-                    self.create_raw_data_from_pdf_output(pdf_output)
-                )
+        Returns:
+            The resolved PDF collector configuration
+        """
+        # Default PDF collector config
+        # Use collector_config from self.config as base
+        default_pdf_config = self.pdf_collector_config
+
+        # Ensure output_dir is set if not present
+        if "output_dir" not in default_pdf_config:
+            default_pdf_config["output_dir"] = os.path.join(
+                self.config["save_folder"], "pdf_collector_output"
+            )
 
-            # Process individual PDF files
-            for pdf_file in pdf_files:
-                pdf_input = PDFCollectorInput(
-                    input_dir="",
-                    input_pdf_path=os.path.abspath(pdf_file),
-                    keywords=[],
-                )
-                pdf_output = pdf_collector.run(pdf_input)
-                raw_data_records.extend(
-                    self.create_raw_data_from_pdf_output(pdf_output)
-                )
+        # Set other defaults if not present
+        if "batch_size" not in default_pdf_config:
+            default_pdf_config["batch_size"] = 200
+        if "language" not in default_pdf_config:
+            default_pdf_config["language"] = "ch"
+        if "check_pdf_limits" not in default_pdf_config:
+            default_pdf_config["check_pdf_limits"] = True
+        if "env_file" not in default_pdf_config:
+            default_pdf_config["env_file"] = ".env"
+
+        if pdf_collector_config:
+            default_pdf_config.update(pdf_collector_config)
+        return default_pdf_config
+
+    def _resolve_url_collector_config(
+        self, url_collector_config: Optional[dict] = None
+    ) -> dict:
+        """
+        Fill in the defaults of the URL collector configuration.
+
+        Args:
+            url_collector_config: Optional configuration overriding the defaults
+
+        Returns:
+            The resolved URL collector configuration
+        """
+        # Default URL collector config
+        # Use collector_config from self.config as base
+        default_url_config = self.url_collector_config
+
+        # Set defaults if not present
+        if "delay" not in default_url_config:
+            default_url_config["delay"] = 1.0
+        if "use_selenium_fallback" not in default_url_config:
+            default_url_config["use_selenium_fallback"] = True
+        if "selenium_wait_time" not in default_url_config:
+            default_url_config["selenium_wait_time"] = 5
+
+        if url_collector_config:
+            default_url_config.update(url_collector_config)
+        return default_url_config
+
+    def _get_pdf_collector(
+        self, pdf_collector_config: Optional[dict] = None
+    ) -> "PDFCollector":
+        """
+        Return the PDF collector for `pdf_collector_config`.
+
+        The collector created by `initialize` is reused unless the resolved
+        configuration changes its parser settings.
+        """
+        config = self._resolve_pdf_collector_config(pdf_collector_config)
+        collector = self._components.get("pdf_collector")
+        if collector is None or (
+            collector.output_dir,
+            collector.batch_size,
+            collector.language,
+            collector.check_pdf_limits,
+        ) != (
+            config["output_dir"],
+            config["batch_size"],
+            config["language"],
+            config["check_pdf_limits"],
+        ):
+            from finmy.pdf_collector.pdf_collector import PDFCollector
+
+            collector = PDFCollector(config)
+            self.pdf_collector = collector
+        return collector
+
+    def _iter_pdf_sources(
+        self, pdf_paths: List[str], pdf_collector_config: Optional[dict] = None
+    ) -> Iterator[RawData]:
+        """
+        Parse PDF directories and files, yielding RawData per Mineru batch.
+
+        Each directory is one batch; all individual files are submitted
+        together as a single batch.
+        """
+        if not pdf_paths:
+            return
+        pdf_collector = self._get_pdf_collector(pdf_collector_config)
+
+        # Group PDF paths: directories are parsed one by one, individual
+        # files are parsed together
+        pdf_dirs = [p for p in pdf_paths if os.path.isdir(p)]
+        pdf_files = [p for p in pdf_paths if os.path.isfile(p)]
+
+        # Process directories
+        for pdf_dir in pdf_dirs:
+            pdf_input = PDFCollectorInput(
+                input_dir=pdf_dir,
+                input_pdf_path="",
+                keywords=[],
+            )
+            pdf_output = pdf_collector.run(pdf_input)
+            yield from self.create_raw_data_from_pdf_output(pdf_output)
+
+        # Process individual PDF files as one batch
+        if pdf_files:
+            pdf_output = pdf_collector.run_files(pdf_files)
+            yield from self.create_raw_data_from_pdf_output(pdf_output)
+
+    def _iter_url_sources(
+        self, urls: List[str], url_collector_config: Optional[dict] = None
+    ) -> Iterator[RawData]:
+        """
+        Fetch and parse URLs one by one, yielding each RawData as soon as its
+        page has been parsed.
+        """
+        if not urls:
+            return
+        self._resolve_url_collector_config(url_collector_config)
+        url_input = URLCollectorInput(
+            urls=urls,
+            extras={},
+        )
+        # The collector spaces its requests to avoid being blocked
+        for url_output in self.url_collector.iter_run(url_input):
+            yield from self.create_raw_data_from_url_output(url_output)
+
+    def _iter_data_from_sources(
+        self,
+        data_sources: List[str],
+        pdf_collector_config: Optional[dict] = None,
+        url_collector_config: Optional[dict] = None,
+    ) -> Iterator[RawData]:
+        """
+        Collect data from URLs or PDF paths, yielding each RawData as soon as
+        its source has been processed.
+
+        When both PDFs and URLs are given, the two collectors run concurrently
+        and records are yielded in completion order.
+
+        Args:
+            data_sources: List of URLs or PDF file paths
+            pdf_collector_config: Optional configuration for PDF collector
+            url_collector_config: Optional configuration for URL collector
 
-        # Process URLs
+        Yields:
+            RawData objects created from collected data
+        """
+        urls, pdf_paths = self._split_data_sources(data_sources)
+        branches = []
+        if pdf_paths:
+            branches.append(
+                lambda: self._iter_pdf_sources(pdf_paths, pdf_collector_config)
+            )
         if urls:
-            # Default URL collector config
-            # Use collector_config from self.config as base
-            default_url_config = self.url_collector_config
+            branches.append(lambda: self._iter_url_sources(urls, url_collector_config))
+
+        if len(branches) < 2:
+            for branch in branches:
+                yield from branch()
+            return
+
+        records: "queue.Queue" = queue.Queue()
+        # Marks the end of one collector branch on the records queue
+        end_of_branch = object()
+        errors: List[BaseException] = []
+
+        def _drain(branch):
+            try:
+                for raw_data in branch():
+                    records.put(raw_data)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                records.put(end_of_branch)
+
+        with ThreadPoolExecutor(max_workers=len(branches)) as executor:
+            for branch in branches:
+                submit_with_context(executor, _drain, branch)
+            remaining = len(branches)
+            while remaining:
+                raw_data = records.get()
+                if raw_data is end_of_branch:
+                    remaining -= 1
+                else:
+                    yield raw_data
+
+        if errors:
+            raise errors[0]
+
+    @timed_stage("collect")
+    def _collect_data_from_sources(
+        self,
+        data_sources: List[str],
+        pdf_collector_config: Optional[dict] = None,
+        url_collector_config: Optional[dict] = None,
+    ) -> List[RawData]:
+        """
+        Collect data from URLs or PDF paths using collectors.
 
-            # Set defaults if not present
-            if "delay" not in default_url_config:
-                default_url_config["delay"] = 1.0
-            if "use_selenium_fallback" not in default_url_config:
-                default_url_config["use_selenium_fallback"] = True
-            if "selenium_wait_time" not in default_url_config:
-                default_url_config["selenium_wait_time"] = 5
+        The PDF and URL collectors run concurrently, so a mixed-source job
+        takes the time of the slowest collector. Records keep a stable order:
+        PDFs first, then URLs.
 
-            if url_collector_config:
-                default_url_config.update(url_collector_config)
+        Args:
+            data_sources: List of URLs or PDF file paths
+            pdf_collector_config: Optional configuration for PDF collector
+            url_collector_config: Optional configuration for URL collector
 
-            url_input = URLCollectorInput(
-                urls=urls,
-                extras={},
+        Returns:
+            List of RawData objects created from collected data
+        """
+        urls, pdf_paths = self._split_data_sources(data_sources)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pdf_future = submit_with_context(
+                executor,
+                list, self._iter_pdf_sources(pdf_paths, pdf_collector_config)
             )
-            url_output = self.url_collector.run(url_input)
-            raw_data_records.extend(self.create_raw_data_from_url_output(url_output))
+            url_future = submit_with_context(
+                executor,
+                list, self._iter_url_sources(urls, url_collector_config)
+            )
+            raw_data_records: List[RawData] = pdf_future.result() + url_future.result()
 
         if not raw_data_records:
             raise ValueError(
@@ -644,161 +1275,1443 @@ class FinmyPipeline:
 
         return raw_data_records
 
+    def _match_single_raw_data(
+        self, raw_data: RawData, summarized_query: SummarizedUserQuery
+    ) -> List[MetaSample]:
+        """
+        Match one raw data record against the summarized query.
+
+        Args:
+            raw_data: Raw data record to match
+            summarized_query: Summarized user query
+
+        Returns:
+            List of meta samples generated for this raw data record
+        """
+        query_signature = None
+        if self.deduplicator is not None:
+            # Skip documents already matched against the same query
+            query_signature = self._query_signature(summarized_query)
+            cached = self.deduplicator.get_matches(
+                raw_data.raw_data_id, query_signature
+            )
+            if cached is not None:
+                self.logger.info(
+                    "Reusing match results of RawData %s", raw_data.raw_data_id
+                )
+                return list(cached)
+        match_input = self.match_raw_data_with_query(raw_data, summarized_query)
+        match_output = self.perform_llm_matching(match_input)
+        meta_samples = self.create_meta_samples(match_output, raw_data)
+        if query_signature is not None:
+            self.deduplicator.put_matches(
+                raw_data.raw_data_id, query_signature, meta_samples
+            )
+        return meta_samples
+
+    def _passthrough_raw_data(self, raw_data: RawData) -> List[MetaSample]:
+        """
+        Turn a whole raw data record into meta samples without matching;
+        the samples reference the block of the record.
+
+        Args:
+            raw_data: Raw data record to convert
+
+        Returns:
+            List of meta samples covering the full content of the record
+        """
+        return raw_data_to_meta_samples(
+            raw_data,
+            category="Financial Risk Control",
+            knowledge_field="Artificial Intelligence",
+        )
+
     def _process_matching(
         self, raw_data_records: List[RawData], summarized_query: SummarizedUserQuery
     ) -> List:
         """
         Process matching for raw data records against summarized query.
 
+        When ``matcher_config["max_concurrency"]`` is larger than 1, the records
+        are matched by a bounded thread pool. In both modes the meta samples keep
+        the order of ``raw_data_records``, and a failure on one record is logged
+        and skipped instead of aborting the whole run.
+
         Args:
             raw_data_records: List of raw data records to match
             summarized_query: Summarized user query
 
         Returns:
             List of meta samples generated from matching
+
+        Raises:
+            RuntimeError: If matching failed for every raw data record.
         """
         meta_samples = []
         use_matcher = self.matcher_config["use_matcher"]
         if use_matcher:
-            for raw_data in raw_data_records:
-                match_input = self.match_raw_data_with_query(raw_data, summarized_query)
-                match_output = self.perform_llm_matching(match_input)
-                meta_sample = self.create_meta_samples(match_output, raw_data)
-                meta_samples += meta_sample
+            max_concurrency = int(self.matcher_config.get("max_concurrency", 1))
+            # One result slot per record so that the output order follows the input
+            results: List[Optional[List[MetaSample]]] = [None] * len(raw_data_records)
+            failures = 0
+            if max_concurrency > 1 and len(raw_data_records) > 1:
+                self.logger.info(
+                    "Matching %d raw data records with max_concurrency=%d",
+                    len(raw_data_records),
+                    max_concurrency,
+                )
+                with ThreadPoolExecutor(
+                    max_workers=min(max_concurrency, len(raw_data_records))
+                ) as executor:
+                    futures = {
+                        submit_with_context(
+                            executor,
+                            self._match_single_raw_data,
+                            raw_data,
+                            summarized_query,
+                        ): idx
+                        for idx, raw_data in enumerate(raw_data_records)
+                    }
+                    for future in as_completed(futures):
+                        idx = futures[future]
+                        try:
+                            results[idx] = future.result()
+                        except Exception as e:
+                            failures += 1
+                            self.logger.error(
+                                "Matching failed for raw data %s: %s: %s",
+                                raw_data_records[idx].raw_data_id,
+                                type(e).__name__,
+                                e,
+                            )
+            else:
+                for idx, raw_data in enumerate(raw_data_records):
+                    try:
+                        results[idx] = self._match_single_raw_data(
+                            raw_data, summarized_query
+                        )
+                    except Exception as e:
+                        failures += 1
+                        self.logger.error(
+                            "Matching failed for raw data %s: %s: %s",
+                            raw_data.raw_data_id,
+                            type(e).__name__,
+                            e,
+                        )
+
+            if raw_data_records and failures == len(raw_data_records):
+                raise RuntimeError(
+                    f"Matching failed for all {failures} raw data records."
+                )
+            if failures:
+                self.logger.warning(
+                    "Matching failed for %d of %d raw data records",
+                    failures,
+                    len(raw_data_records),
+                )
+            for meta_sample in results:
+                if meta_sample:
+                    meta_samples += meta_sample
         else:
             self.logger.info("not using matcher")
             for raw_data in raw_data_records:
-                content = read_text_data_from_block(raw_data.location)
-                mock_match_output = MatchOutput(
-                    items=[
-                        MatchItem(
-                            paragraph=content,
-                            start=0,
-                            end=len(content),
-                        )
-                    ],
-                )
-                meta_sample = self.create_meta_samples(mock_match_output, raw_data)
-                meta_samples += meta_sample
+                meta_samples += self._passthrough_raw_data(raw_data)
 
         return meta_samples
 
-    def lm_build_pipeline_main(
+    def _stream_collect_and_match(
         self,
         data_sources: List[str],
-        query_text: str,
-        key_words: List[str],
-    ):
+        user_query_input: UserQueryInput,
+        streamed_raw_data: Optional[List[RawData]] = None,
+    ) -> List[MetaSample]:
         """
-        Main function that orchestrates the complete data processing workflow.
+        Collect, store and match raw data as a streaming producer/consumer chain.
 
-        This function executes the following steps:
-        1. Initialize data manager
-        2. Collect data from URLs or PDF paths using collectors
-        3. Create and store raw data records
-        4. Create and store user query input
-        5. Summarize user query
-        6. Match raw data with summarized query
-        7. Generate meta samples from match results
-        8. Store meta samples
-        9. Create build input for downstream processing
-        10. Run the configured builder to get the final build output.
+        A collector thread pushes each RawData into a bounded queue as soon as
+        its source finishes. The calling thread summarizes the user query while
+        collection runs, then stores every record and hands it to the matcher
+        pool, which holds at most ``queue_size`` records in flight. Memory is
+        therefore bounded by the queue size rather than by the corpus size.
+        Records are written to the database in batches of
+        ``insert_batch_size``, or after ``insert_interval`` seconds, so the
+        block store is flushed once per batch rather than once per record.
 
         Args:
-            data_sources: List of URLs or PDF file paths to collect data from
-            query_text: Natural language query text
-            key_words: List of keywords for the query
-            pdf_collector_config: Optional configuration dict for PDF collector
-            url_collector_config: Optional configuration dict for URL collector
+            data_sources: List of URLs or PDF file paths
+            user_query_input: Stored user query input
+            streamed_raw_data: Optional list to which every distinct streamed
+                raw data record is appended
 
         Returns:
-            The build output object produced by the selected builder.
+            List of meta samples in the order the raw data was collected
+
+        Raises:
+            ValueError: If the collectors produced no raw data.
+            RuntimeError: If matching failed for every raw data record.
         """
-        # Ensure logging and data manager are initialized
-        if self.logger is None:
-            self.logger = self.setup_logging()
-        if self.data_manager is None:
-            self.data_manager = DataManager(engine_config=self.db_config)
+        streaming_config = self.config.get("streaming_config", {})
+        queue_size = int(streaming_config.get("queue_size", 16))
+        insert_batch_size = max(1, int(streaming_config.get("insert_batch_size", 32)))
+        insert_interval = float(streaming_config.get("insert_interval", 1.0))
+        use_matcher = self.matcher_config["use_matcher"]
+        max_concurrency = (
+            int(self.matcher_config.get("max_concurrency", 1)) if use_matcher else 1
+        )
 
-        # Step 1: Collect data from URLs or PDF paths using collectors
-        raw_data_records = self._collect_data_from_sources(
-            data_sources=data_sources,
-            pdf_collector_config=self.pdf_collector_config,
-            url_collector_config=self.url_collector_config,
+        raw_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        # Marks the end of collection on the raw data queue
+        end_of_stream = object()
+        collector_errors: List[BaseException] = []
+
+        def _produce():
+            try:
+                with metrics_stage("collect"):
+                    for raw_data in self._iter_data_from_sources(
+                        data_sources=data_sources,
+                        pdf_collector_config=self.pdf_collector_config,
+                        url_collector_config=self.url_collector_config,
+                    ):
+                        raw_queue.put(raw_data)
+            except Exception as e:
+                collector_errors.append(e)
+                self.logger.error(
+                    "Collection stopped early: %s: %s", type(e).__name__, e
+                )
+            finally:
+                raw_queue.put(end_of_stream)
+
+        # Run the producer in a copy of the context so that its counters are
+        # attributed to the current run
+        producer = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_produce,),
+            name="finmy-collector",
+            daemon=True,
         )
+        producer.start()
 
-        # Step 2: Store raw data records in database
-        self.store_raw_data(raw_data_records)
+        # Summarization overlaps with collection
+        summarized_query = self.summarize_user_query(user_query_input)
 
-        # Step 3: Create and store user query input
-        user_query_input = self.create_and_store_user_query(
+        results: List[Optional[List[MetaSample]]] = []
+        raw_data_ids: List[str] = []
+        streamed_ids = set()
+        failures = 0
+        in_flight = {}
+        unstored: List[RawData] = []
+        # Time by which the oldest unstored record is written
+        store_deadline = None
+
+        def _store_pending():
+            nonlocal store_deadline
+            store_deadline = None
+            if not unstored:
+                return
+            with metrics_stage("store_raw_data"):
+                # Persist the block records before their locations reach
+                # the database
+                flush_block_stores()
+                self.data_manager.insert_raw_data_batch(unstored)
+                if self.deduplicator is not None:
+                    self.deduplicator.mark_raw_data_stored(unstored)
+            self.logger.info("Stored %d streamed RawData objects", len(unstored))
+            unstored.clear()
+
+        def _settle(done_futures):
+            nonlocal failures
+            for future in done_futures:
+                idx = in_flight.pop(future)
+                try:
+                    results[idx] = future.result()
+                except Exception as e:
+                    failures += 1
+                    self.logger.error(
+                        "Matching failed for raw data %s: %s: %s",
+                        raw_data_ids[idx],
+                        type(e).__name__,
+                        e,
+                    )
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            while True:
+                try:
+                    raw_data = raw_queue.get(
+                        timeout=(
+                            None
+                            if store_deadline is None
+                            else max(0.0, store_deadline - time.monotonic())
+                        )
+                    )
+                except queue.Empty:
+                    _store_pending()
+                    continue
+                if raw_data is end_of_stream:
+                    break
+                # Duplicated sources resolve to an already streamed record
+                if raw_data.raw_data_id in streamed_ids:
+                    continue
+                streamed_ids.add(raw_data.raw_data_id)
+                if streamed_raw_data is not None:
+                    streamed_raw_data.append(raw_data)
+                if self._unstored_raw_data([raw_data]):
+                    unstored.append(raw_data)
+                    if store_deadline is None:
+                        store_deadline = time.monotonic() + insert_interval
+                if len(unstored) >= insert_batch_size or (
+                    store_deadline is not None and time.monotonic() >= store_deadline
+                ):
+                    _store_pending()
+                self.logger.info("Streamed RawData %s", raw_data.raw_data_id)
+
+                if use_matcher:
+                    future = submit_with_context(
+                        executor,
+                        self._match_single_raw_data,
+                        raw_data,
+                        summarized_query,
+                    )
+                else:
+                    future = submit_with_context(
+                        executor, self._passthrough_raw_data, raw_data
+                    )
+                in_flight[future] = len(results)
+                results.append(None)
+                raw_data_ids.append(raw_data.raw_data_id)
+
+                # Bound the number of records held by the matching stage
+                if len(in_flight) >= queue_size:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    _settle(done)
+            _store_pending()
+            _settle(list(in_flight))
+
+        producer.join()
+
+        if not results:
+            if collector_errors:
+                raise collector_errors[0]
+            raise ValueError(
+                "No raw data records created from collectors. "
+                "Please ensure data_sources contains valid URLs or PDF paths."
+            )
+        if failures == len(results):
+            raise RuntimeError(f"Matching failed for all {failures} raw data records.")
+        if failures:
+            self.logger.warning(
+                "Matching failed for %d of %d raw data records",
+                failures,
+                len(results),
+            )
+        self.logger.info("Streamed %d raw data records", len(results))
+        self.logger.info("=" * 25)
+
+        meta_samples = []
+        for meta_sample in results:
+            if meta_sample:
+                meta_samples += meta_sample
+        return meta_samples
+
+    def _make_checkpointer(
+        self, run_inputs: dict, resume: bool
+    ) -> Optional[StageCheckpointer]:
+        """
+        Create the stage checkpointer of a run, if checkpointing is enabled.
+
+        Checkpoints are written when ``checkpoint_config["enabled"]`` is set or
+        when resuming; they live under ``checkpoint_config["checkpoint_dir"]``
+        (default: ``<output_dir>/checkpoints``).
+
+        Args:
+            run_inputs: Inputs identifying the run (sources or contents, query);
+                component configurations are keyed per stage instead
+            resume: Whether valid checkpoints are restored instead of recomputed
+
+        Returns:
+            A StageCheckpointer, or None when checkpointing is disabled
+        """
+        checkpoint_config = self.config.get("checkpoint_config", {})
+        if not (resume or checkpoint_config.get("enabled", False)):
+            return None
+        checkpoint_dir = checkpoint_config.get(
+            "checkpoint_dir", os.path.join(self.output_dir, "checkpoints")
+        )
+        checkpointer = StageCheckpointer(
+            checkpoint_dir=checkpoint_dir,
+            run_inputs=run_inputs,
+            resume=resume,
+            logger=self.logger,
+        )
+        self.logger.info("Checkpoint directory: %s", checkpointer.run_dir)
+        return checkpointer
+
+    def _stage_configs(self) -> dict:
+        """
+        Return the component configurations that determine the stage outputs.
+
+        Execution-only settings such as ``max_concurrency`` are left out so
+        that changing them does not invalidate checkpoints.
+        """
+        matcher_config = {
+            k: v for k, v in self.matcher_config.items() if k != "max_concurrency"
+        }
+        return {
+            "url_collector_config": self.url_collector_config,
+            "pdf_collector_config": self.pdf_collector_config,
+            "summarizer_config": self.summarizer_config,
+            "matcher_config": matcher_config,
+            "context_config": self.config.get("context_config", {}),
+        }
+
+    @staticmethod
+    def _run_stage(
+        checkpointer: Optional[StageCheckpointer],
+        stage: str,
+        inputs: dict,
+        fn,
+        depends_on: Optional[List[str]] = None,
+        fingerprint: Optional[Callable] = None,
+    ):
+        """
+        Run one pipeline stage through the checkpointer when one is active.
+        """
+        if checkpointer is None:
+            return fn()
+        return checkpointer.run(
+            stage, inputs, fn, depends_on=depends_on, fingerprint=fingerprint
+        )
+
+    def _collect_and_store_raw_data(self, collect_fn) -> List[RawData]:
+        """
+        Create raw data records with `collect_fn` and store them in the database.
+        """
+        raw_data_records = collect_fn()
+        # Duplicated sources resolve to the same record; keep one copy each
+        unique_records = list(
+            {raw_data.raw_data_id: raw_data for raw_data in raw_data_records}.values()
+        )
+        if len(unique_records) < len(raw_data_records):
+            self.logger.info(
+                "Deduplicated %d of %d raw data records",
+                len(raw_data_records) - len(unique_records),
+                len(raw_data_records),
+            )
+        self.store_raw_data(unique_records)
+        return unique_records
+
+    @timed_stage("build")
+    def _run_builder(self, builder: Optional[BaseBuilder], build_input: BuildInput):
+        """
+        Run `builder` (default: ``self.builder``) on the build input.
+        """
+        return (builder or self.builder).run(build_input)
+
+    @timed_stage("build")
+    def _rebuild(
+        self,
+        builder: BaseBuilder,
+        build_input: BuildInput,
+        previous_save_dir: str,
+        added_sample_ids: List[str],
+    ):
+        """
+        Update the previous build of `previous_save_dir` with `builder`.
+        """
+        added_sample_ids = set(added_sample_ids)
+        added_samples = [
+            sample
+            for sample in build_input.samples
+            if sample.sample_id in added_sample_ids
+        ]
+        return builder.rebuild(build_input, previous_save_dir, added_samples)
+
+    def _content_fingerprints(self, raw_data_records: List[RawData]) -> List[str]:
+        """
+        Return the content fingerprints of the readable raw data records.
+        """
+        fingerprints = []
+        for raw_data in raw_data_records:
+            try:
+                content = self._read_location(raw_data.location)
+            except Exception as e:
+                self.logger.warning(
+                    "Cannot read %s for fingerprinting: %s", raw_data.location, e
+                )
+                continue
+            fingerprints.append(content_fingerprint(content))
+        return fingerprints
+
+    def _record_query_run(
+        self,
+        user_query_input: UserQueryInput,
+        raw_data_ids: List[str],
+        content_fingerprints: List[str],
+        meta_samples: List[MetaSample],
+        builder: BaseBuilder,
+    ) -> None:
+        """
+        Record the build of a query for later incremental rebuilds, when
+        ``incremental_config`` is enabled.
+        """
+        if self.query_runs is None or not user_query_input.user_query_id:
+            return
+        self.query_runs.save(
+            QueryRunRecord(
+                user_query_id=user_query_input.user_query_id,
+                query_text=user_query_input.query_text,
+                key_words=list(user_query_input.key_words),
+                raw_data_ids=list(dict.fromkeys(raw_data_ids)),
+                content_fingerprints=list(dict.fromkeys(content_fingerprints)),
+                meta_samples=list(meta_samples),
+                builder_type=self.builder_config.get("builder_type"),
+                save_dir=builder.save_dir,
+            )
+        )
+
+    def _result_cache_key(
+        self,
+        query_text: str,
+        key_words: List[str],
+        data_sources: Optional[List[str]] = None,
+        contents: Optional[list] = None,
+        builder: Optional[BaseBuilder] = None,
+    ) -> str:
+        """
+        Compute the result cache key of a run from its sources, query and
+        the configurations determining its output.
+        """
+        if data_sources:
+            fingerprints = [source_fingerprint(source) for source in data_sources]
+        else:
+            fingerprints = [
+                source_fingerprint(content, is_content=True)
+                for content in contents or []
+            ]
+        # Output locations do not change the result
+        builder_config = builder.build_config if builder else self.builder_config
+        builder_config = {
+            k: v
+            for k, v in builder_config.items()
+            if k not in ("save_folder", "output_dir")
+        }
+        return RunResultCache.make_key(
+            fingerprints,
+            query_text,
+            key_words,
+            {**self._stage_configs(), "builder_config": builder_config},
+        )
+
+    def _cached_result(self, cache_key: Optional[str]):
+        """
+        Return the cached build output of `cache_key`, or None on a miss.
+
+        On a hit, the output carries ``extras["cache_hit"]`` and, in
+        ``extras["save_dir"]``, the save directory of the cached run.
+        """
+        if cache_key is None:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        self.logger.info(
+            "Result cache hit %s: reusing build saved in %s",
+            cache_key,
+            cached.save_dir,
+        )
+        build_output = cached.build_output
+        if isinstance(getattr(build_output, "extras", None), dict):
+            build_output.extras["cache_hit"] = True
+            build_output.extras["save_dir"] = cached.save_dir
+        return build_output
+
+    def _cache_result(
+        self,
+        cache_key: Optional[str],
+        build_output,
+        builder: Optional[BaseBuilder],
+    ) -> None:
+        """
+        Record the builder save directory of a finished run in
+        ``build_output.extras["save_dir"]`` and store the output under
+        `cache_key`.
+        """
+        if build_output is None:
+            return
+        save_dir = (builder or self.builder).save_dir
+        if isinstance(getattr(build_output, "extras", None), dict):
+            build_output.extras["save_dir"] = save_dir
+        if cache_key is not None:
+            self.result_cache.put(cache_key, build_output, save_dir)
+
+    @timed_stage("result_cache")
+    def _result_cache_hit(self, build_output):
+        """
+        Return a cached build output; run under `_run_with_metrics`, so that
+        `last_metrics` and ``extras["metrics"]`` describe the cache hit
+        instead of an earlier run.
+        """
+        return build_output
+
+    def invalidate_cached_result(
+        self,
+        query_text: str,
+        key_words: List[str],
+        data_sources: Optional[List[str]] = None,
+        contents: Optional[list] = None,
+        builder: Optional[BaseBuilder] = None,
+    ) -> bool:
+        """
+        Drop the cached result of a run, so that the next identical request
+        runs the pipeline again.
+
+        Args:
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            data_sources: URLs or PDF file paths of the run
+            contents: Text content strings of the run (used when no data sources)
+            builder: Builder of the run, when not ``self.builder``
+
+        Returns:
+            Whether a cached result was dropped.
+        """
+        if self.result_cache is None:
+            return False
+        return self.result_cache.invalidate(
+            self._result_cache_key(
+                query_text, key_words, data_sources, contents, builder
+            )
+        )
+
+    @property
+    def last_metrics(self) -> Optional[PipelineMetrics]:
+        """Metrics of the last run finished by the calling thread."""
+        return getattr(self._metrics_local, "last_metrics", None)
+
+    def _run_with_metrics(self, run_fn, *args, **kwargs):
+        """
+        Execute one pipeline run under a fresh `PipelineMetrics`.
+
+        The metrics are exposed as `last_metrics`, attached to the build output
+        as ``extras["metrics"]`` and, when ``metrics_config["enabled"]`` is
+        set, written as JSON and Prometheus text files to
+        ``metrics_config["save_dir"]`` (default: ``<output_dir>/metrics``).
+
+        Args:
+            run_fn: Callable executing the run and returning the build output
+            *args, **kwargs: Arguments passed to `run_fn`
+
+        Returns:
+            The build output returned by `run_fn`.
+        """
+        metrics = PipelineMetrics()
+        try:
+            with metrics.activate():
+                build_output = run_fn(*args, **kwargs)
+        finally:
+            self._metrics_local.last_metrics = metrics
+            self._report_metrics(metrics)
+        if isinstance(getattr(build_output, "extras", None), dict):
+            build_output.extras["metrics"] = metrics.to_dict()
+        return build_output
+
+    def _report_metrics(self, metrics: PipelineMetrics) -> None:
+        """
+        Log the per-stage metrics of a run and save them when enabled.
+        """
+        for stage_metrics in metrics.stages.values():
+            self.logger.info(
+                "Stage %-18s wall=%.3fs cpu=%.3fs items=%d bytes_r=%d bytes_w=%d "
+                "db_rows=%d llm_calls=%d tokens=%d/%d",
+                stage_metrics.name,
+                stage_metrics.wall_time,
+                stage_metrics.cpu_time,
+                stage_metrics.items,
+                stage_metrics.bytes_read,
+                stage_metrics.bytes_written,
+                stage_metrics.db_rows,
+                stage_metrics.llm_calls,
+                stage_metrics.prompt_tokens,
+                stage_metrics.completion_tokens,
+            )
+        metrics_config = self.config.get("metrics_config", {})
+        if metrics_config.get("enabled", False):
+            save_dir = metrics_config.get(
+                "save_dir", os.path.join(self.output_dir, "metrics")
+            )
+            paths = metrics.save(save_dir)
+            self.logger.info("Pipeline metrics saved to: %s", paths)
+
+    def _prepare_build_input(
+        self,
+        collect_fn,
+        run_inputs: dict,
+        query_text: str,
+        key_words: List[str],
+        resume: bool = False,
+    ):
+        """
+        Run the pipeline stages from raw data creation to the build input;
+        shared by the single-builder and the fan-out runs.
+
+        Args:
+            collect_fn: Zero-argument callable returning the raw data records
+            run_inputs: Inputs identifying the run, used for checkpoint keys
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            Tuple of the raw data records, the user query input, the meta
+            samples and the build input.
+        """
+        # Ensure logging and data manager are initialized
+        if self.logger is None:
+            self.logger = self.setup_logging()
+        if self.data_manager is None:
+            self.data_manager = DataManager(engine_config=self.db_config)
+
+        checkpointer = self._make_checkpointer(
+            {**run_inputs, "query_text": query_text, "key_words": key_words}, resume
+        )
+        configs = self._stage_configs()
+
+        # Steps 1-2: Create raw data records and store them in database
+        raw_data_records = self._run_stage(
+            checkpointer,
+            "raw_data",
+            {
+                "run_inputs": run_inputs,
+                "url_collector_config": configs["url_collector_config"],
+                "pdf_collector_config": configs["pdf_collector_config"],
+            },
+            lambda: self._collect_and_store_raw_data(collect_fn),
+            fingerprint=self._raw_data_fingerprint,
+        )
+
+        # Step 3: Create and store user query input
+        user_query_input = self._run_stage(
+            checkpointer,
+            "user_query",
+            {"query_text": query_text, "key_words": key_words},
+            lambda: self.create_and_store_user_query(
+                query_text=query_text,
+                key_words=key_words,
+            ),
+        )
+
+        # Step 4: Summarize user query
+        summarized_query = self._run_stage(
+            checkpointer,
+            "summarized_query",
+            {"summarizer_config": configs["summarizer_config"]},
+            lambda: self.summarize_user_query(user_query_input),
+            depends_on=["user_query"],
+        )
+
+        # Steps 5-8: Process matching, generate and store meta samples
+        def _match_and_store():
+            meta_samples = self._process_matching(raw_data_records, summarized_query)
+            self.store_meta_samples(meta_samples)
+            return meta_samples
+
+        meta_samples = self._run_stage(
+            checkpointer,
+            "meta_samples",
+            {"matcher_config": configs["matcher_config"]},
+            _match_and_store,
+            depends_on=["raw_data", "summarized_query"],
+        )
+
+        # Step 9: Create build input for downstream processing
+        build_input = self._run_stage(
+            checkpointer,
+            "build_input",
+            {"context_config": configs["context_config"]},
+            lambda: self.create_build_input(user_query_input, meta_samples),
+            depends_on=["user_query", "meta_samples"],
+        )
+
+        return raw_data_records, user_query_input, meta_samples, build_input
+
+    def _build_from_raw_data(
+        self,
+        collect_fn,
+        run_inputs: dict,
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Run the pipeline stages shared by all entry points, from raw data
+        creation to the builder.
+
+        Args:
+            collect_fn: Zero-argument callable returning the raw data records
+            run_inputs: Inputs identifying the run, used for checkpoint keys
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        # Steps 1-9: Prepare the build input
+        (
+            raw_data_records,
+            user_query_input,
+            meta_samples,
+            build_input,
+        ) = self._prepare_build_input(
+            collect_fn, run_inputs, query_text, key_words, resume
+        )
+
+        # Step 10: Execute builder and return result
+        build_output = self._run_builder(builder, build_input)
+        if self.query_runs is not None:
+            self._record_query_run(
+                user_query_input,
+                [raw_data.raw_data_id for raw_data in raw_data_records],
+                self._content_fingerprints(raw_data_records),
+                meta_samples,
+                builder or self.builder,
+            )
+        return build_output
+
+    def lm_build_pipeline_streaming(
+        self,
+        data_sources: List[str],
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Streaming variant of `lm_build_pipeline_main`.
+
+        Collection, storage and matching run concurrently: each RawData is
+        stored and matched as soon as its URL or PDF has been collected, so the
+        end-to-end latency approaches that of the slowest stage instead of the
+        sum of all stages. Queue sizes are read from ``streaming_config``.
+
+        Args:
+            data_sources: List of URLs or PDF file paths to collect data from
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        return self._run_with_metrics(
+            self._build_streaming,
+            data_sources=data_sources,
             query_text=query_text,
             key_words=key_words,
+            builder=builder,
+            resume=resume,
         )
 
-        # Step 4: Summarize user query
-        summarized_query = self.summarize_user_query(user_query_input)
+    def _build_streaming(
+        self,
+        data_sources: List[str],
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Run the streaming pipeline; see `lm_build_pipeline_streaming`.
+        """
+        # Ensure logging and data manager are initialized
+        if self.logger is None:
+            self.logger = self.setup_logging()
+        if self.data_manager is None:
+            self.data_manager = DataManager(engine_config=self.db_config)
 
-        # Steps 5-7: Process matching and generate meta samples
-        meta_samples = self._process_matching(raw_data_records, summarized_query)
+        run_inputs = {"data_sources": data_sources}
+        checkpointer = self._make_checkpointer(
+            {**run_inputs, "query_text": query_text, "key_words": key_words}, resume
+        )
 
-        # Step 8: Store meta samples in database
-        self.store_meta_samples(meta_samples)
+        # Step 1: Create and store user query input
+        user_query_input = self._run_stage(
+            checkpointer,
+            "user_query",
+            {"query_text": query_text, "key_words": key_words},
+            lambda: self.create_and_store_user_query(
+                query_text=query_text,
+                key_words=key_words,
+            ),
+        )
+
+        # Steps 2-8: Collect, store, summarize and match in a streaming fashion,
+        # then store the meta samples in database
+        streamed_raw_data: List[RawData] = []
+
+        def _stream_and_store():
+            meta_samples = self._stream_collect_and_match(
+                data_sources, user_query_input, streamed_raw_data
+            )
+            self.store_meta_samples(meta_samples)
+            return meta_samples
+
+        meta_samples = self._run_stage(
+            checkpointer,
+            "meta_samples",
+            {"run_inputs": run_inputs, "configs": self._stage_configs()},
+            _stream_and_store,
+            depends_on=["user_query"],
+        )
 
         # Step 9: Create build input for downstream processing
-        build_input = self.create_build_input(user_query_input, meta_samples)
+        build_input = self._run_stage(
+            checkpointer,
+            "build_input",
+            {"context_config": self._stage_configs()["context_config"]},
+            lambda: self.create_build_input(user_query_input, meta_samples),
+            depends_on=["user_query", "meta_samples"],
+        )
 
         # Step 10: Execute builder and return result
-        return self.builder.run(build_input)
+        build_output = self._run_builder(builder, build_input)
+        if self.query_runs is not None:
+            # Streamed records are only known to the run that streamed them;
+            # a resumed run records the raw data of its meta samples by ID
+            self._record_query_run(
+                user_query_input,
+                [raw_data.raw_data_id for raw_data in streamed_raw_data]
+                + [meta_sample.raw_data_id for meta_sample in meta_samples],
+                self._content_fingerprints(streamed_raw_data),
+                meta_samples,
+                builder or self.builder,
+            )
+        return build_output
+
+    def lm_build_pipeline_main(
+        self,
+        data_sources: List[str],
+        query_text: str,
+        key_words: List[str],
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
+    ):
+        """
+        Main function that orchestrates the complete data processing workflow.
+
+        This function executes the following steps:
+        1. Initialize data manager
+        2. Collect data from URLs or PDF paths using collectors
+        3. Create and store raw data records
+        4. Create and store user query input
+        5. Summarize user query
+        6. Match raw data with summarized query
+        7. Generate meta samples from match results
+        8. Store meta samples
+        9. Create build input for downstream processing
+        10. Run the configured builder to get the final build output.
+
+        When ``streaming_config["enabled"]`` is set, the run is delegated to
+        `lm_build_pipeline_streaming`, which overlaps steps 1-7.
+
+        When ``result_cache_config["enabled"]`` is set, the output of an
+        identical earlier run (same sources, query, keywords and component
+        configurations) is returned without running any step, with
+        ``extras["save_dir"]`` naming the save directory of that run and
+        metrics holding a single ``result_cache`` step; see
+        `invalidate_cached_result`.
+
+        With ``resume=True``, every step whose checkpoint (keyed by a hash of
+        its inputs and configuration) is present and valid is skipped, so
+        re-running a failed build only pays for the remaining steps.
+
+        Wall time, CPU time, item counts, block storage bytes, database rows
+        and LLM tokens of every step are collected in a `PipelineMetrics`,
+        available as `last_metrics` and in ``build_output.extras["metrics"]``.
+
+        Args:
+            data_sources: List of URLs or PDF file paths to collect data from
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
+
+        Returns:
+            The build output object produced by the selected builder.
+        """
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self._result_cache_key(
+                query_text, key_words, data_sources=data_sources, builder=builder
+            )
+            build_output = self._cached_result(cache_key)
+            if build_output is not None:
+                return self._run_with_metrics(self._result_cache_hit, build_output)
+
+        if self.config.get("streaming_config", {}).get("enabled", False):
+            build_output = self.lm_build_pipeline_streaming(
+                data_sources=data_sources,
+                query_text=query_text,
+                key_words=key_words,
+                builder=builder,
+                resume=resume,
+            )
+            self._cache_result(cache_key, build_output, builder)
+            return build_output
+
+        # Step 1: Collect data from URLs or PDF paths using collectors
+        # Steps 2-10 are shared with `lm_build_pipeline_with_contents`
+        build_output = self._run_with_metrics(
+            self._build_from_raw_data,
+            collect_fn=lambda: self._collect_data_from_sources(
+                data_sources=data_sources,
+                pdf_collector_config=self.pdf_collector_config,
+                url_collector_config=self.url_collector_config,
+            ),
+            run_inputs={"data_sources": data_sources},
+            query_text=query_text,
+            key_words=key_words,
+            builder=builder,
+            resume=resume,
+        )
+        self._cache_result(cache_key, build_output, builder)
+        return build_output
 
     def lm_build_pipeline_with_contents(
         self,
         contents: list,
         query_text: str,
         key_words: list,
+        builder: Optional[BaseBuilder] = None,
+        resume: bool = False,
     ):
         """
         Build the pipeline with the provided contents (list of text),
         query_text (query string), and key_words (list of keywords).
-        Returns the build result.
+        Returns the build result, from the result cache when enabled (see
+        `lm_build_pipeline_main`).
 
         Args:
             contents: List of text content strings
             query_text: Natural language query text
             key_words: List of keywords for the query
+            builder: Optional builder used instead of ``self.builder``
+            resume: Whether to restore valid stage checkpoints
 
         Returns:
             The build output object produced by the selected builder.
         """
-        # Ensure logging and data manager are initialized
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self._result_cache_key(
+                query_text, key_words, contents=contents, builder=builder
+            )
+            build_output = self._cached_result(cache_key)
+            if build_output is not None:
+                return self._run_with_metrics(self._result_cache_hit, build_output)
+
+        # Step 1: Create raw data records from contents
+        # Steps 2-10 are shared with `lm_build_pipeline_main`
+        build_output = self._run_with_metrics(
+            self._build_from_raw_data,
+            collect_fn=lambda: self.create_raw_data_records(contents),
+            run_inputs={"contents": stable_hash(contents)},
+            query_text=query_text,
+            key_words=key_words,
+            builder=builder,
+            resume=resume,
+        )
+        self._cache_result(cache_key, build_output, builder)
+        return build_output
+
+    def lm_build_pipeline_incremental(
+        self,
+        user_query_id: str,
+        data_sources: Optional[List[str]] = None,
+        contents: Optional[list] = None,
+        builder: Optional[BaseBuilder] = None,
+    ):
+        """
+        Update the last build of a user query with new sources.
+
+        Only the raw data not already matched against the query are matched;
+        their meta samples are added to the recorded ones and the builder
+        re-runs only the agents whose inputs changed (see
+        `BaseBuilder.rebuild`). Requires ``incremental_config["enabled"]``,
+        under which every build is recorded by user query ID.
+
+        Args:
+            user_query_id: ID of the previously built `UserQueryInput`
+            data_sources: New URLs or PDF file paths
+            contents: New text content strings (used when no data sources)
+            builder: Optional builder used instead of a spawn of ``self.builder``
+
+        Returns:
+            The build output object of the updated build.
+        """
+        return self._run_with_metrics(
+            self._build_incremental,
+            user_query_id=user_query_id,
+            data_sources=data_sources,
+            contents=contents,
+            builder=builder,
+        )
+
+    def _build_incremental(
+        self,
+        user_query_id: str,
+        data_sources: Optional[List[str]],
+        contents: Optional[list],
+        builder: Optional[BaseBuilder],
+    ):
+        """
+        Run the incremental build; see `lm_build_pipeline_incremental`.
+        """
+        if self.query_runs is None:
+            raise ValueError("Incremental builds require incremental_config.enabled")
+        record = self.query_runs.load(user_query_id)
+        if record is None:
+            raise ValueError(f"No recorded build for user query '{user_query_id}'")
         if self.logger is None:
             self.logger = self.setup_logging()
         if self.data_manager is None:
             self.data_manager = DataManager(engine_config=self.db_config)
 
-        # Step 1: Create raw data records from contents
-        raw_data_records = self.create_raw_data_records(contents)
+        # Steps 1-2: Collect and store the new raw data
+        if data_sources:
+            collect_fn = lambda: self._collect_data_from_sources(
+                data_sources=data_sources,
+                pdf_collector_config=self.pdf_collector_config,
+                url_collector_config=self.url_collector_config,
+            )
+        else:
+            collect_fn = lambda: self.create_raw_data_records(contents or [])
+        # Re-submitted sources get new IDs but the recorded fingerprints
+        known_raw_ids = set(record.raw_data_ids)
+        known_fingerprints = set(record.content_fingerprints)
+        new_raw_data = []
+        new_fingerprints = []
+        for raw_data in self._collect_and_store_raw_data(collect_fn):
+            if raw_data.raw_data_id in known_raw_ids:
+                continue
+            fingerprints = self._content_fingerprints([raw_data])
+            if fingerprints and fingerprints[0] in known_fingerprints:
+                continue
+            known_fingerprints.update(fingerprints)
+            new_raw_data.append(raw_data)
+            new_fingerprints += fingerprints
+
+        # Steps 3-4: Summarize the recorded query (a cache hit when enabled)
+        user_query_input = UserQueryInput(
+            user_query_id=record.user_query_id,
+            query_text=record.query_text,
+            key_words=record.key_words,
+        )
+        summarized_query = self.summarize_user_query(user_query_input)
 
-        # Step 2: Store raw data records in database
-        self.store_raw_data(raw_data_records)
+        # Steps 5-8: Match only the new raw data and diff the meta samples
+        new_meta_samples = self._process_matching(new_raw_data, summarized_query)
+        diff = diff_meta_samples(record.meta_samples, new_meta_samples)
+        self.store_meta_samples(diff.added)
+        self.logger.info(
+            "Incremental build of %s: %d new raw data, %d new meta samples",
+            user_query_id,
+            len(new_raw_data),
+            len(diff.added),
+        )
 
-        # Step 3: Create and store user query input
-        user_query_input = self.create_and_store_user_query(
+        # Steps 9-10: Re-run the builder agents affected by the new samples
+        builder = builder or self.builder.spawn()
+        build_input = self.create_build_input(user_query_input, diff.samples)
+        build_output = self._rebuild(
+            builder,
+            build_input,
+            record.save_dir,
+            [sample.sample_id for sample in diff.added],
+        )
+        self._record_query_run(
+            user_query_input,
+            record.raw_data_ids + [raw_data.raw_data_id for raw_data in new_raw_data],
+            record.content_fingerprints + new_fingerprints,
+            diff.samples,
+            builder,
+        )
+        return build_output
+
+    def lm_build_pipeline_fanout(
+        self,
+        query_text: str,
+        key_words: List[str],
+        builder_configs: List[dict],
+        data_sources: Optional[List[str]] = None,
+        contents: Optional[list] = None,
+        max_workers: Optional[int] = None,
+        resume: bool = False,
+    ) -> Dict[str, BuilderRunResult]:
+        """
+        Run several builders on one shared build input.
+
+        Collection, matching and the build input (steps 1-9) run once; the
+        builders then run concurrently on the same `BuildInput`, each writing
+        to its own save directory under ``<save_folder>/<builder_type>``
+        (``<output_dir>/<builder_type>`` without a ``save_folder``). A
+        failing builder is recorded in its result and does not stop the
+        others.
+
+        Args:
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder_configs: One config per builder, each overriding
+                ``builder_config`` (e.g. ``{"builder_type": "LMBuilder"}``, or
+                ``{"type": "LMBuilder"}``); builder types must be distinct
+            data_sources: URLs or PDF file paths to collect data from
+            contents: Text content strings (used when no data sources)
+            max_workers: Number of builders run concurrently. Defaults to the
+                number of builders.
+            resume: Whether to restore valid stage checkpoints of steps 1-9
+
+        Returns:
+            Dict of `BuilderRunResult`, keyed by builder type, holding the
+            build output, latency and LLM token cost of every builder.
+        """
+        builders = {}
+        for override in builder_configs:
+            config = {**self.builder_config, **override}
+            # The type of the override wins over the configured builder type,
+            # whichever of the two keys each of them uses
+            builder_type = (
+                override.get("builder_type")
+                or override.get("type")
+                or self.builder_config.get("builder_type")
+                or self.builder_config.get("type")
+            )
+            if not builder_type:
+                raise ValueError("builder_config must contain 'builder_type' or 'type'")
+            config.pop("type", None)
+            config["builder_type"] = builder_type
+            if builder_type in builders:
+                raise ValueError(f"Duplicate builder type in fan-out: {builder_type}")
+            if "save_folder" not in override:
+                config["save_folder"] = os.path.join(
+                    self.builder_config.get("save_folder") or self.output_dir,
+                    builder_type,
+                )
+            builders[builder_type] = self._create_builder_from_config(config)
+
+        if data_sources:
+            collect_fn = lambda: self._collect_data_from_sources(
+                data_sources=data_sources,
+                pdf_collector_config=self.pdf_collector_config,
+                url_collector_config=self.url_collector_config,
+            )
+            run_inputs = {"data_sources": data_sources}
+        else:
+            collect_fn = lambda: self.create_raw_data_records(contents or [])
+            run_inputs = {"contents": stable_hash(contents or [])}
+        return self._run_with_metrics(
+            self._build_fanout,
+            collect_fn=collect_fn,
+            run_inputs=run_inputs,
             query_text=query_text,
             key_words=key_words,
+            builders=builders,
+            max_workers=max_workers,
+            resume=resume,
         )
 
-        # Step 4: Summarize user query
-        summarized_query = self.summarize_user_query(user_query_input)
+    def _build_fanout(
+        self,
+        collect_fn,
+        run_inputs: dict,
+        query_text: str,
+        key_words: List[str],
+        builders: Dict[str, BaseBuilder],
+        max_workers: Optional[int],
+        resume: bool,
+    ) -> Dict[str, BuilderRunResult]:
+        """
+        Run the fan-out build; see `lm_build_pipeline_fanout`.
+        """
+        # Steps 1-9: Prepare the build input shared by all builders
+        _, _, _, build_input = self._prepare_build_input(
+            collect_fn, run_inputs, query_text, key_words, resume
+        )
 
-        # Steps 5-7: Process matching and generate meta samples
-        meta_samples = self._process_matching(raw_data_records, summarized_query)
+        # Step 10: Run every builder; each has its own metrics step, so that
+        # its LLM calls and tokens are attributed to it
+        def _run(builder_type: str) -> BuilderRunResult:
+            builder = builders[builder_type]
+            result = BuilderRunResult(
+                builder_type=builder_type, save_dir=builder.save_dir
+            )
+            start_time = time.time()
+            with metrics_stage(f"build:{builder_type}") as stage_metrics:
+                try:
+                    result.build_output = builder.run(build_input)
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                    self.logger.error(
+                        "Builder %s failed: %s", builder_type, result.error
+                    )
+            result.latency = time.time() - start_time
+            if stage_metrics is not None:
+                result.llm_calls = stage_metrics.llm_calls
+                result.prompt_tokens = stage_metrics.prompt_tokens
+                result.completion_tokens = stage_metrics.completion_tokens
+            self.logger.info(
+                "Builder %s finished in %.2fs: %d LLM calls, %d/%d tokens",
+                builder_type,
+                result.latency,
+                result.llm_calls,
+                result.prompt_tokens,
+                result.completion_tokens,
+            )
+            return result
+
+        max_workers = max_workers or len(builders)
+        if max_workers > 1 and len(builders) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(builders))
+            ) as executor:
+                futures = {
+                    builder_type: submit_with_context(executor, _run, builder_type)
+                    for builder_type in builders
+                }
+                return {
+                    builder_type: future.result()
+                    for builder_type, future in futures.items()
+                }
+        return {builder_type: _run(builder_type) for builder_type in builders}
+
+    def plan_with_contents(
+        self,
+        contents: list,
+        query_text: str,
+        key_words: list,
+        builder_type: Optional[str] = None,
+    ) -> RunEstimate:
+        """
+        Dry run of `lm_build_pipeline_with_contents`: predict the LLM calls,
+        tokens and latency of every stage without calling any model or
+        touching the database. See `finmy.planner`.
 
-        # Step 8: Store meta samples in database
-        self.store_meta_samples(meta_samples)
+        Args:
+            contents: List of text content strings
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder_type: Builder to estimate; defaults to the configured one
 
-        # Step 9: Create build input for downstream processing
-        build_input = self.create_build_input(user_query_input, meta_samples)
+        Returns:
+            RunEstimate with the per-agent calls, tokens and latency in ms.
+        """
+        planner = DryRunPlanner(self.config, logger=self.logger)
+        return planner.plan(contents, query_text, key_words, builder_type)
 
-        # Step 10: Execute builder and return result
-        return self.builder.run(build_input)
+    def run_job(self, job: PipelineJob) -> PipelineJobResult:
+        """
+        Execute one job with its own builder save directory; used by
+        `run_batch` and by the job queue workers (`finmy.job_queue`).
+
+        Args:
+            job: The job to execute
+
+        Returns:
+            PipelineJobResult holding the build output or the error message
+        """
+        start_time = time.time()
+        result = PipelineJobResult(job_id=job.job_id)
+        try:
+            builder = self.builder.spawn()
+            result.save_dir = builder.save_dir
+            if job.data_sources:
+                result.build_output = self.lm_build_pipeline_main(
+                    data_sources=job.data_sources,
+                    query_text=job.query_text,
+                    key_words=job.key_words,
+                    builder=builder,
+                    resume=job.resume,
+                )
+            else:
+                result.build_output = self.lm_build_pipeline_with_contents(
+                    contents=job.contents,
+                    query_text=job.query_text,
+                    key_words=job.key_words,
+                    builder=builder,
+                    resume=job.resume,
+                )
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            self.logger.error("Batch job %s failed: %s", job.job_id, result.error)
+        extras = getattr(result.build_output, "extras", None)
+        if isinstance(extras, dict) and extras.get("save_dir"):
+            # The save directory of the cached run on a result cache hit
+            result.save_dir = extras["save_dir"]
+        result.metrics = self.last_metrics
+        result.time_cost = time.time() - start_time
+        return result
+
+    def run_batch(
+        self,
+        jobs: List[PipelineJob],
+        max_workers: Optional[int] = None,
+    ) -> BatchOutput:
+        """
+        Run many (query, sources) jobs on the components of this pipeline.
+
+        The summarizer, matcher and builder are created (see `warmup`) before
+        the jobs start, so that concurrent jobs do not race to create them;
+        they, the collectors and the database engine are shared by all jobs.
+        Every job gets a spawned builder with its own save directory and run
+        state. A failing job is recorded in its result and does not stop the
+        batch.
+
+        Args:
+            jobs: List of `PipelineJob` (or dicts with the same fields)
+            max_workers: Number of jobs executed concurrently. Defaults to
+                ``batch_config["max_workers"]`` and then to 1.
+
+        Returns:
+            BatchOutput with per-job results (in input order) and aggregate timing
+        """
+        jobs = [PipelineJob(**job) if isinstance(job, dict) else job for job in jobs]
+        for job in jobs:
+            if job.job_id is None:
+                job.job_id = str(uuid.uuid4())
+        if max_workers is None:
+            max_workers = int(self.config.get("batch_config", {}).get("max_workers", 1))
+
+        warmup_time = sum(self.warmup(BATCH_WARMUP_COMPONENTS).values())
+        self.logger.info(
+            "Running batch of %d jobs with max_workers=%d", len(jobs), max_workers
+        )
+        start_time = time.time()
+        if max_workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(jobs))
+            ) as executor:
+                results = list(executor.map(self.run_job, jobs))
+        else:
+            results = [self.run_job(job) for job in jobs]
+        total_time = time.time() - start_time
+
+        num_failed = sum(1 for r in results if r.error is not None)
+        batch_output = BatchOutput(
+            results=results,
+            init_time=self.init_time + warmup_time,
+            total_time=total_time,
+            mean_job_time=(
+                sum(r.time_cost for r in results) / len(results) if results else 0.0
+            ),
+            num_succeeded=len(results) - num_failed,
+            num_failed=num_failed,
+        )
+        self.logger.info(
+            "Batch finished: %d succeeded, %d failed, total %.2fs",
+            batch_output.num_succeeded,
+            batch_output.num_failed,
+            total_time,
+        )
+        self.logger.info("=" * 25)
+        return batch_output
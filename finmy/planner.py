@@ -0,0 +1,496 @@
+"""
+Dry-run planner: token-accurate cost and latency estimates of a pipeline run.
+
+`DryRunPlanner.plan` takes the inputs of
+`FinmyPipeline.lm_build_pipeline_with_contents` and predicts, without calling
+any model, the LLM calls of every stage:
+
+- summarize: one call for LLM summarizers (`KWLMSummarizer`);
+- match: one call per content for LLM matchers (``use_matcher`` with
+  `LLMMatcher` / `LXMatcher`);
+- build: the calls of the configured builder. `AgentEventBuilder` makes
+  2 skeleton calls, 3 calls per episode (participants, transactions,
+  episode), 1 call per stage and 1 event description call; every call sends
+  the whole builder content.
+
+The calls of an agent run ``max_concurrency`` at a time, read from the
+``summarizer_config``, ``matcher_config`` or ``builder_config`` of the stage
+(default 1).
+
+Tokens are counted with the offline tokenizer of the context packer
+(tiktoken, or `finmy.metrics.estimate_tokens` when it is not installed), and
+the builder content is capped by the context packing ``token_budget``.
+
+Latencies are predicted by a `LatencyModel` fitted on the ``state["cost"]``
+records that builders save as ``Cost.json`` in their save directories: a
+line ``latency = intercept + slope * prompt_tokens`` per agent, plus the
+mean number of episodes and stages of past agent builds. Agents without
+history fall back to the defaults of `finmy.builder.constant`.
+
+Usage:
+    planner = DryRunPlanner(config)
+    estimate = planner.plan(contents, query_text, key_words)
+    print(format_duration(estimate.latency_ms), estimate.to_dict()["items"])
+"""
+
+import os
+import glob
+import json
+import math
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from finmy.builder.constant import (
+    DEFAULT_CALL_OVERHEAD_MS,
+    DEFAULT_COMPLETION_TOKEN_MS,
+    DEFAULT_COMPLETION_TOKENS,
+    DEFAULT_PROMPT_TOKEN_MS,
+    OTHER_TOKEN_NUM,
+)
+from finmy.context_packer import load_token_counter
+
+
+# Summarizers and matchers calling an LLM
+LLM_SUMMARIZERS = ("KWLMSummarizer",)
+LLM_MATCHERS = ("LLMMatcher", "LXMatcher")
+
+# Completion tokens assumed for summarizer and matcher calls
+SUMMARIZE_COMPLETION_TOKENS = 100
+MATCH_COMPLETION_TOKENS = 500
+
+# Key of the fit pooling the records of all agents
+_ALL_AGENTS = "*"
+
+
+def format_duration(latency_ms: float) -> str:
+    """Format a latency in milliseconds as minutes and seconds, e.g.
+    ``"3 min 05 s"`` or ``"42 s"``."""
+    minutes, seconds = divmod(int(round(latency_ms / 1000.0)), 60)
+    if minutes:
+        return f"{minutes} min {seconds:02d} s"
+    return f"{seconds} s"
+
+
+@dataclass
+class CallEstimate:
+    """Estimated LLM calls of one agent (or stage component).
+
+    Fields:
+    - `stage`: pipeline stage, ``summarize``, ``match`` or ``build``
+    - `agent`: agent or component making the calls
+    - `calls`: expected number of calls (fractional for history means)
+    - `prompt_tokens` / `completion_tokens`: total tokens of the calls
+    - `latency_ms`: wall time of the calls, accounting for concurrency
+    """
+
+    stage: str
+    agent: str
+    calls: float
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: float
+
+
+@dataclass
+class RunEstimate:
+    """Itemized estimate of a pipeline run.
+
+    Fields:
+    - `builder_type`: builder the estimate was made for
+    - `content_tokens`: tokens of all input contents
+    - `build_content_tokens`: tokens of the content sent to every builder call
+    - `items`: per-agent `CallEstimate`, in execution order
+    - `history_runs`: number of past builds the latency model was fitted on
+    """
+
+    builder_type: str
+    content_tokens: int
+    build_content_tokens: int
+    items: List[CallEstimate] = field(default_factory=list)
+    history_runs: int = 0
+
+    @property
+    def llm_calls(self) -> float:
+        return sum(item.calls for item in self.items)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(item.prompt_tokens for item in self.items)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(item.completion_tokens for item in self.items)
+
+    @property
+    def latency_ms(self) -> float:
+        return sum(item.latency_ms for item in self.items)
+
+    def stage_latency_ms(self) -> Dict[str, float]:
+        """Return the estimated latency of every stage."""
+        latencies: Dict[str, float] = {}
+        for item in self.items:
+            latencies[item.stage] = (
+                latencies.get(item.stage, 0.0) + item.latency_ms
+            )
+        return latencies
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the estimate and its totals as a JSON-serializable dict."""
+        return {
+            **asdict(self),
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": self.latency_ms,
+            "stage_latency_ms": self.stage_latency_ms(),
+        }
+
+
+def load_cost_history(
+    history_dir: Optional[str], max_runs: int = 50
+) -> List[List[Dict[str, Any]]]:
+    """Load the ``Cost.json`` records of the most recent builds.
+
+    Args:
+        history_dir: Builder ``save_folder`` holding one directory per build.
+        max_runs: Maximum number of builds to load, most recent first.
+
+    Returns:
+        One list of ``state["cost"]`` records per build.
+    """
+    if not history_dir or not os.path.isdir(history_dir):
+        return []
+    paths = sorted(
+        glob.glob(os.path.join(history_dir, "*", "Cost.json")),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    runs = []
+    for path in paths[:max_runs]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            logging.getLogger(__name__).warning("Skipping unreadable %s", path)
+            continue
+        if isinstance(records, list):
+            runs.append(records)
+    return runs
+
+
+class LatencyModel:
+    """Per-agent latency of LLM calls, fitted on past builds.
+
+    Records with token counts give a least-squares line of latency against
+    prompt tokens; records without them (older builds) only give the agent's
+    mean latency. Agents without records use the pooled fit of all agents,
+    and then the default per-call overhead and per-token costs. Records
+    marked ``reused`` (results copied by incremental builds) count towards the
+    calls of their build but are left out of the fits.
+
+    Args:
+        overhead_ms: Default fixed latency of a call.
+        prompt_token_ms: Default latency per prompt token.
+        completion_token_ms: Default latency per completion token.
+    """
+
+    def __init__(
+        self,
+        overhead_ms: float = DEFAULT_CALL_OVERHEAD_MS,
+        prompt_token_ms: float = DEFAULT_PROMPT_TOKEN_MS,
+        completion_token_ms: float = DEFAULT_COMPLETION_TOKEN_MS,
+    ):
+        self.overhead_ms = overhead_ms
+        self.prompt_token_ms = prompt_token_ms
+        self.completion_token_ms = completion_token_ms
+        # agent -> (intercept in ms, ms per prompt token)
+        self.fits: Dict[str, Tuple[float, float]] = {}
+        # agent -> mean completion tokens per call
+        self.completion_tokens: Dict[str, float] = {}
+        # agent -> mean calls per build, over the builds running the agent
+        self.calls_per_run: Dict[str, float] = {}
+        self.runs = 0
+
+    @staticmethod
+    def _fit_line(
+        points: List[Tuple[Optional[float], float]],
+    ) -> Tuple[float, float]:
+        """Fit ``latency = intercept + slope * tokens`` on (tokens, ms) points."""
+        with_tokens = [(x, y) for x, y in points if x is not None]
+        xs = [x for x, _ in with_tokens]
+        if len(set(xs)) < 2:
+            return sum(y for _, y in points) / len(points), 0.0
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(y for _, y in with_tokens) / len(with_tokens)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in with_tokens) / sum(
+            (x - mean_x) ** 2 for x in xs
+        )
+        if slope < 0:
+            return mean_y, 0.0
+        return mean_y - slope * mean_x, slope
+
+    def fit(self, runs: List[List[Dict[str, Any]]]) -> "LatencyModel":
+        """Fit the model on the ``state["cost"]`` records of past builds."""
+        points: Dict[str, List[Tuple[Optional[float], float]]] = {}
+        completions: Dict[str, List[float]] = {}
+        counts: Dict[str, List[int]] = {}
+        for records in runs:
+            run_counts: Dict[str, int] = {}
+            for record in records:
+                for agent, cost in record.items():
+                    if not isinstance(cost, dict) or "latency" not in cost:
+                        continue
+                    run_counts[agent] = run_counts.get(agent, 0) + 1
+                    # Results reused by incremental builds repeat the latency
+                    # of the build that computed them
+                    if cost.get("reused"):
+                        continue
+                    latency_ms = float(cost["latency"]) * 1000.0
+                    prompt_tokens = cost.get("prompt_tokens")
+                    for key in (agent, _ALL_AGENTS):
+                        points.setdefault(key, []).append(
+                            (prompt_tokens, latency_ms)
+                        )
+                        if cost.get("completion_tokens") is not None:
+                            completions.setdefault(key, []).append(
+                                float(cost["completion_tokens"])
+                            )
+            for agent, count in run_counts.items():
+                counts.setdefault(agent, []).append(count)
+
+        self.runs = len(runs)
+        self.fits = {agent: self._fit_line(p) for agent, p in points.items()}
+        self.completion_tokens = {
+            agent: sum(values) / len(values) for agent, values in completions.items()
+        }
+        self.calls_per_run = {
+            agent: sum(values) / len(values) for agent, values in counts.items()
+        }
+        return self
+
+    def expected_completion_tokens(
+        self, agent: str, default: int = DEFAULT_COMPLETION_TOKENS
+    ) -> int:
+        """Return the mean completion tokens of the agent's calls."""
+        return int(round(self.completion_tokens.get(agent, default)))
+
+    def predict_ms(
+        self,
+        agent: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        pooled: bool = True,
+    ) -> float:
+        """Return the predicted latency of one call of `agent`.
+
+        With `pooled`, agents without records use the fit of all builder
+        agents; otherwise they use the defaults.
+        """
+        fit = self.fits.get(agent)
+        if fit is None and pooled:
+            fit = self.fits.get(_ALL_AGENTS)
+        if fit is not None:
+            intercept, slope = fit
+            return max(0.0, intercept + slope * prompt_tokens)
+        return (
+            self.overhead_ms
+            + self.prompt_token_ms * prompt_tokens
+            + self.completion_token_ms * completion_tokens
+        )
+
+
+class DryRunPlanner:
+    """Predict the LLM calls, tokens and latency of a run without running it.
+
+    Args:
+        finmy_config: The pipeline configuration. ``planner_config`` holds
+            ``history_dir`` (default: the builder ``save_folder``),
+            ``max_history_runs``, and the ``expected_stages`` and
+            ``expected_episodes`` of agent builds without history.
+        latency_model: Fitted model; by default fitted on the cost history.
+        logger: Logger reporting the estimate.
+    """
+
+    def __init__(
+        self,
+        finmy_config: dict,
+        latency_model: Optional[LatencyModel] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.config = finmy_config
+        self.planner_config = finmy_config.get("planner_config") or {}
+        self.logger = logger or logging.getLogger(__name__)
+        context_config = finmy_config.get("context_config") or {}
+        self.context_config = context_config
+        self.count_tokens = load_token_counter(
+            context_config.get("encoding", "cl100k_base")
+        )
+        if latency_model is None:
+            history_dir = self.planner_config.get("history_dir") or (
+                finmy_config.get("builder_config") or {}
+            ).get("save_folder")
+            latency_model = LatencyModel().fit(
+                load_cost_history(
+                    history_dir, int(self.planner_config.get("max_history_runs", 50))
+                )
+            )
+        self.latency_model = latency_model
+
+    def _estimate(
+        self,
+        stage: str,
+        agent: str,
+        calls: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+        concurrency: int = 1,
+    ) -> CallEstimate:
+        """Estimate `calls` calls of `prompt_tokens` each, `concurrency` at
+        a time."""
+        latency_ms = self.latency_model.predict_ms(
+            agent, prompt_tokens, completion_tokens, pooled=stage == "build"
+        )
+        return CallEstimate(
+            stage=stage,
+            agent=agent,
+            calls=calls,
+            prompt_tokens=int(round(calls * prompt_tokens)),
+            completion_tokens=int(round(calls * completion_tokens)),
+            latency_ms=latency_ms * math.ceil(calls / max(1, concurrency)),
+        )
+
+    def build_calls(self, builder_type: str) -> List[Tuple[str, float, bool]]:
+        """Return the (agent, calls, sends content) of a builder's LLM calls.
+
+        Episode and stage counts of `AgentEventBuilder` are the means of past
+        builds, or ``expected_episodes`` / ``expected_stages``.
+        """
+        if builder_type == "AgentEventBuilder":
+            history = self.latency_model.calls_per_run
+            episodes = history.get(
+                "EpisodeReconstructor",
+                float(self.planner_config.get("expected_episodes", 6)),
+            )
+            stages = history.get(
+                "StageDescriptionReconstructor",
+                float(self.planner_config.get("expected_stages", 3)),
+            )
+            return [
+                ("SkeletonReconstructor", 1, True),
+                ("SkeletonChecker", 1, True),
+                ("ParticipantReconstructor", episodes, True),
+                ("TransactionReconstructor", episodes, True),
+                ("EpisodeReconstructor", episodes, True),
+                ("StageDescriptionReconstructor", stages, True),
+                ("EventDescriptionReconstructor", 1, True),
+            ]
+        if builder_type == "ClassEventBuilder":
+            return [
+                ("ConnectionTest", 1, False),
+                ("EventClassifier", 1, True),
+                ("EventCascadeGenerator", 1, True),
+            ]
+        if builder_type == "LMBuilder":
+            return [("EventReconstructor", 1, True)]
+        raise ValueError(f"Invalid build type: {builder_type}")
+
+    def plan(
+        self,
+        contents: List[str],
+        query_text: str,
+        key_words: List[str],
+        builder_type: Optional[str] = None,
+    ) -> RunEstimate:
+        """Estimate a run of `lm_build_pipeline_with_contents`.
+
+        Args:
+            contents: List of text content strings
+            query_text: Natural language query text
+            key_words: List of keywords for the query
+            builder_type: Builder to estimate; defaults to the configured one
+
+        Returns:
+            RunEstimate with the per-agent calls, tokens and latency in ms.
+        """
+        builder_config = self.config.get("builder_config") or {}
+        builder_type = builder_type or builder_config["builder_type"]
+        overhead = int(
+            self.planner_config.get("prompt_overhead_tokens", OTHER_TOKEN_NUM)
+        )
+        query_tokens = self.count_tokens(query_text or "") + self.count_tokens(
+            ", ".join(key_words or [])
+        )
+        content_tokens = [self.count_tokens(content) for content in contents]
+        total_content_tokens = sum(content_tokens)
+        build_content_tokens = total_content_tokens
+        if self.context_config.get("enabled", False):
+            build_content_tokens = min(
+                build_content_tokens, int(self.context_config["token_budget"])
+            )
+
+        estimate = RunEstimate(
+            builder_type=builder_type,
+            content_tokens=total_content_tokens,
+            build_content_tokens=build_content_tokens,
+            history_runs=self.latency_model.runs,
+        )
+
+        summarizer_config = self.config.get("summarizer_config") or {}
+        summarizer_type = summarizer_config.get("summarizer_type")
+        if summarizer_type in LLM_SUMMARIZERS:
+            estimate.items.append(
+                self._estimate(
+                    "summarize",
+                    summarizer_type,
+                    1,
+                    overhead + query_tokens,
+                    SUMMARIZE_COMPLETION_TOKENS,
+                    concurrency=int(summarizer_config.get("max_concurrency", 1)),
+                )
+            )
+
+        matcher_config = self.config.get("matcher_config") or {}
+        matcher_type = matcher_config.get("matcher_type")
+        if (
+            matcher_config.get("use_matcher", False)
+            and matcher_type in LLM_MATCHERS
+            and contents
+        ):
+            mean_content_tokens = total_content_tokens / len(contents)
+            estimate.items.append(
+                self._estimate(
+                    "match",
+                    matcher_type,
+                    len(contents),
+                    int(overhead + query_tokens + mean_content_tokens),
+                    MATCH_COMPLETION_TOKENS,
+                    concurrency=int(matcher_config.get("max_concurrency", 1)),
+                )
+            )
+
+        for agent, calls, sends_content in self.build_calls(builder_type):
+            prompt_tokens = overhead + query_tokens
+            if sends_content:
+                prompt_tokens += build_content_tokens
+            estimate.items.append(
+                self._estimate(
+                    "build",
+                    agent,
+                    calls,
+                    prompt_tokens,
+                    self.latency_model.expected_completion_tokens(agent),
+                    concurrency=int(builder_config.get("max_concurrency", 1)),
+                )
+            )
+
+        self.logger.info(
+            "Dry run of %s: %.1f LLM calls, %d prompt tokens, %s "
+            "(latency model fitted on %d builds)",
+            builder_type,
+            estimate.llm_calls,
+            estimate.prompt_tokens,
+            format_duration(estimate.latency_ms),
+            estimate.history_runs,
+        )
+        return estimate
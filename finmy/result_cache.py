@@ -0,0 +1,128 @@
+"""
+Persistent cache of whole pipeline runs.
+
+Identical reconstruction requests (same query, keywords and sources, e.g.
+repeated demo or analyst queries from the web UI) otherwise re-run every
+pipeline step. `RunResultCache` stores the `BuildOutput` and builder save
+directory of finished runs in a SQLite database keyed by a stable hash of:
+
+- the sorted fingerprints of the sources (`source_fingerprint`);
+- the normalized query text and keywords (see `finmy.dedup.normalize_text`);
+- the summarizer, matcher, context and builder configurations.
+
+Entries expire after ``ttl_seconds``; the least recently used entries are
+evicted once the cache holds more than ``max_entries`` (see
+`finmy.sqlite_cache.SQLiteCache`). An entry whose save directory was removed
+is dropped on lookup. Entries are invalidated explicitly with `invalidate`
+(one key) or `clear`.
+"""
+
+import os
+import pickle
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from finmy.checkpoint import stable_hash
+from finmy.dedup import normalize_text
+from finmy.sqlite_cache import SQLiteCache
+
+
+@dataclass
+class CachedRun:
+    """A cached pipeline run.
+
+    Fields:
+    - `build_output`: output of the builder
+    - `save_dir`: directory where the builder saved its traces
+    - `created_at`: POSIX time the run was cached
+    """
+
+    build_output: Any
+    save_dir: Optional[str]
+    created_at: float
+
+
+def source_fingerprint(source: str, is_content: bool = False) -> str:
+    """Return the fingerprint of a data source.
+
+    Text contents and local files are fingerprinted by the SHA-256 of their
+    bytes, so a modified file yields a new key; URLs by their text, so that
+    changes of remote pages only show after the TTL.
+
+    Args:
+        source: URL, file path or text content.
+        is_content: Whether `source` is a text content.
+    """
+    if is_content:
+        return "content:" + hashlib.sha256(source.encode("utf-8")).hexdigest()
+    if os.path.isfile(source):
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return "file:" + digest.hexdigest()
+    return "url:" + source.strip()
+
+
+class RunResultCache(SQLiteCache):
+    """SQLite-backed, TTL- and size-bounded cache of pipeline runs.
+
+    Args:
+        path: Path of the SQLite database file.
+        ttl_seconds: Lifetime of an entry; None keeps entries until evicted.
+        max_entries: Maximum number of entries; None disables eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = 24 * 3600,
+        max_entries: Optional[int] = 1000,
+    ):
+        super().__init__(
+            path,
+            "run_results",
+            {"build_output": "BLOB NOT NULL", "save_dir": "TEXT"},
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+        )
+
+    @staticmethod
+    def make_key(
+        source_fingerprints: List[str],
+        query_text: Optional[str],
+        key_words: List[str],
+        configs: Dict[str, Any],
+    ) -> str:
+        """Compute the cache key of a run.
+
+        Args:
+            source_fingerprints: Fingerprints of the run's sources; their
+                order does not matter.
+            query_text: Natural language query text.
+            key_words: Keyword hints, in order.
+            configs: Component configurations determining the output.
+        """
+        return stable_hash(
+            {
+                "sources": sorted(source_fingerprints),
+                "query_text": normalize_text(query_text or ""),
+                "key_words": [normalize_text(k) for k in key_words],
+                "configs": stable_hash(configs),
+            }
+        )
+
+    def get(self, key: str) -> Optional[CachedRun]:
+        """Return the cached run of `key`, or None on a miss."""
+        row = self._get_row(key, lambda row: row[1] is None or os.path.isdir(row[1]))
+        if row is None:
+            return None
+        return CachedRun(
+            build_output=pickle.loads(row[0]), save_dir=row[1], created_at=row[2]
+        )
+
+    def put(self, key: str, build_output: Any, save_dir: Optional[str]) -> None:
+        """Store a run under `key`, evicting the least recently used entries
+        beyond ``max_entries``."""
+        self._put_row(key, (pickle.dumps(build_output), save_dir))
@@ -0,0 +1,281 @@
+"""
+Append-only segment store of text records.
+
+Used by `finmy.block_store.BlockStore` with ``FINMY_BLOCK_BACKEND=segments``.
+Texts are appended as raw UTF-8 bytes to large segment files and located
+through an index of (key -> segment, offset, length, chars) rows, so a read is
+one index lookup and a slice of a memory-mapped segment, without JSON
+parsing, and millions of small records cost neither an inode nor a JSON
+block each.
+
+`read_spans` reads character spans of records (see `finmy.document`) from
+the map without decoding the whole record: the bytes of the span alone for
+ASCII records (as many characters as bytes), and the record up to the end of
+the span otherwise.
+
+Layout:
+
+    <DATA_DIR>/segments/<writer_id>_<seq>.seg
+    <DATA_DIR>/segments/index.sqlite3
+
+Every store instance appends to its own segments and rolls over to a new one
+after ``segment_bytes``, so processes sharing the data folder never write to
+the same file; the SQLite index (WAL mode) is shared. Keys are
+``seg_<writer_id>_<n>``.
+
+Writes are buffered and persisted when the buffer exceeds ``buffer_bytes``,
+on `flush` and on `close`: the bytes are appended to the segment before the
+index rows are committed, so the index never points past the end of a
+segment. Buffered records are readable from the writing process.
+"""
+
+import os
+import mmap
+import codecs
+import uuid
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+SEGMENT_KEY_PREFIX = "seg_"
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+DEFAULT_BUFFER_BYTES = 4 * 1024 * 1024
+# Keys per index query, below SQLite's limit of bound variables
+LOOKUP_BATCH = 500
+# Bytes decoded at a time when reading a span of a multi-byte record
+SPAN_CHUNK_BYTES = 64 * 1024
+
+
+class SegmentStore:
+    """Thread-safe store of text records in append-only segment files.
+
+    Args:
+        folder: Data folder; segments are written to ``<folder>/segments``.
+        segment_bytes: Size after which a new segment is started.
+        buffer_bytes: Size of the write buffer persisted automatically.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+    ):
+        self.folder = folder
+        self.segment_dir = os.path.join(folder, "segments")
+        self.segment_bytes = segment_bytes
+        self.buffer_bytes = buffer_bytes
+        self.writer_id = uuid.uuid4().hex
+        self.closed = False
+
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._count = 0
+        self._segment_id = self._next_segment_id()
+        # End of the current segment, buffered bytes included
+        self._offset = 0
+        self._buffer = bytearray()
+        self._rows: List[Tuple[str, str, int, int, int]] = []
+        self._pending: Dict[str, str] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(self.segment_dir, "index.sqlite3"),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                key TEXT PRIMARY KEY,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                chars INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """)
+
+    def _next_segment_id(self) -> str:
+        segment_id = f"{self.writer_id}_{self._seq:06d}"
+        self._seq += 1
+        return segment_id
+
+    def _segment_path(self, segment_id: str) -> str:
+        return os.path.join(self.segment_dir, f"{segment_id}.seg")
+
+    def _append(self, text: str) -> str:
+        """Buffer `text` at the end of the current segment; the caller holds
+        the lock."""
+        data = text.encode("utf-8")
+        if self._offset and self._offset + len(data) > self.segment_bytes:
+            self.flush()
+            self._segment_id = self._next_segment_id()
+            self._offset = 0
+        key = f"{SEGMENT_KEY_PREFIX}{self.writer_id}_{self._count}"
+        self._count += 1
+        self._buffer += data
+        self._rows.append((key, self._segment_id, self._offset, len(data), len(text)))
+        self._pending[key] = text
+        self._offset += len(data)
+        if len(self._buffer) >= self.buffer_bytes:
+            self.flush()
+        return key
+
+    def write_many(self, texts: List[str]) -> List[str]:
+        """Append `texts` to the current segment.
+
+        Returns:
+            The keys of the new records, in the order of `texts`.
+        """
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Segment store of '{self.folder}' is closed")
+            return [self._append(text) for text in texts]
+
+    def _lookup(self, keys: List[str]) -> Dict[str, Tuple[str, int, int, int]]:
+        rows = {}
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Segment store of '{self.folder}' is closed")
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start : start + LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for key, segment, offset, length, chars in self._conn.execute(
+                    "SELECT key, segment, offset, length, chars FROM records "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ):
+                    rows[key] = (segment, offset, length, chars)
+        return rows
+
+    def _segment_map(self, segment_id: str, end: int) -> mmap.mmap:
+        """Return a map of `segment_id` covering at least `end` bytes."""
+        with self._lock:
+            if self.closed:
+                raise RuntimeError(f"Segment store of '{self.folder}' is closed")
+            mapped = self._maps.get(segment_id)
+            # Segments grow after they are mapped
+            if mapped is None or len(mapped) < end:
+                with open(self._segment_path(segment_id), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment_id] = mapped
+        return mapped
+
+    def read_many(self, keys: List[str]) -> List[str]:
+        """Return the texts of records `keys`, in order.
+
+        Raises:
+            KeyError: If a record does not exist.
+        """
+        texts: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key in self._pending:
+                    texts[key] = self._pending[key]
+                else:
+                    missing.append(key)
+        rows = self._lookup(missing) if missing else {}
+        for key in missing:
+            if key not in rows:
+                raise KeyError(key)
+            segment_id, offset, length, _ = rows[key]
+            if length == 0:
+                texts[key] = ""
+                continue
+            mapped = self._segment_map(segment_id, offset + length)
+            texts[key] = mapped[offset : offset + length].decode("utf-8")
+        return [texts[key] for key in keys]
+
+    def _read_span(
+        self, row: Tuple[str, int, int, int], start: int, end: Optional[int]
+    ) -> str:
+        """Return the characters `start:end` of the record at `row`."""
+        segment_id, offset, length, chars = row
+        end = chars if end is None else min(end, chars)
+        if start >= end:
+            return ""
+        mapped = self._segment_map(segment_id, offset + length)
+        if chars == length:
+            return mapped[offset + start : offset + end].decode("utf-8")
+        # Character offsets of multi-byte texts are found by decoding the
+        # record from its start, up to the end of the span only
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pieces = []
+        seen = 0
+        position = offset
+        record_end = offset + length
+        while seen < end and position < record_end:
+            chunk_end = min(position + SPAN_CHUNK_BYTES, record_end)
+            chunk = decoder.decode(mapped[position:chunk_end], chunk_end == record_end)
+            if seen + len(chunk) > start:
+                pieces.append(chunk[max(0, start - seen) : end - seen])
+            seen += len(chunk)
+            position = chunk_end
+        return "".join(pieces)
+
+    def read_spans(self, spans: List[Tuple[str, int, Optional[int]]]) -> List[str]:
+        """Return the character spans ``(key, start, end)`` of records, in
+        order, read from the segment maps; an `end` of None is the end of the
+        record.
+
+        Raises:
+            KeyError: If a record does not exist.
+        """
+        texts: List[Optional[str]] = [None] * len(spans)
+        missing = []
+        with self._lock:
+            for i, (key, start, end) in enumerate(spans):
+                if key in self._pending:
+                    texts[i] = self._pending[key][start:end]
+                else:
+                    missing.append(i)
+        rows = (
+            self._lookup(list(dict.fromkeys(spans[i][0] for i in missing)))
+            if missing
+            else {}
+        )
+        for i in missing:
+            key, start, end = spans[i]
+            if key not in rows:
+                raise KeyError(key)
+            texts[i] = self._read_span(rows[key], start, end)
+        return texts
+
+    def flush(self) -> None:
+        """Append the buffered records to their segment and index them."""
+        with self._lock:
+            if not self._rows:
+                return
+            if self._buffer:
+                with open(self._segment_path(self._segment_id), "ab") as f:
+                    f.write(self._buffer)
+                # A failed index commit is retried without appending twice
+                self._buffer = bytearray()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO records (key, segment, offset, length, chars) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    self._rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._rows = []
+            self._pending = {}
+
+    def close(self) -> None:
+        """Flush the store, then close its index connection and segment maps;
+        the store can no longer be read or written."""
+        with self._lock:
+            if not self.closed:
+                self.flush()
+                for mapped in self._maps.values():
+                    mapped.close()
+                self._maps = {}
+                self._conn.close()
+                self.closed = True
@@ -0,0 +1,195 @@
+"""
+SQLite storage shared by the persistent caches and the job queue.
+
+`sqlite_transaction` opens a connection to a database file that may be shared
+by threads and processes (WAL mode) and runs one ``BEGIN IMMEDIATE``
+transaction on it, committed on exit and rolled back on error.
+
+`SQLiteCache` is a key-value table bounded in time and size, the base of
+`finmy.result_cache.RunResultCache` and
+`finmy.summarizer.cache.SummarizationCache`. Subclasses name the table and
+its value columns and (de)serialize the values; the base class handles:
+
+- expiry: entries older than ``ttl_seconds`` are dropped on lookup and by
+  `purge_expired`;
+- eviction: the least recently used entries beyond ``max_entries`` are
+  deleted on every write;
+- invalidation (`invalidate`, `clear`) and the hit/miss/expiry/eviction
+  counters of the instance (`stats`); lookups are also recorded into the
+  current pipeline step metrics.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Tuple
+
+from finmy.metrics import record_cache_lookup
+
+
+@contextmanager
+def sqlite_transaction(path: str) -> Iterator[sqlite3.Connection]:
+    """Run one immediate transaction on the SQLite database at `path`."""
+    conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+class SQLiteCache:
+    """SQLite-backed, TTL- and size-bounded key-value table.
+
+    Args:
+        path: Path of the SQLite database file.
+        table: Name of the table of the entries.
+        columns: Value columns of the table, mapped to their SQL types.
+        ttl_seconds: Lifetime of an entry; None keeps entries until evicted.
+        max_entries: Maximum number of entries; None disables eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        columns: Dict[str, str],
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.path = path
+        self.table = table
+        self.columns = list(columns)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        column_defs = ", ".join(
+            ["key TEXT PRIMARY KEY"]
+            + [f"{name} {sql_type}" for name, sql_type in columns.items()]
+            + ["created_at REAL NOT NULL", "accessed_at REAL NOT NULL"]
+        )
+        with self._transaction() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed "
+                f"ON {table} (accessed_at)"
+            )
+
+    def _transaction(self) -> ContextManager[sqlite3.Connection]:
+        return sqlite_transaction(self.path)
+
+    def _count(self, **counters: int) -> None:
+        with self._stats_lock:
+            for name, value in counters.items():
+                self._stats[name] += value
+
+    def _get_row(
+        self, key: str, is_valid: Optional[Callable[[Tuple], bool]] = None
+    ) -> Optional[Tuple]:
+        """Return the values of the entry of `key` followed by its creation
+        time, or None on a miss.
+
+        Args:
+            key: Key of the entry.
+            is_valid: Optional check of the values; an entry failing it is
+                dropped like an expired one.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(self.columns)}, created_at FROM {self.table} "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            expired = row is not None and (
+                (self.ttl_seconds is not None and row[-1] + self.ttl_seconds < now)
+                or (is_valid is not None and not is_valid(row))
+            )
+            if expired:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            elif row is not None:
+                conn.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                    (now, key),
+                )
+
+        hit = row is not None and not expired
+        self._count(hits=int(hit), misses=int(not hit), expired=int(expired))
+        record_cache_lookup(hit)
+        return row if hit else None
+
+    def _put_row(self, key: str, values: Tuple) -> None:
+        """Store the values of `key`, evicting the least recently used
+        entries beyond ``max_entries``."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, {', '.join(self.columns)}, created_at, accessed_at) "
+                f"VALUES ({', '.join('?' * (len(self.columns) + 3))})",
+                (key, *values, now, now),
+            )
+            if self.max_entries is not None:
+                evicted = conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+                self._count(evicted=evicted)
+
+    def invalidate(self, key: str) -> bool:
+        """Delete the entry of `key`.
+
+        Returns:
+            Whether an entry was deleted.
+        """
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM {self.table} WHERE key = ?", (key,)
+            ).rowcount
+        return deleted > 0
+
+    def purge_expired(self) -> int:
+        """Delete expired entries.
+
+        Returns:
+            The number of deleted entries.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        with self._transaction() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+        self._count(expired=deleted)
+        return deleted
+
+    def clear(self) -> None:
+        """Delete all entries."""
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss/eviction counters of this instance, the hit
+        rate and the current number of entries."""
+        with self._transaction() as conn:
+            entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = entries
+        return stats
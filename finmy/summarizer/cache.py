@@ -0,0 +1,105 @@
+"""
+Persistent cache of query summarizations.
+
+Summarizing a query costs a spaCy transformer pass (`KWRuleSummarizer`) or an
+LLM call (`KWLMSummarizer`), and the same query is typically summarized again
+by later runs. `SummarizationCache` stores summarizations in a SQLite database
+keyed by:
+
+- the normalized query text (see `finmy.dedup.normalize_text`);
+- the normalized keyword hints, in order;
+- the summarizer class;
+- a hash of the summarizer configuration (model name, prompts, ...).
+
+Entries expire after ``ttl_seconds`` and the least recently used entries are
+evicted once the cache holds more than ``max_entries`` (see
+`finmy.sqlite_cache.SQLiteCache`). The database may be shared by threads and
+processes. Hit and miss counts are kept per cache instance (`stats`) and
+recorded into the current pipeline step metrics.
+"""
+
+import json
+import dataclasses
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..checkpoint import stable_hash
+from ..dedup import normalize_text
+from ..generic import UserQueryInput
+from ..sqlite_cache import SQLiteCache
+
+if TYPE_CHECKING:
+    from .summarizer import SummarizedUserQuery
+
+
+class SummarizationCache(SQLiteCache):
+    """SQLite-backed, TTL- and size-bounded summarization cache.
+
+    Args:
+        path: Path of the SQLite database file.
+        ttl_seconds: Lifetime of an entry; None keeps entries until evicted.
+        max_entries: Maximum number of entries; None disables eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_entries: Optional[int] = 10000,
+    ):
+        super().__init__(
+            path,
+            "summaries",
+            {"value": "TEXT NOT NULL"},
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+        )
+
+    @staticmethod
+    def make_key(
+        query_input: UserQueryInput, summarizer_type: str, config: Optional[dict]
+    ) -> str:
+        """Compute the cache key of summarizing `query_input`.
+
+        Args:
+            query_input: The query to summarize.
+            summarizer_type: Name of the summarizer class.
+            config: Summarizer configuration; its ``cache`` section is ignored.
+        """
+        config = {k: v for k, v in (config or {}).items() if k != "cache"}
+        return stable_hash(
+            {
+                "query_text": normalize_text(query_input.query_text or ""),
+                "key_words": [normalize_text(k) for k in query_input.key_words],
+                "summarizer_type": summarizer_type,
+                "config": stable_hash(config),
+            }
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached summarization fields of `key`, or None on a miss."""
+        row = self._get_row(key)
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, summarized: "SummarizedUserQuery") -> None:
+        """Store `summarized` under `key`, evicting the least recently used
+        entries beyond ``max_entries``."""
+        value = json.dumps(
+            dataclasses.asdict(summarized), ensure_ascii=False, default=str
+        )
+        self._put_row(key, (value,))
+
+
+def create_summarization_cache(
+    cache_config: Optional[dict],
+) -> Optional[SummarizationCache]:
+    """Create the cache described by a summarizer's ``cache`` section.
+
+    Returns None when the cache is disabled or not configured.
+    """
+    if not cache_config or not cache_config.get("enabled", False):
+        return None
+    return SummarizationCache(
+        path=cache_config["path"],
+        ttl_seconds=cache_config.get("ttl_seconds", 7 * 24 * 3600),
+        max_entries=cache_config.get("max_entries", 10000),
+    )
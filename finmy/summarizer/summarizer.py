@@ -12,18 +12,19 @@ Support:
 import re
 import sys
 import time
+import asyncio
 import subprocess
 from collections import Counter
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 
-import spacy
-from spacy.matcher import Matcher
 from lmbase.inference import api_call
 
 from ..generic import UserQueryInput
 from ..matcher.utils import safe_parse_json
+from ..llm_scheduler import PRIORITY_SUMMARIZE, acall_llm, allm_request, llm_request
+from .cache import create_summarization_cache
 
 
 @dataclass
@@ -45,6 +46,9 @@ def load_spacy_model(model_name: str):
     """
     Attempts to load a spaCy model. If it fails, downloads it automatically.
     """
+    # spaCy is heavy to import; only load it when a model is requested
+    import spacy
+
     try:
         nlp = spacy.load(model_name)
         print(f"Successfully loaded spaCy model: {model_name}")
@@ -78,6 +82,8 @@ class BaseSummarizer(ABC):
     ):
         self.config = config
         self.method_name = method_name
+        # Persistent summarization cache, configured by ``config["cache"]``
+        self.cache = create_summarization_cache((config or {}).get("cache"))
 
     @abstractmethod
     def summarize(self, query_input: UserQueryInput) -> SummarizedUserQuery:
@@ -87,19 +93,80 @@ class BaseSummarizer(ABC):
         - List[str]: list of strings, each string is a matched sub-content that may containing one target paragraph (word) or multiple paragraphs (words).
         """
 
+    async def asummarize(self, query_input: UserQueryInput) -> SummarizedUserQuery:
+        """Asynchronous `summarize`.
+
+        The default implementation executes `summarize` in a worker thread,
+        which suits the CPU-bound rule-based summarizers; LLM-based
+        summarizers override it to await the model natively.
+        """
+        return await asyncio.to_thread(self.summarize, query_input)
+
     def invoke_llm(self, messages, llm_name: str) -> str:
         """Invoke the LLM with prepared messages and return raw content."""
         llm = api_call.LangChainAPIInference(lm_name=llm_name)
-        resp = llm._inference(messages)
+        with llm_request(llm_name, messages, PRIORITY_SUMMARIZE) as request:
+            resp = llm._inference(messages)
+            request.finish(resp.response, usage=getattr(resp, "usage", None))
+        return resp.response
+
+    async def ainvoke_llm(self, messages, llm_name: str) -> str:
+        """Asynchronous `invoke_llm`; the scheduler slot and the call are
+        awaited on the event loop."""
+        llm = api_call.LangChainAPIInference(lm_name=llm_name)
+        async with allm_request(llm_name, messages, PRIORITY_SUMMARIZE) as request:
+            resp = await acall_llm(llm, "_inference", messages)
+            request.finish(resp.response, usage=getattr(resp, "usage", None))
         return resp.response
 
+    def _cached(self, query_input: UserQueryInput, start_time: float):
+        """Return ``(cache_key, cached summarization or None)``."""
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.make_key(query_input, type(self).__name__, self.config)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        summarized = SummarizedUserQuery(**cached)
+        summarized.extras["cache_hit"] = True
+        summarized.extras["time_cost"] = time.time() - start_time
+        return cache_key, summarized
+
     def run(self, query_input: UserQueryInput) -> SummarizedUserQuery:
-        """End-to-end execution returning a standardized `summarize`."""
+        """End-to-end execution returning a standardized `summarize`.
+
+        When the summarization cache is enabled, a cached summarization of the
+        same query is returned (with ``extras["cache_hit"] = True``) instead of
+        summarizing again.
+        """
         # Compute the time of the whole matching process
         start_time = time.time()
+        cache_key, cached = self._cached(query_input, start_time)
+        if cached is not None:
+            return cached
         summarized = self.summarize(query_input)
         end_time = time.time()
         summarized.extras["time_cost"] = end_time - start_time
+        if cache_key is not None:
+            self.cache.put(cache_key, summarized)
+        return summarized
+
+    async def arun(self, query_input: UserQueryInput) -> SummarizedUserQuery:
+        """Asynchronous `run`, used by `FinmyAsyncPipeline`.
+
+        The summarization goes through `asummarize`; the cache lookup and
+        update run in a worker thread, so the event loop never waits on disk.
+        """
+        start_time = time.time()
+        cache_key, cached = await asyncio.to_thread(
+            self._cached, query_input, start_time
+        )
+        if cached is not None:
+            return cached
+        summarized = await self.asummarize(query_input)
+        summarized.extras["time_cost"] = time.time() - start_time
+        if cache_key is not None:
+            await asyncio.to_thread(self.cache.put, cache_key, summarized)
         return summarized
 
 
@@ -111,9 +178,24 @@ class KWRuleSummarizer(BaseSummarizer):
 
     def __init__(self, summarizer_config):
         super().__init__(config=summarizer_config, method_name="keywords_summarize")
-        # Download necessary NLTK data for English
-        self.nlp_en = load_spacy_model("en_core_web_md")
-        self.nlp_zh = load_spacy_model("zh_core_web_trf")
+        # spaCy pipelines are loaded on first use of each language, so that
+        # English-only queries never load the Chinese transformer model
+        self._nlp_en = None
+        self._nlp_zh = None
+
+    @property
+    def nlp_en(self):
+        """English spaCy pipeline, loaded on first use."""
+        if self._nlp_en is None:
+            self._nlp_en = load_spacy_model("en_core_web_md")
+        return self._nlp_en
+
+    @property
+    def nlp_zh(self):
+        """Chinese spaCy pipeline, loaded on first use."""
+        if self._nlp_zh is None:
+            self._nlp_zh = load_spacy_model("zh_core_web_trf")
+        return self._nlp_zh
 
     def rule_summarize(self, content: str) -> dict:
         """Extract nouns and noun phrases with frequencies from English or Chinese content. Summarized the content based on the rule.
@@ -132,13 +214,9 @@ class KWRuleSummarizer(BaseSummarizer):
         # Lightweight language detection using Unicode ranges.
         chinese_chars = len(re.findall(r"[\u4e00-\u9fff]", content))
         total_chars = len(re.findall(r"[\w\u4e00-\u9fff]", content))
-        if total_chars > 0 and chinese_chars / total_chars > 0.3:
-            doc = self.nlp_zh(content)
-            nlp_model = self.nlp_zh
-        else:
-            doc = self.nlp_en(content)
-            nlp_model = self.nlp_en
-        is_en = nlp_model == self.nlp_en
+        is_en = not (total_chars > 0 and chinese_chars / total_chars > 0.3)
+        nlp_model = self.nlp_en if is_en else self.nlp_zh
+        doc = nlp_model(content)
 
         # Accumulator for extracted terms/phrases.
         all_terms = []
@@ -186,6 +264,8 @@ class KWRuleSummarizer(BaseSummarizer):
                 all_terms.append(phrase)
 
         # 3) Matcher rules: compound nouns and short adjective-led noun phrases
+        from spacy.matcher import Matcher
+
         matcher = Matcher(nlp_model.vocab)
         matcher.add(
             "COMPOUND_NP",
@@ -347,3 +427,15 @@ class KWLMSummarizer(BaseSummarizer):
             key_words=kws,
             extras={"raw": raw},
         )
+
+    async def asummarize(self, query_input: UserQueryInput) -> SummarizedUserQuery:
+        """Asynchronous `summarize`: the LLM call is awaited natively."""
+        content = query_input.query_text.strip()
+        messages = self._build_messages(content)
+        raw = await self.ainvoke_llm(messages, self.llm_name)
+        kws = self._parse_keywords(raw)
+        return SummarizedUserQuery(
+            summarization=content,
+            key_words=kws,
+            extras={"raw": raw},
+        )
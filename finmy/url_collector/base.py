@@ -2,9 +2,10 @@
 Base entities and containers for URL collection and parsing.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 
 @dataclass
@@ -42,4 +43,34 @@ class BaseURLCollector(ABC):
     
     def run(self, input_data: URLCollectorInput) -> URLCollectorOutput:
         """Run the URL collection pipeline."""
-        return self.collect(input_data)
\ No newline at end of file
+        return self.collect(input_data)
+
+    def iter_collect(
+        self, input_data: URLCollectorInput
+    ) -> Iterator[URLCollectorOutput]:
+        """Collect and parse URLs from the input, yielding outputs as URLs
+        are parsed.
+
+        The default implementation yields the output of `collect` once;
+        collectors parsing URLs one by one override it.
+        """
+        yield self.collect(input_data)
+
+    def iter_run(
+        self, input_data: URLCollectorInput
+    ) -> Iterator[URLCollectorOutput]:
+        """Run the URL collection pipeline, yielding outputs as URLs are
+        parsed."""
+        yield from self.iter_collect(input_data)
+
+    async def acollect(self, input_data: URLCollectorInput) -> URLCollectorOutput:
+        """Asynchronously collect and parse URLs from the input.
+
+        The default implementation executes `collect` in a worker thread;
+        collectors with an async HTTP client override it.
+        """
+        return await asyncio.to_thread(self.collect, input_data)
+
+    async def arun(self, input_data: URLCollectorInput) -> URLCollectorOutput:
+        """Asynchronously run the URL collection pipeline."""
+        return await self.acollect(input_data)
\ No newline at end of file
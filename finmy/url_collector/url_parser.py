@@ -8,15 +8,17 @@ It includes fallback to Selenium for JavaScript-heavy pages that cannot be parse
 
 import csv
 import json
+import asyncio
 import logging
 import random
 import re
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 
+import httpx
 import requests
 from bs4 import BeautifulSoup
 import mysql.connector
@@ -101,21 +103,22 @@ class URLParser(BaseURLCollector):
         }
         self.session.headers.update(headers)
 
-    def collect(self, input_data: URLCollectorInput) -> URLCollectorOutput:
+    def _iter_parsed(
+        self, url_list: List[str]
+    ) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
         """
-        Collect and parse URLs from the input.
+        Parse URLs one by one, waiting `delay` plus a random jitter between
+        requests to avoid being blocked.
 
         Args:
-            input_data (URLCollectorInput): Input containing URLs to parse.
+            url_list (List[str]): URLs to parse.
 
-        Returns:
-            URLCollectorOutput: Parsing results and contents.
+        Yields:
+            Tuple[Dict[str, Any], List[str]]: The result of each URL (an error
+            entry when it could not be parsed) and its log messages.
         """
-        url_list = input_data.urls
-        results = []
-        logs = []
-
         for idx, url in enumerate(url_list, 1):
+            logs = []
             try:
                 log_msg = f"Parsing URL {idx}/{len(url_list)}: {url}"
                 self.logger.info(log_msg)
@@ -127,17 +130,14 @@ class URLParser(BaseURLCollector):
 
                 # Parse individual URL
                 result = self.parse_single_url(url, idx)
-                if result:
-                    results.append(result)
-                else:
+                if not result:
                     # Create error result entry
-                    error_result = {
+                    result = {
                         "ID": idx,
                         "url": url,
                         "parsertime": datetime.now().isoformat(),
                         "content": {"error": "Failed to parse URL"},
                     }
-                    results.append(error_result)
                     logs.append(f"Failed to parse URL {url}")
 
             except Exception as e:
@@ -145,15 +145,119 @@ class URLParser(BaseURLCollector):
                 self.logger.error(error_msg)
                 logs.append(error_msg)
                 # Create error result entry
-                results.append(
-                    {
-                        "ID": idx,
-                        "url": url,
-                        "parsertime": datetime.now().isoformat(),
-                        "content": {"error": str(e)},
-                    }
-                )
+                result = {
+                    "ID": idx,
+                    "url": url,
+                    "parsertime": datetime.now().isoformat(),
+                    "content": {"error": str(e)},
+                }
+            yield result, logs
 
+    def collect(self, input_data: URLCollectorInput) -> URLCollectorOutput:
+        """
+        Collect and parse URLs from the input.
+
+        Args:
+            input_data (URLCollectorInput): Input containing URLs to parse.
+
+        Returns:
+            URLCollectorOutput: Parsing results and contents.
+        """
+        results = []
+        logs = []
+        for result, url_logs in self._iter_parsed(input_data.urls):
+            results.append(result)
+            logs.extend(url_logs)
+
+        return self._build_output(input_data, results, logs)
+
+    def iter_collect(
+        self, input_data: URLCollectorInput
+    ) -> Iterator[URLCollectorOutput]:
+        """
+        Collect and parse URLs from the input, yielding the output of every
+        URL as soon as its page is parsed. Requests are spaced as in `collect`.
+
+        Args:
+            input_data (URLCollectorInput): Input containing URLs to parse.
+
+        Yields:
+            URLCollectorOutput: Parsing result and content of one URL.
+        """
+        for result, logs in self._iter_parsed(input_data.urls):
+            yield self._build_output(input_data, [result], logs)
+
+    async def acollect(self, input_data: URLCollectorInput) -> URLCollectorOutput:
+        """
+        Asynchronously collect and parse URLs from the input.
+
+        Pages are fetched with an `httpx.AsyncClient` carrying the session
+        headers, so waiting on the network does not hold a thread. HTML
+        parsing and the Selenium fallback run in worker threads.
+
+        Args:
+            input_data (URLCollectorInput): Input containing URLs to parse.
+
+        Returns:
+            URLCollectorOutput: Parsing results and contents.
+        """
+        url_list = input_data.urls
+        results = []
+        logs = []
+
+        async with httpx.AsyncClient(
+            headers=dict(self.session.headers),
+            timeout=self.timeout,
+            follow_redirects=True,
+        ) as client:
+            for idx, url in enumerate(url_list, 1):
+                try:
+                    log_msg = f"Parsing URL {idx}/{len(url_list)}: {url}"
+                    self.logger.info(log_msg)
+                    logs.append(log_msg)
+
+                    # Add delay between requests to avoid being blocked
+                    if idx > 1:
+                        await asyncio.sleep(self.delay + random.uniform(0.1, 0.5))
+
+                    result = await self.aparse_single_url(client, url, idx)
+                    if result:
+                        results.append(result)
+                    else:
+                        results.append(
+                            {
+                                "ID": idx,
+                                "url": url,
+                                "parsertime": datetime.now().isoformat(),
+                                "content": {"error": "Failed to parse URL"},
+                            }
+                        )
+                        logs.append(f"Failed to parse URL {url}")
+
+                except Exception as e:
+                    error_msg = f"Error parsing URL {url}: {str(e)}"
+                    self.logger.error(error_msg)
+                    logs.append(error_msg)
+                    results.append(
+                        {
+                            "ID": idx,
+                            "url": url,
+                            "parsertime": datetime.now().isoformat(),
+                            "content": {"error": str(e)},
+                        }
+                    )
+
+        return self._build_output(input_data, results, logs)
+
+    def _build_output(
+        self,
+        input_data: URLCollectorInput,
+        results: List[Dict[str, Any]],
+        logs: List[str],
+    ) -> URLCollectorOutput:
+        """
+        Extract the clean content of the parsing results into the output.
+        """
         # Process results to extract clean content
         from finmy.url_collector.url_parser_clean import extract_content_from_results
 
@@ -194,6 +298,90 @@ class URLParser(BaseURLCollector):
 
         return result
 
+    async def aparse_single_url(
+        self, client: httpx.AsyncClient, url: str, url_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Asynchronous `parse_single_url` fetching the page with `client`.
+
+        Args:
+            client (httpx.AsyncClient): Client used to fetch the page.
+            url (str): URL to parse.
+            url_id (int): ID for the URL.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parsed result or None if failed.
+        """
+        result = await self._parse_with_httpx(client, url, url_id)
+
+        # If the fetch failed or extracted minimal content, try Selenium fallback
+        if self.use_selenium_fallback and (
+            result is None or self._has_minimal_content(result)
+        ):
+            self.logger.info(f"Trying Selenium fallback for URL: {url}")
+            selenium_result = await asyncio.to_thread(
+                self._parse_with_selenium, url, url_id
+            )
+            if selenium_result and not self._has_minimal_content(selenium_result):
+                return selenium_result
+
+        return result
+
+    async def _parse_with_httpx(
+        self, client: httpx.AsyncClient, url: str, url_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Parse URL using an async httpx client and BeautifulSoup.
+
+        Args:
+            client (httpx.AsyncClient): Client used to fetch the page.
+            url (str): URL to parse.
+            url_id (int): ID for the URL.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parsed result or None if failed.
+        """
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            # Parsing large pages is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(
+                self._parse_html, response.content, url, url_id
+            )
+
+        except httpx.HTTPError as e:
+            self.logger.error(f"Request error for URL {url}: {str(e)}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error parsing URL {url}: {str(e)}")
+            return None
+
+    def _parse_html(self, html: bytes, url: str, url_id: int) -> Dict[str, Any]:
+        """
+        Parse the HTML of a page into a structured result.
+
+        Args:
+            html (bytes): Raw HTML content of the page.
+            url (str): URL of the page.
+            url_id (int): ID for the URL.
+
+        Returns:
+            Dict[str, Any]: Parsed result.
+        """
+        # Parse HTML content
+        soup = BeautifulSoup(html, "html.parser")
+
+        # Extract content in order
+        content_elements = self.extract_content_elements(soup, url)
+
+        # Structure the result
+        return {
+            "ID": url_id,
+            "url": url,
+            "parsertime": datetime.now().isoformat(),
+            "content": content_elements,
+        }
+
     def _parse_with_requests(self, url: str, url_id: int) -> Optional[Dict[str, Any]]:
         """
         Parse URL using requests and BeautifulSoup.
@@ -214,21 +402,7 @@ class URLParser(BaseURLCollector):
             if response.encoding.lower() == "iso-8859-1":
                 response.encoding = response.apparent_encoding
 
-            # Parse HTML content
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            # Extract content in order
-            content_elements = self.extract_content_elements(soup, url)
-
-            # Structure the result
-            result = {
-                "ID": url_id,
-                "url": url,
-                "parsertime": datetime.now().isoformat(),
-                "content": content_elements,
-            }
-
-            return result
+            return self._parse_html(response.content, url, url_id)
 
         except requests.RequestException as e:
             self.logger.error(f"Request error for URL {url}: {str(e)}")
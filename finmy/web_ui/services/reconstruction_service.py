@@ -11,7 +11,7 @@ from typing import Dict, Any, List
 import streamlit as st
 
 from finmy.pipeline import FinmyPipeline
-from finmy.builder.utils import estimate_complete_time
+from finmy.planner import DryRunPlanner, format_duration
 from finmy.web_ui.utils.formatters import format_timestamp
 from finmy.web_ui.services.data_collector_service import DataCollectorService
 
@@ -90,7 +90,19 @@ class ReconstructionService:
         )
     
     def _limit_content_length(self, content_list: List[str]) -> List[str]:
-        """Limit content to maximum allowed length."""
+        """Limit content to maximum allowed length.
+
+        With ``context_config`` enabled every content is kept: the pipeline
+        packs the most relevant matched samples into the builder token budget
+        (`finmy.context_packer`), instead of the first ones to arrive.
+        """
+        if self.config.get("context_config", {}).get("enabled", False):
+            logging.info(
+                "Context packing enabled, passing all %d contents to the pipeline",
+                len(content_list),
+            )
+            return content_list
+
         max_length = self.config.get("all_content_config", {}).get(
             "max_content_length", float("inf")
         )
@@ -124,13 +136,15 @@ class ReconstructionService:
         )
         
         # Estimate completion time
-        estimate_time = estimate_complete_time(
-            str_list=contents, build_type=builder_type
+        estimate = DryRunPlanner(self.config).plan(
+            contents=contents, query_text=query_text, key_words=keywords
         )
+        estimate_time = format_duration(estimate.latency_ms)
         st.session_state.estimate_time = estimate_time
         st.write(
             f"**{format_timestamp()}** - Estimated time to complete building: "
-            f"**{estimate_time} minutes**"
+            f"**{estimate_time}** ({estimate.llm_calls:.0f} LLM calls, "
+            f"{estimate.prompt_tokens} prompt tokens)"
         )
         
         try:
@@ -151,8 +165,15 @@ class ReconstructionService:
                 contents=contents, query_text=query_text, key_words=keywords
             )
             
-            st.session_state.save_builder_dir_path = pipeline.save_builder_dir_path
-            logging.info("pipeline save_builder_dir_path: %s", pipeline.save_builder_dir_path)
+            # Save directory of this run, or of the cached run on a cache hit
+            extras = getattr(pipeline_result, "extras", None)
+            builder_save_dir = (
+                extras.get("save_dir") if isinstance(extras, dict) else None
+            )
+            st.session_state.save_builder_dir_path = (
+                builder_save_dir or pipeline.save_builder_dir_path
+            )
+            logging.info("pipeline save_builder_dir_path: %s", st.session_state.save_builder_dir_path)
             logging.info("st.session_state.save_builder_dir_path: %s", st.session_state.save_builder_dir_path)
             
             logging.info("type of pipeline_result: %s", type(pipeline_result))